@@ -0,0 +1,346 @@
+import re
+from bisect import bisect_right
+
+# Alocação linear-scan (Poletto & Sarkar) dos registradores virtuais %v0, %v1, ...
+# que ContextoAssembly.novo_reg entrega. Cada unidade (main ou uma função) é
+# tratada à parte: liveness sobre os blocos básicos do assembly, um intervalo
+# [início, fim] por registrador virtual e varredura em ordem de início.
+
+TEMPORARIOS = ('t0', 't1', 't2', 't3', 't4')
+SALVOS = ('s1', 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 's11')
+# Reservados para carregar/guardar os virtuais que foram para a pilha.
+RASCUNHO = ('t5', 't6')
+# Convenção de chamada: os 8 primeiros argumentos vão em a0..a7, os demais
+# na pilha do chamador (0(sp), 4(sp), ...), e o resultado volta em a0.
+# Dentro da função, s0 aponta para o sp de entrada, onde estão esses extras.
+REGISTRADORES_ARGUMENTO = ('a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7')
+PONTEIRO_DE_QUADRO = 's0'
+
+# Instruções cujo primeiro operando é escrito; nas demais todos são lidos.
+DEFINE_PRIMEIRO = {
+    'li', 'la', 'lw', 'mv', 'neg', 'not', 'seqz', 'snez',
+    'add', 'sub', 'mul', 'div', 'rem', 'and', 'or', 'xor', 'slt', 'sltu', 'sll', 'sra', 'srl',
+    'addi', 'andi', 'ori', 'xori', 'slti', 'sltiu', 'slli', 'srai', 'srli',
+}
+DESVIOS = {'beq', 'bne', 'blt', 'bge', 'bgt', 'ble', 'beqz', 'bnez', 'bltz', 'bgez', 'bgtz', 'blez'}
+
+# Os virtuais se chamam %v0, %v1, ...: nenhum identificador do fonte começa
+# com '%', então um símbolo (la x, call f, uma label) nunca passa por um.
+PREFIXO_VIRTUAL = '%v'
+REGISTRADOR_VIRTUAL = re.compile(r'%v\d+')
+_na_pilha = re.compile(r'^(-?\d+)\(sp\)$')
+
+
+def eh_virtual(operando):
+    return REGISTRADOR_VIRTUAL.fullmatch(operando) is not None
+
+
+class _Instrucao:
+    __slots__ = ('linha', 'opcode', 'operandos', 'defs', 'usos')
+
+    def __init__(self, linha):
+        self.linha = linha
+        texto = linha.split('#', 1)[0].strip()
+        self.opcode, _, resto = texto.partition(' ')
+        self.operandos = [parte.strip() for parte in resto.split(',')] if resto else []
+        if self.opcode in DEFINE_PRIMEIRO and self.operandos:
+            self.defs = REGISTRADOR_VIRTUAL.findall(self.operandos[0])
+            self.usos = REGISTRADOR_VIRTUAL.findall(', '.join(self.operandos[1:]))
+        else:
+            self.defs = []
+            self.usos = REGISTRADOR_VIRTUAL.findall(resto)
+
+    def destino(self):
+        # Label para onde a instrução desvia, se for um desvio.
+        if self.opcode in DESVIOS or self.opcode == 'j':
+            return self.operandos[-1]
+        return None
+
+    def encerra_bloco(self):
+        return self.opcode in DESVIOS or self.opcode in ('j', 'ret')
+
+
+def _eh_label(linha):
+    return linha.endswith(':') and ' ' not in linha
+
+
+def _eh_comentario(linha):
+    return not linha.strip() or linha.lstrip().startswith('#')
+
+
+def _blocos(instrucoes, labels):
+    # Blocos como intervalos [inicio, fim) sobre a lista de instruções.
+    inicios = {0}
+    for posicao, instrucao in enumerate(instrucoes):
+        if instrucao.encerra_bloco():
+            inicios.add(posicao + 1)
+    inicios.update(labels.values())
+    inicios = sorted(inicio for inicio in inicios if inicio < len(instrucoes))
+    blocos = [(inicio, fim) for inicio, fim in zip(inicios, inicios[1:] + [len(instrucoes)])]
+    bloco_em = {inicio: numero for numero, (inicio, _) in enumerate(blocos)}
+    sucessores = []
+    for numero, (inicio, fim) in enumerate(blocos):
+        ultima = instrucoes[fim - 1]
+        proprios = []
+        destino = ultima.destino()
+        if destino is not None and destino in labels and labels[destino] in bloco_em:
+            proprios.append(bloco_em[labels[destino]])
+        if ultima.opcode not in ('j', 'ret') and numero + 1 < len(blocos):
+            proprios.append(numero + 1)
+        sucessores.append(proprios)
+    return blocos, sucessores
+
+
+def _vivos_na_saida(instrucoes, blocos, sucessores):
+    usa = []
+    define = []
+    for inicio, fim in blocos:
+        lidos, escritos = set(), set()
+        for instrucao in instrucoes[inicio:fim]:
+            lidos.update(v for v in instrucao.usos if v not in escritos)
+            escritos.update(instrucao.defs)
+        usa.append(lidos)
+        define.append(escritos)
+    entrada = [set() for _ in blocos]
+    saida = [set() for _ in blocos]
+    mudou = True
+    while mudou:
+        mudou = False
+        for numero in range(len(blocos) - 1, -1, -1):
+            nova_saida = set()
+            for sucessor in sucessores[numero]:
+                nova_saida |= entrada[sucessor]
+            nova_entrada = usa[numero] | (nova_saida - define[numero])
+            if nova_saida != saida[numero] or nova_entrada != entrada[numero]:
+                saida[numero] = nova_saida
+                entrada[numero] = nova_entrada
+                mudou = True
+    return entrada, saida
+
+
+def _intervalos(instrucoes, blocos, entrada, saida):
+    # Intervalo conservador: da primeira à última posição em que o virtual é
+    # referenciado ou está vivo na fronteira de algum bloco.
+    intervalos = {}
+
+    def cobrir(virtual, posicao):
+        intervalo = intervalos.get(virtual)
+        if intervalo is None:
+            intervalos[virtual] = [posicao, posicao]
+        elif posicao < intervalo[0]:
+            intervalo[0] = posicao
+        elif posicao > intervalo[1]:
+            intervalo[1] = posicao
+
+    for numero, (inicio, fim) in enumerate(blocos):
+        for virtual in entrada[numero]:
+            cobrir(virtual, inicio)
+        for virtual in saida[numero]:
+            cobrir(virtual, fim - 1)
+        for posicao in range(inicio, fim):
+            for virtual in instrucoes[posicao].usos:
+                cobrir(virtual, posicao)
+            for virtual in instrucoes[posicao].defs:
+                cobrir(virtual, posicao)
+    return intervalos
+
+
+class _Varredura:
+    def __init__(self, instrucoes, intervalos, chamadas):
+        self.instrucoes = instrucoes
+        self.intervalos = intervalos
+        self.chamadas = chamadas
+        self.registrador = {}
+        self.na_pilha = []
+
+    def cruza_chamada(self, virtual):
+        inicio, fim = self.intervalos[virtual]
+        indice = bisect_right(self.chamadas, inicio)
+        return indice < len(self.chamadas) and self.chamadas[indice] < fim
+
+    def sugestao(self, virtual, inicio):
+        # 'mv vX, vY' onde vY morre aqui: usar o mesmo registrador apaga o mv.
+        instrucao = self.instrucoes[inicio]
+        if instrucao.opcode == 'mv' and instrucao.defs == [virtual] and instrucao.usos:
+            origem = instrucao.usos[0]
+            if self.intervalos[origem][1] == inicio:
+                return self.registrador.get(origem)
+        return None
+
+    def executar(self):
+        livres = list(TEMPORARIOS) + list(SALVOS)
+        ativos = []
+        for virtual in sorted(self.intervalos, key=lambda v: self.intervalos[v][0]):
+            inicio, fim = self.intervalos[virtual]
+            for ativo in [ativo for ativo in ativos if self.intervalos[ativo][1] <= inicio]:
+                ativos.remove(ativo)
+                livres.append(self.registrador[ativo])
+            permitidos = SALVOS if self.cruza_chamada(virtual) else TEMPORARIOS + SALVOS
+            escolhido = self.sugestao(virtual, inicio)
+            if escolhido not in livres or escolhido not in permitidos:
+                # Temporários primeiro: salvos custam um par sw/lw no prólogo.
+                escolhido = next((r for r in permitidos if r in livres), None)
+            if escolhido is not None:
+                livres.remove(escolhido)
+                self.registrador[virtual] = escolhido
+                ativos.append(virtual)
+                continue
+            # Sem registrador livre: vai para a pilha quem termina mais tarde.
+            candidatos = [ativo for ativo in ativos if self.registrador[ativo] in permitidos]
+            vitima = max(candidatos, key=lambda ativo: self.intervalos[ativo][1], default=None)
+            if vitima is not None and self.intervalos[vitima][1] > fim:
+                self.registrador[virtual] = self.registrador.pop(vitima)
+                ativos.remove(vitima)
+                ativos.append(virtual)
+                self.na_pilha.append(vitima)
+            else:
+                self.na_pilha.append(virtual)
+        return self.registrador, self.na_pilha
+
+
+def _substituir(linha, troca):
+    return REGISTRADOR_VIRTUAL.sub(lambda encontrado: troca[encontrado.group(0)], linha)
+
+
+def _analisar(linhas):
+    instrucoes = []
+    labels = {}
+    for linha in linhas:
+        if _eh_label(linha):
+            labels[linha[:-1]] = len(instrucoes)
+        elif not _eh_comentario(linha):
+            instrucoes.append(_Instrucao(linha))
+    blocos, sucessores = _blocos(instrucoes, labels)
+    entrada, saida = _vivos_na_saida(instrucoes, blocos, sucessores)
+    return instrucoes, blocos, entrada, saida
+
+
+def _definicoes_mortas(instrucoes, blocos, saida):
+    # Instruções que só escrevem virtuais que ninguém lê depois (ex.: o
+    # 'li v, 0' inicial de uma variável escrita antes de ser lida).
+    mortas = set()
+    for numero, (inicio, fim) in enumerate(blocos):
+        vivos = set(saida[numero])
+        for posicao in range(fim - 1, inicio - 1, -1):
+            instrucao = instrucoes[posicao]
+            if instrucao.defs and not vivos.intersection(instrucao.defs):
+                mortas.add(posicao)
+                continue
+            vivos.difference_update(instrucao.defs)
+            vivos.update(instrucao.usos)
+    return mortas
+
+
+def _area_de_argumentos(instrucoes):
+    # Antes da alocação, só as chamadas com mais de 8 argumentos escrevem em
+    # N(sp): o quadro reserva essa área na base.
+    area = 0
+    for instrucao in instrucoes:
+        if instrucao.opcode == 'sw':
+            encontrado = _na_pilha.match(instrucao.operandos[1])
+            if encontrado:
+                area = max(area, int(encontrado.group(1)) + 4)
+    return area
+
+
+def _alocar_unidade(linhas, eh_funcao, estatisticas):
+    instrucoes, blocos, entrada, saida = _analisar(linhas)
+    mortas = _definicoes_mortas(instrucoes, blocos, saida)
+    while mortas:
+        # Apagar uma definição pode matar as que alimentavam só ela.
+        estatisticas['instrucoes_mortas'] += len(mortas)
+        restantes = []
+        posicao = 0
+        for linha in linhas:
+            if not (_eh_label(linha) or _eh_comentario(linha)):
+                posicao += 1
+                if posicao - 1 in mortas:
+                    continue
+            restantes.append(linha)
+        linhas = restantes
+        instrucoes, blocos, entrada, saida = _analisar(linhas)
+        mortas = _definicoes_mortas(instrucoes, blocos, saida)
+    if not instrucoes:
+        return list(linhas)
+    intervalos = _intervalos(instrucoes, blocos, entrada, saida)
+    chamadas = [posicao for posicao, instrucao in enumerate(instrucoes) if instrucao.opcode in ('call', 'jal')]
+    registrador, na_pilha = _Varredura(instrucoes, intervalos, chamadas).executar()
+
+    # Quadro, de sp para cima: argumentos de saída, ra (se a função chama
+    # outra), s0 (se lê argumentos da pilha), os s1..s11 usados e os virtuais
+    # na pilha. Uma folha sem nada disso não mexe em sp.
+    salvos = sorted({r for r in registrador.values() if r in SALVOS}, key=SALVOS.index) if eh_funcao else []
+    guardados = []
+    if eh_funcao:
+        if chamadas:
+            guardados.append('ra')
+        if any(f"({PONTEIRO_DE_QUADRO})" in operando for instrucao in instrucoes for operando in instrucao.operandos):
+            guardados.append(PONTEIRO_DE_QUADRO)
+        guardados.extend(salvos)
+    argumentos = _area_de_argumentos(instrucoes)
+    base = argumentos + 4 * len(guardados)
+    deslocamento = {virtual: base + 4 * k for k, virtual in enumerate(na_pilha)}
+    quadro = (base + 4 * len(na_pilha) + 15) // 16 * 16
+    if eh_funcao and not quadro:
+        estatisticas['funcoes_sem_quadro'] += 1
+
+    saida_linhas = []
+    posicao = 0
+    for linha in linhas:
+        if _eh_label(linha) or _eh_comentario(linha):
+            saida_linhas.append(linha)
+            if eh_funcao and quadro and _eh_label(linha) and len(saida_linhas) == 1:
+                saida_linhas.append(f"addi sp, sp, -{quadro}")
+                saida_linhas.extend(f"sw {r}, {argumentos + 4 * k}(sp)" for k, r in enumerate(guardados))
+                if PONTEIRO_DE_QUADRO in guardados:
+                    saida_linhas.append(f"addi {PONTEIRO_DE_QUADRO}, sp, {quadro}")
+            continue
+        instrucao = instrucoes[posicao]
+        posicao += 1
+        if instrucao.opcode == 'ret' and quadro:
+            saida_linhas.extend(f"lw {r}, {argumentos + 4 * k}(sp)" for k, r in enumerate(guardados))
+            saida_linhas.append(f"addi sp, sp, {quadro}")
+        troca = {}
+        antes, depois = [], []
+        rascunhos = iter(RASCUNHO)
+        for virtual in instrucao.usos:
+            if virtual in deslocamento and virtual not in troca:
+                troca[virtual] = next(rascunhos)
+                antes.append(f"lw {troca[virtual]}, {deslocamento[virtual]}(sp)")
+        for virtual in instrucao.defs:
+            if virtual in deslocamento:
+                troca.setdefault(virtual, RASCUNHO[0])
+                depois.append(f"sw {troca[virtual]}, {deslocamento[virtual]}(sp)")
+        for virtual in instrucao.usos + instrucao.defs:
+            troca.setdefault(virtual, registrador.get(virtual))
+        nova = _substituir(linha, troca) if troca else linha
+        if instrucao.opcode == 'mv' and not antes and not depois:
+            destino, origem = (parte.strip() for parte in nova.split(' ', 1)[1].split(','))
+            if destino == origem:
+                estatisticas['movs_removidos'] += 1
+                continue
+        saida_linhas.extend(antes)
+        saida_linhas.append(nova)
+        saida_linhas.extend(depois)
+        estatisticas['acessos_a_pilha'] += len(antes) + len(depois)
+    if not eh_funcao and quadro:
+        saida_linhas.insert(0, f"addi sp, sp, -{quadro}")
+
+    estatisticas['virtuais'] += len(intervalos)
+    estatisticas['na_pilha'] += len(na_pilha)
+    estatisticas['registradores_salvos'] += len(salvos)
+    return saida_linhas
+
+
+def alocar_registradores(contexto):
+    # Reescreve contexto.codigo e o corpo de cada função com registradores
+    # físicos; virtuais vivos através de um call ficam em s1..s11, que a
+    # função salva no prólogo (junto com ra e s0, quando precisa) e restaura
+    # antes de cada ret.
+    estatisticas = {'virtuais': 0, 'na_pilha': 0, 'acessos_a_pilha': 0,
+                    'registradores_salvos': 0, 'movs_removidos': 0, 'instrucoes_mortas': 0,
+                    'funcoes_sem_quadro': 0}
+    contexto.codigo = _alocar_unidade(contexto.codigo, False, estatisticas)
+    contexto.funcoes = [(nome, _alocar_unidade(linhas, True, estatisticas))
+                        for nome, linhas in contexto.funcoes]
+    return estatisticas
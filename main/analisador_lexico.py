@@ -1,28 +1,77 @@
+import mmap
+import os
 import re
+import sys
 
 
-token_specification = [
-    ('KEYWORD', r'\b(if|else|while|for|return|func|int)\b'), 
-    ('NUMBER', r'\b\d+\b'),
-    ('ID', r'\b[a-zA-Z_][a-zA-Z_0-9]*\b'),
-    ('OP', r'(==|!=|<=|>=|&&|\|\||[+\-*/=<>%])'),
-    ('STRING', r'"[^"\n]*"'),
-    ('SYMBOL', r'[;(),{}]'),
-    ('WHITESPACE', r'\s+'),
-    ('UNKNOWN', r'.'),
-]
+# Tipos compactos: o fluxo de tokens usa inteiros, NOMES_TIPOS traduz de volta.
+KEYWORD, NUMBER, ID, OP, STRING, SYMBOL = range(6)
+NOMES_TIPOS = ('KEYWORD', 'NUMBER', 'ID', 'OP', 'STRING', 'SYMBOL')
 
-token_regex = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_specification)
+PALAVRAS_CHAVE = ('if', 'else', 'while', 'for', 'return', 'func', 'int')
+OPERADORES = ('==', '!=', '<=', '>=', '&&', '||', '+', '-', '*', '/', '=', '<', '>', '%')
+SIMBOLOS = (';', '(', ')', ',', '{', '}')
 
-def analisador_lexico(codigo_fonte):
-    tokens = []
-    for match in re.finditer(token_regex, codigo_fonte):
-        tipo = match.lastgroup
-        valor = match.group()
-        if tipo == 'WHITESPACE':
+# Identificadores, operadores e símbolos caem no mesmo grupo e são
+# classificados por uma única consulta nesta tabela; o resto é ID.
+_classe = {}
+_classe.update(dict.fromkeys(PALAVRAS_CHAVE, KEYWORD))
+_classe.update(dict.fromkeys(OPERADORES, OP))
+_classe.update(dict.fromkeys(SIMBOLOS, SYMBOL))
+
+# O espaço em branco é consumido como prefixo do próprio token. Um despacho
+# pelo primeiro caractere (tabela caractere -> padrão pequeno) dá os mesmos
+# tokens, mas decide em Python a cada token e fica mais lento que deixar o
+# finditer fazer tudo em C; bench_lexico mede os dois.
+token_regex = (
+    r'[^\S\n]*(?:'
+    r'([a-zA-Z_][a-zA-Z_0-9]*|==|!=|<=|>=|&&|\|\||[-+*/=<>%;(),{}])'
+    r'|(\d+)\b'
+    r'|(\n)'
+    r'|("[^"\n]*")'
+    r'|(\S)'
+    r')'
+)
+
+_padrao_texto = re.compile(token_regex)
+_padrao_bytes = re.compile(token_regex.encode())
+
+
+def tokens_fluxo(codigo_fonte):
+    # Gera (tipo, valor, linha, coluna) sob demanda; aceita str, bytes ou mmap.
+    texto = isinstance(codigo_fonte, str)
+    padrao = _padrao_texto if texto else _padrao_bytes
+    classe = _classe.get
+    intern = sys.intern
+    linha = 1
+    inicio_linha = 0
+    for match in padrao.finditer(codigo_fonte):
+        grupo = match.lastindex
+        if grupo == 3:
+            linha += 1
+            inicio_linha = match.end()
             continue
-        elif tipo == 'UNKNOWN':
-            raise ValueError(f'Erro: Caractere inválido "{valor}"')
+        valor = match.group(grupo)
+        if not texto:
+            valor = valor.decode(errors='replace')
+        if grupo == 1:
+            yield (classe(valor, ID), intern(valor), linha, match.start(1) - inicio_linha + 1)
+        elif grupo == 2:
+            yield (NUMBER, intern(valor), linha, match.start(2) - inicio_linha + 1)
+        elif grupo == 4:
+            yield (STRING, intern(valor), linha, match.start(4) - inicio_linha + 1)
         else:
-            tokens.append((tipo, valor))
-    return tokens
+            coluna = match.start(grupo) - inicio_linha + 1
+            raise ValueError(f'Erro: Caractere inválido "{valor}" na linha {linha}, coluna {coluna}')
+
+
+def tokens_arquivo(caminho):
+    with open(caminho, 'rb') as arquivo:
+        if os.fstat(arquivo.fileno()).st_size == 0:
+            return
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            yield from tokens_fluxo(mapa)
+
+
+def analisador_lexico(codigo_fonte):
+    return [(NOMES_TIPOS[tipo], valor) for tipo, valor, _, _ in tokens_fluxo(codigo_fonte)]
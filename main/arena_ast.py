@@ -0,0 +1,199 @@
+from array import array
+
+from ast1 import (
+    ProgramNode, AssignNode, ReturnNode,
+    BinOpNode, NumberNode, VariableNode,
+    FuncDeclNode, FuncCallNode,
+    IfNode, WhileNode, ForNode,
+    UnaryOpNode,
+    ExpansaoNode, SaidaNode, EntradaNode, ChamadaDeCaudaNode, Saida, Entrada,
+)
+from my_parser import DeclVarNode
+
+# Como cada campo é guardado: NO é o índice de outro nó (-1 para None),
+# TEXTO e INTEIRO ficam direto na tabela de dados, OBJETO é o índice de uma
+# Saida/Entrada em 'objetos' (-1 para None) e os demais apontam para uma
+# sequência em 'listas' no formato [tamanho, item, item, ...].
+NO, TEXTO, INTEIRO, LISTA_NOS, LISTA_TEXTOS, LISTA_PARES, OBJETO = range(7)
+
+ESQUEMA = (
+    (ProgramNode, (LISTA_NOS,)),
+    (AssignNode, (TEXTO, NO)),
+    (ReturnNode, (NO,)),
+    (BinOpNode, (TEXTO, NO, NO)),
+    (NumberNode, (INTEIRO,)),
+    (VariableNode, (TEXTO,)),
+    (FuncDeclNode, (TEXTO, LISTA_TEXTOS, NO)),
+    (FuncCallNode, (TEXTO, LISTA_NOS)),
+    (IfNode, (NO, LISTA_NOS, LISTA_NOS)),
+    (WhileNode, (NO, LISTA_NOS)),
+    (ForNode, (NO, NO, NO, LISTA_NOS)),
+    (UnaryOpNode, (TEXTO, NO)),
+    (DeclVarNode, (LISTA_PARES,)),
+    # Nós das otimizações sobre a AST (expansao_inline, chamadas_de_cauda).
+    (ExpansaoNode, (LISTA_NOS, TEXTO, OBJETO)),
+    (SaidaNode, (NO, TEXTO, OBJETO)),
+    (EntradaNode, (OBJETO,)),
+    (ChamadaDeCaudaNode, (TEXTO, LISTA_NOS, LISTA_TEXTOS, LISTA_TEXTOS, OBJETO)),
+)
+
+# Saida e Entrada são compartilhadas entre nós (a ExpansaoNode e os
+# SaidaNode dela): cada uma entra uma vez em 'objetos', e as vistas devolvem
+# sempre o mesmo objeto. A label delas só existe durante a geração.
+CLASSES_OBJETO = (Saida, Entrada)
+
+_tipo_por_classe = {classe: tipo for tipo, (classe, _) in enumerate(ESQUEMA)}
+
+# Um INTEIRO que não cabe em 64 bits (o Parser aceita literais de qualquer
+# tamanho) vai, em decimal, para a tabela de textos; o campo guarda
+# _EM_TEXTOS + o índice do texto. A faixa reservada fica no começo do
+# int64, onde nenhum literal do fonte cai (os que caíssem iriam como texto
+# também).
+_EM_TEXTOS = -(1 << 63)
+_FIM_EM_TEXTOS = _EM_TEXTOS + (1 << 32)
+_MAIOR = (1 << 63) - 1
+
+
+def campo_do_inteiro(valor, texto):
+    # 'texto' interna uma string e devolve o índice dela.
+    if _FIM_EM_TEXTOS <= valor <= _MAIOR:
+        return valor
+    return _EM_TEXTOS + texto(str(valor))
+
+
+def inteiro_do_campo(valor, textos):
+    if valor < _FIM_EM_TEXTOS:
+        return int(textos[valor - _EM_TEXTOS])
+    return valor
+
+
+def _leitor(posicao, formato):
+    def ler(vista):
+        arena = vista._arena
+        valor = arena.dados[arena.inicio[vista._indice] + posicao]
+        if formato == TEXTO:
+            return arena.textos[valor]
+        if formato == INTEIRO:
+            return inteiro_do_campo(valor, arena.textos)
+        if valor < 0:
+            return None
+        if formato == NO:
+            return arena.no(valor)
+        if formato == OBJETO:
+            return arena.objetos[valor]
+        tamanho = arena.listas[valor]
+        itens = arena.listas[valor + 1:valor + 1 + tamanho * (2 if formato == LISTA_PARES else 1)]
+        if formato == LISTA_NOS:
+            return [arena.no(item) for item in itens]
+        if formato == LISTA_TEXTOS:
+            return [arena.textos[item] for item in itens]
+        return [(arena.textos[itens[k]], arena.no(itens[k + 1]) if itens[k + 1] >= 0 else None)
+                for k in range(0, len(itens), 2)]
+    return property(ler)
+
+
+def _criar_vista(classe, formatos):
+    # Subclasse do nó real: os passos existentes (gerar_tac, gerar_assembly,
+    # verificar_semantica, print_ast) funcionam sem mudança, lendo os campos
+    # sob demanda a partir dos arrays da arena.
+    def __init__(self, arena, indice):
+        self._arena = arena
+        self._indice = indice
+
+    atributos = {
+        '__slots__': ('_arena', '_indice'),
+        '__module__': classe.__module__,
+        '__init__': __init__,
+        'campos': classe.__slots__,
+    }
+    for posicao, (nome, formato) in enumerate(zip(classe.__slots__, formatos)):
+        atributos[nome] = _leitor(posicao, formato)
+    return type(classe.__name__, (classe,), atributos)
+
+
+_vistas = tuple(_criar_vista(classe, formatos) for classe, formatos in ESQUEMA)
+_tipo_por_classe.update({vista: tipo for tipo, vista in enumerate(_vistas)})
+
+
+class ArenaAST:
+    # Struct-of-arrays: um nó é só um tipo (byte) e um deslocamento na tabela
+    # de dados; textos são internados uma única vez na tabela 'textos'.
+    def __init__(self):
+        self.tipos = array('B')
+        self.inicio = array('l')
+        self.dados = array('q')
+        self.listas = array('q')
+        self.textos = []
+        self._indice_texto = {}
+        self.objetos = []
+        self._indice_objeto = {}  # id(objeto) -> índice em 'objetos'
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def texto(self, valor):
+        indice = self._indice_texto.get(valor)
+        if indice is None:
+            indice = len(self.textos)
+            self.textos.append(valor)
+            self._indice_texto[valor] = indice
+        return indice
+
+    def objeto(self, valor):
+        indice = self._indice_objeto.get(id(valor))
+        if indice is None:
+            indice = len(self.objetos)
+            self.objetos.append(valor)
+            self._indice_objeto[id(valor)] = indice
+        return indice
+
+    def no(self, indice):
+        return _vistas[self.tipos[indice]](self, indice)
+
+    def adicionar(self, raiz):
+        # Percorre a árvore com pilha explícita; cada pendência diz em qual
+        # array/posição escrever o índice do nó quando ele for criado.
+        resultado = array('q', [-1])
+        pendentes = [(raiz, resultado, 0)]
+        while pendentes:
+            node, destino, posicao = pendentes.pop()
+            indice = len(self.tipos)
+            destino[posicao] = indice
+            classe, formatos = ESQUEMA[_tipo_por_classe[node.__class__]]
+            self.tipos.append(_tipo_por_classe[node.__class__])
+            base = len(self.dados)
+            self.inicio.append(base)
+            self.dados.extend([0] * len(formatos))
+            for deslocamento, (nome, formato) in enumerate(zip(classe.__slots__, formatos)):
+                valor = getattr(node, nome)
+                campo = base + deslocamento
+                if formato == TEXTO:
+                    self.dados[campo] = self.texto(valor)
+                elif formato == INTEIRO:
+                    self.dados[campo] = campo_do_inteiro(valor, self.texto)
+                elif valor is None:
+                    self.dados[campo] = -1
+                elif formato == NO:
+                    pendentes.append((valor, self.dados, campo))
+                elif formato == OBJETO:
+                    self.dados[campo] = self.objeto(valor)
+                else:
+                    self.dados[campo] = len(self.listas)
+                    self.listas.append(len(valor))
+                    for item in valor:
+                        if formato == LISTA_NOS:
+                            self.listas.append(-1)
+                            pendentes.append((item, self.listas, len(self.listas) - 1))
+                        elif formato == LISTA_TEXTOS:
+                            self.listas.append(self.texto(item))
+                        else:
+                            nome_var, expr = item
+                            self.listas.append(self.texto(nome_var))
+                            self.listas.append(-1)
+                            if expr is not None:
+                                pendentes.append((expr, self.listas, len(self.listas) - 1))
+        return resultado[0]
+
+    def tamanho_em_bytes(self):
+        arrays = (self.tipos, self.inicio, self.dados, self.listas)
+        return sum(len(a) * a.itemsize for a in arrays)
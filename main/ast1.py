@@ -1,356 +1,713 @@
+from types import GeneratorType
+
+from contexto_tac import (
+    OP_BINARIO, IGUAL, DIFERENTE, COPIA, LABEL, GOTO, IFNOT, IF, CALL, RETURN, FUNC, ENDFUNC,
+)
+
+
+def percorrer(no, passo, contexto):
+    # Executa um passo (ex.: '_gerar_tac') sem recursão. Cada passo que tem
+    # filhos é um gerador: entrega (yield) o filho a visitar e recebe de volta
+    # o resultado dele. Passos de folhas são funções comuns.
+    resultado = getattr(no, passo)(contexto)
+    if resultado.__class__ is not GeneratorType:
+        return resultado
+    pilha = [resultado]
+    valor = None
+    while pilha:
+        try:
+            filho = pilha[-1].send(valor)
+        except StopIteration as fim:
+            pilha.pop()
+            valor = fim.value
+            continue
+        resultado = getattr(filho, passo)(contexto)
+        if resultado.__class__ is GeneratorType:
+            pilha.append(resultado)
+            valor = None
+        else:
+            valor = resultado
+    return valor
+
+
+def campos(no):
+    # Nomes dos campos do nó. As vistas do arena_ast guardam os do nó real em
+    # 'campos' (os __slots__ delas são só a arena e o índice).
+    return getattr(no, 'campos', None) or no.__slots__
+
+
+def filhos(no):
+    # Nós filhos, na ordem dos campos; de um par (nome, expr) vem a expr.
+    for nome in campos(no):
+        valor = getattr(no, nome)
+        if isinstance(valor, ASTNode):
+            yield valor
+        elif isinstance(valor, list):
+            for item in valor:
+                if isinstance(item, tuple):
+                    item = item[1]
+                if isinstance(item, ASTNode):
+                    yield item
+
+
+def exigir_mutavel(raiz, passo):
+    # Passos que alteram a AST no lugar não podem rodar sobre vistas da
+    # arena, que são só leitura: sem isso eles não achariam nada a alterar.
+    if hasattr(raiz.__class__, 'campos'):
+        raise TypeError(f"{passo} altera a AST no lugar e não roda sobre vistas da arena; "
+                        "use serializacao.materializar antes")
+
+
 class ASTNode:
+    __slots__ = ()
+
     def gerar_tac(self, contexto):
-        raise NotImplementedError()
+        return percorrer(self, '_gerar_tac', contexto)
+
+    def gerar_assembly(self, contexto):
+        return percorrer(self, '_gerar_assembly', contexto)
 
     def verificar_semantica(self, contexto):
+        return percorrer(self, '_verificar_semantica', contexto)
+
+    def _gerar_tac(self, contexto):
+        raise NotImplementedError()
+
+    def _verificar_semantica(self, contexto):
         raise NotImplementedError()
 
 
 class ProgramNode(ASTNode):
+    __slots__ = ('comandos',)
+
     def __init__(self, comandos):
         self.comandos = comandos
 
 
-    def gerar_tac(self, contexto):
+    def _gerar_tac(self, contexto):
         for cmd in self.comandos:
-            cmd.gerar_tac(contexto)
+            yield cmd
 
-    def gerar_assembly(self, contexto):
+    def _gerar_assembly(self, contexto):
+        contexto.promover_variaveis(self)
         for cmd in self.comandos:
-            cmd.gerar_assembly(contexto)
+            yield cmd
+        contexto.guardar_variaveis()
 
-    def verificar_semantica(self, contexto):
+    def _verificar_semantica(self, contexto):
         for cmd in self.comandos:
-            cmd.verificar_semantica(contexto)
+            yield cmd
 
 
 class AssignNode(ASTNode):
+    __slots__ = ('var', 'value')
+
     def __init__(self, var, value):
         self.var = var
         self.value = value
 
 
-    def gerar_tac(self, contexto):
-        temp = self.value.gerar_tac(contexto)
-        contexto.emit(f"{self.var} = {temp}")
+    def _gerar_tac(self, contexto):
+        temp = yield self.value
+        contexto.emit(COPIA, contexto.variaveis[self.var], temp)
 
-    def gerar_assembly(self, contexto):
-        contexto.declarar_var(self.var)
-        val = self.value.gerar_assembly(contexto)
-        addr_reg = contexto.novo_reg()
-        contexto.emit(f"la {addr_reg}, {self.var}")
-        contexto.emit(f"sw {val}, 0({addr_reg})")
+    def _gerar_assembly(self, contexto):
+        val = yield self.value
+        contexto.escrever_variavel(self.var, val)
 
-    def verificar_semantica(self, contexto):
-        if not contexto.foi_declarado(self.var):
-            contexto.declarar(self.var, "variável")
-        self.value.verificar_semantica(contexto)
+    def _verificar_semantica(self, contexto):
+        contexto.declarar_implicita(self.var)
+        yield self.value
 
 
 class ReturnNode(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
-    def gerar_tac(self, contexto):
-        temp = self.value.gerar_tac(contexto)
-        contexto.emit(f"return {temp}")
+    def _gerar_tac(self, contexto):
+        temp = yield self.value
+        contexto.emit(RETURN, 0, temp)
 
-    def gerar_assembly(self, contexto):
-        val = self.value.gerar_assembly(contexto)
-        contexto.emit(f"mv a0, {val}")
-        
+    def _gerar_assembly(self, contexto):
+        val = yield self.value
+        contexto.retornar(val)
 
-    def verificar_semantica(self, contexto):
-        self.value.verificar_semantica(contexto)
+    def _verificar_semantica(self, contexto):
+        yield self.value
+
+
+# Seleção de instruções do assembly: uma operação com constante é coberta por
+# um ladrilho com imediato (addi, slti, xori, andi) ou deslocamento (slli,
+# srai) em vez de li + operação entre registradores.
+_ESPELHADO = {
+    '+': '+', '*': '*', '==': '==', '!=': '!=',
+    '<': '>', '>': '<', '<=': '>=', '>=': '<=',
+}
+
+
+def _constante(no):
+    return no.value if isinstance(no, NumberNode) else None
+
+
+def _cabe_em_12_bits(valor):
+    return -2048 <= valor <= 2047
+
+
+def _expoente_de_2(valor):
+    # k tal que valor == 2**k (até 2**30), senão None.
+    if 0 < valor < (1 << 31) and valor & (valor - 1) == 0:
+        return valor.bit_length() - 1
+    return None
+
+
+def _com_constante(contexto, op, l, c):
+    # Registrador com "l op c", ou None se nenhum ladrilho cobre (aí a
+    # constante vai para um registrador e a operação é a comum).
+    emit = contexto.emit
+    if op in ('+', '-'):
+        imediato = c if op == '+' else -c
+        if not _cabe_em_12_bits(imediato):
+            return None
+        dest = contexto.novo_reg()
+        emit(f"addi {dest}, {l}, {imediato}")
+        return dest
+    if op == '*':
+        k = _expoente_de_2(c)
+        if k is None:
+            return None
+        dest = contexto.novo_reg()
+        emit(f"slli {dest}, {l}, {k}")
+        return dest
+    if op in ('/', '%'):
+        k = _expoente_de_2(c)
+        if k is None or (op == '%' and not _cabe_em_12_bits(-c)):
+            return None
+        if k == 0:
+            return l if op == '/' else "zero"
+        # A divisão trunca para zero: negativos somam c - 1 antes do
+        # deslocamento (o sinal, estendido, vira a máscara dos k bits de baixo).
+        vies = contexto.novo_reg()
+        if k == 1:
+            emit(f"srli {vies}, {l}, 31")
+        else:
+            emit(f"srai {vies}, {l}, 31")
+            emit(f"srli {vies}, {vies}, {32 - k}")
+        emit(f"add {vies}, {l}, {vies}")
+        dest = contexto.novo_reg()
+        if op == '/':
+            emit(f"srai {dest}, {vies}, {k}")
+        else:
+            # l - (l / c) * c, com (l / c) * c = (l + viés) sem os k bits de baixo.
+            emit(f"andi {vies}, {vies}, {-c}")
+            emit(f"sub {dest}, {l}, {vies}")
+        return dest
+    if op in ('==', '!='):
+        dest = contexto.novo_reg()
+        teste = 'seqz' if op == '==' else 'snez'
+        if c == 0:
+            emit(f"{teste} {dest}, {l}")
+            return dest
+        if not _cabe_em_12_bits(c):
+            return None
+        emit(f"xori {dest}, {l}, {c}")
+        emit(f"{teste} {dest}, {dest}")
+        return dest
+    if op in ('<', '>='):
+        if not _cabe_em_12_bits(c):
+            return None
+        dest = contexto.novo_reg()
+        emit(f"slti {dest}, {l}, {c}")
+    elif op in ('<=', '>'):
+        # x <= c é x < c + 1.
+        if not _cabe_em_12_bits(c + 1):
+            return None
+        dest = contexto.novo_reg()
+        emit(f"slti {dest}, {l}, {c + 1}")
+    else:
+        return None
+    if op in ('>=', '>'):
+        emit(f"xori {dest}, {dest}, 1")
+    return dest
 
 
 class BinOpNode(ASTNode):
+    __slots__ = ('op', 'left', 'right')
+
     def __init__(self, op, left, right):
         self.op = op
         self.left = left
         self.right = right
 
 
-    def gerar_tac(self, contexto):
-        t1 = self.left.gerar_tac(contexto)
-        t2 = self.right.gerar_tac(contexto)
+    def _gerar_tac(self, contexto):
+        t1 = yield self.left
+        if self.op in ('&&', '||'):
+            # Curto-circuito: o lado direito só é avaliado se decide o valor.
+            temp = contexto.novo_temp()
+            zero = contexto.constantes[0]
+            label_fim = contexto.nova_label("curto")
+            contexto.emit(DIFERENTE, temp, t1, zero)
+            contexto.emit(IFNOT if self.op == '&&' else IF, 0, temp, label_fim)
+            t2 = yield self.right
+            contexto.emit(DIFERENTE, temp, t2, zero)
+            contexto.emit(LABEL, 0, label_fim)
+            return temp
+        t2 = yield self.right
         temp = contexto.novo_temp()
-        contexto.emit(f"{temp} = {t1} {self.op} {t2}")
+        contexto.emit(OP_BINARIO[self.op], temp, t1, t2)
         return temp
 
-    def gerar_assembly(self, contexto):
-        l = self.left.gerar_assembly(contexto)
-        r = self.right.gerar_assembly(contexto)
+    def _gerar_assembly(self, contexto):
+        if self.op in ('&&', '||'):
+            l = yield self.left
+            # Curto-circuito. Não reescreve l: pode ser o registrador de uma variável.
+            dest = contexto.novo_reg()
+            label_fim = contexto.nova_label("CURTO")
+            contexto.emit(f"snez {dest}, {l}")
+            contexto.emit(f"{'beqz' if self.op == '&&' else 'bnez'} {dest}, {label_fim}")
+            r = yield self.right
+            contexto.emit(f"snez {dest}, {r}")
+            contexto.emit(f"{label_fim}:")
+            return dest
+        # Constante só à esquerda: troca os lados quando a operação permite
+        # (c < x vira x > c), para que ela caia num ladrilho com imediato.
+        op, esquerda, direita = self.op, self.left, self.right
+        if contexto.imediatos and _constante(direita) is None and _constante(esquerda) is not None \
+                and op in _ESPELHADO:
+            op, esquerda, direita = _ESPELHADO[op], direita, esquerda
+        l = yield esquerda
+        constante = _constante(direita)
+        if constante is not None and contexto.imediatos:
+            dest = _com_constante(contexto, op, l, constante)
+            if dest is not None:
+                return dest
+        r = yield direita
         dest = contexto.novo_reg()
-        if self.op == '+':
+        if op == '+':
             contexto.emit(f"add {dest}, {l}, {r}")
-        elif self.op == '-':
+        elif op == '-':
             contexto.emit(f"sub {dest}, {l}, {r}")
-        elif self.op == '*':
+        elif op == '*':
             contexto.emit(f"mul {dest}, {l}, {r}")
-        elif self.op == '/':
+        elif op == '/':
             contexto.emit(f"div {dest}, {l}, {r}")
-        elif self.op == '==':
+        elif op == '%':
+            contexto.emit(f"rem {dest}, {l}, {r}")
+        elif op == '==':
             contexto.emit(f"sub {dest}, {l}, {r}")
             contexto.emit(f"seqz {dest}, {dest}")
-        elif self.op == '!=':
+        elif op == '!=':
             contexto.emit(f"sub {dest}, {l}, {r}")
             contexto.emit(f"snez {dest}, {dest}")
-        elif self.op == '<':
+        elif op == '<':
             contexto.emit(f"slt {dest}, {l}, {r}")
-        elif self.op == '<=':
+        elif op == '<=':
             contexto.emit(f"slt {dest}, {r}, {l}")
             contexto.emit(f"xori {dest}, {dest}, 1")
-        elif self.op == '>':
+        elif op == '>':
             contexto.emit(f"slt {dest}, {r}, {l}")
-        elif self.op == '>=':
+        elif op == '>=':
             contexto.emit(f"slt {dest}, {l}, {r}")
             contexto.emit(f"xori {dest}, {dest}, 1")
-        elif self.op == '&&':
-            contexto.emit(f"snez {l}, {l}")
-            contexto.emit(f"snez {r}, {r}")
-            contexto.emit(f"and {dest}, {l}, {r}")
-        elif self.op == '||':
-            contexto.emit(f"snez {l}, {l}")
-            contexto.emit(f"snez {r}, {r}")
-            contexto.emit(f"or {dest}, {l}, {r}")
         else:
-            contexto.emit(f"# Operador não suportado: {self.op}")
+            contexto.emit(f"# Operador não suportado: {op}")
         return dest  
 
-    def verificar_semantica(self, contexto):
-        self.left.verificar_semantica(contexto)
-        self.right.verificar_semantica(contexto)
+    def _verificar_semantica(self, contexto):
+        yield self.left
+        yield self.right
 
 
 class NumberNode(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 
-    def gerar_tac(self, contexto):
-        return str(self.value)
+    def _gerar_tac(self, contexto):
+        return contexto.constantes[self.value]
 
-    def gerar_assembly(self, contexto):
+    def _gerar_assembly(self, contexto):
+        if self.value == 0 and contexto.imediatos:
+            return "zero"
         reg = contexto.novo_reg()
         contexto.emit(f"li {reg}, {self.value}")
         return reg
 
-    def verificar_semantica(self, contexto):
+    def _verificar_semantica(self, contexto):
         pass  
 
 
 class VariableNode(ASTNode):
+    __slots__ = ('name',)
+
     def __init__(self, name):
         self.name = name
 
 
-    def gerar_tac(self, contexto):
-        return self.name
+    def _gerar_tac(self, contexto):
+        return contexto.variaveis[self.name]
 
-    def gerar_assembly(self, contexto):
-        contexto.declarar_var(self.name)
-        addr_reg = contexto.novo_reg()
-        val_reg = contexto.novo_reg()
-        contexto.emit(f"la {addr_reg}, {self.name}")
-        contexto.emit(f"lw {val_reg}, 0({addr_reg})")
-        return val_reg
+    def _gerar_assembly(self, contexto):
+        return contexto.ler_variavel(self.name)
 
-    def verificar_semantica(self, contexto):
+    def _verificar_semantica(self, contexto):
         if not contexto.foi_declarado(self.name):
             contexto.erros.append(f"Erro: variável '{self.name}' usada mas não declarada")
 
 
 class FuncDeclNode(ASTNode):
+    __slots__ = ('name', 'params', 'body')
+
     def __init__(self, name, params, body):
         self.name = name
         self.params = params
         self.body = body
 
-    def gerar_tac(self, contexto):
-        contexto.emit(f"func {self.name}({', '.join(self.params)})")
-        self.body.gerar_tac(contexto)
-        contexto.emit("endfunc")
+    def _gerar_tac(self, contexto):
+        params = contexto.lista(contexto.variaveis[param] for param in self.params)
+        contexto.emit(FUNC, 0, contexto.funcoes[self.name], params)
+        yield self.body
+        contexto.emit(ENDFUNC)
 
-    def gerar_assembly(self, contexto):
-        contexto.emit(f"{self.name}:")
-       
+    def _gerar_assembly(self, contexto):
+        contexto.iniciar_funcao(self.name)
         for i, param in enumerate(self.params):
-            contexto.declarar_var(param)
-            addr_reg = contexto.novo_reg()
-            contexto.emit(f"la {addr_reg}, {param}")
-            contexto.emit(f"sw a{i}, 0({addr_reg})")
+            contexto.receber_parametro(i, param)
         for cmd in self.body.comandos:
-            cmd.gerar_assembly(contexto)
-        contexto.emit("ret")
+            yield cmd
+        contexto.terminar_funcao()
 
-    def verificar_semantica(self, contexto):
-        contexto.declarar_funcao(self.name, self.params)
+    def _verificar_semantica(self, contexto):
+        contexto.declarar_funcao(self.name, self.params, self)
         contexto.entrar_escopo(self.name)
         for param in self.params:
             contexto.declarar(param)
         for cmd in self.body.comandos:  
-            cmd.verificar_semantica(contexto)
+            yield cmd
         contexto.sair_escopo()
 
 
 class FuncCallNode(ASTNode):
+    __slots__ = ('name', 'args')
+
     def __init__(self, name, args):
         self.name = name
         self.args = args
 
-    def gerar_tac(self, contexto):
-        temps = [arg.gerar_tac(contexto) for arg in self.args]
+    def _gerar_tac(self, contexto):
+        temps = []
+        for arg in self.args:
+            temps.append((yield arg))
         temp = contexto.novo_temp()
-        contexto.emit(f"{temp} = call {self.name}({', '.join(temps)})")
+        contexto.emit(CALL, temp, contexto.funcoes[self.name], contexto.lista(temps))
         return temp
 
-    def gerar_assembly(self, contexto):
-        
-        arg_regs = ['a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7']
-        for i, arg in enumerate(self.args):
-            val = arg.gerar_assembly(contexto)
-            contexto.emit(f"mv {arg_regs[i]}, {val}")
-        contexto.emit(f"call {self.name}")  
-       
-        dest = contexto.novo_reg()
-        contexto.emit(f"mv {dest}, a0")
-        return dest
+    def _gerar_assembly(self, contexto):
+        valores = []
+        for arg in self.args:
+            valores.append((yield arg))
+        return contexto.chamar(self.name, valores)
 
-    def verificar_semantica(self, contexto):
+    def _verificar_semantica(self, contexto):
+        contexto.checar_funcao(self.name, len(self.args))
+        for arg in self.args:
+            yield arg
+
+
+class Saida:
+    # Label comum aos return de um corpo expandido; criada na geração.
+    __slots__ = ('label',)
+
+    def __init__(self):
+        self.label = None
+
+    def __repr__(self):
+        return 'Saida()'
+
+
+class ExpansaoNode(ASTNode):
+    # Corpo de uma função expandido no lugar da chamada (expansao_inline).
+    # Executa 'comandos' e vale a variável 'resultado'. Os return do meio do
+    # corpo viraram SaidaNode, que saltam para o fim ('saida' é None se não há).
+    __slots__ = ('comandos', 'resultado', 'saida')
+
+    def __init__(self, comandos, resultado, saida=None):
+        self.comandos = comandos
+        self.resultado = resultado
+        self.saida = saida
+
+    def _gerar_tac(self, contexto):
+        if self.saida is not None:
+            self.saida.label = contexto.nova_label("saida")
+        for cmd in self.comandos:
+            yield cmd
+        if self.saida is not None:
+            contexto.emit(LABEL, 0, self.saida.label)
+        return contexto.variaveis[self.resultado]
+
+    def _gerar_assembly(self, contexto):
+        if self.saida is not None:
+            self.saida.label = contexto.nova_label("SAIDA")
+        for cmd in self.comandos:
+            yield cmd
+        if self.saida is not None:
+            contexto.emit(f"{self.saida.label}:")
+        return contexto.ler_variavel(self.resultado)
+
+    def _verificar_semantica(self, contexto):
+        for cmd in self.comandos:
+            yield cmd
+
+
+class SaidaNode(ASTNode):
+    # return dentro de um corpo expandido: resultado = valor e salta para o fim.
+    __slots__ = ('value', 'resultado', 'saida')
+
+    def __init__(self, value, resultado, saida):
+        self.value = value
+        self.resultado = resultado
+        self.saida = saida
+
+    def _gerar_tac(self, contexto):
+        temp = yield self.value
+        contexto.emit(COPIA, contexto.variaveis[self.resultado], temp)
+        contexto.emit(GOTO, 0, self.saida.label)
+
+    def _gerar_assembly(self, contexto):
+        val = yield self.value
+        contexto.escrever_variavel(self.resultado, val)
+        contexto.emit(f"j {self.saida.label}")
+
+    def _verificar_semantica(self, contexto):
+        contexto.declarar_implicita(self.resultado)
+        yield self.value
+
+
+class Entrada(Saida):
+    # Label do começo do corpo de uma função, alvo das chamadas de cauda.
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'Entrada()'
+
+
+class EntradaNode(ASTNode):
+    # Primeiro comando do corpo de uma função com chamadas de cauda
+    # (chamadas_de_cauda): marca onde elas recomeçam, já com os parâmetros
+    # recebidos.
+    __slots__ = ('entrada',)
+
+    def __init__(self, entrada):
+        self.entrada = entrada
+
+    def _gerar_tac(self, contexto):
+        self.entrada.label = contexto.nova_label("entrada")
+        contexto.emit(LABEL, 0, self.entrada.label)
+
+    def _gerar_assembly(self, contexto):
+        self.entrada.label = contexto.nova_label("ENTRADA")
+        contexto.emit(f"{self.entrada.label}:")
+
+    def _verificar_semantica(self, contexto):
+        pass
+
+
+class ChamadaDeCaudaNode(ASTNode):
+    # 'return f(args)' dentro da própria f: os argumentos vão para os
+    # parâmetros, os locais em 'zerar' voltam a 0 e o corpo recomeça, sem
+    # call e sem crescer a pilha.
+    __slots__ = ('name', 'args', 'params', 'zerar', 'entrada')
+
+    def __init__(self, name, args, params, zerar, entrada):
+        self.name = name
+        self.args = args
+        self.params = params
+        self.zerar = zerar
+        self.entrada = entrada
+
+    def _gerar_tac(self, contexto):
+        destinos = [contexto.variaveis[param] for param in self.params]
+        valores = []
+        for posicao, arg in enumerate(self.args):
+            valor = yield arg
+            if valor in destinos and valor != destinos[posicao]:
+                # f(b, a): o valor de um parâmetro que vai ser sobrescrito.
+                temp = contexto.novo_temp()
+                contexto.emit(COPIA, temp, valor)
+                valor = temp
+            valores.append(valor)
+        for destino, valor in zip(destinos, valores):
+            if valor != destino:
+                contexto.emit(COPIA, destino, valor)
+        for nome in self.zerar:
+            contexto.emit(COPIA, contexto.variaveis[nome], contexto.constantes[0])
+        contexto.emit(GOTO, 0, self.entrada.label)
+
+    def _gerar_assembly(self, contexto):
+        destinos = [contexto.ler_variavel(param) for param in self.params]
+        valores = []
+        for posicao, arg in enumerate(self.args):
+            valor = yield arg
+            if valor in destinos and valor != destinos[posicao]:
+                reg = contexto.novo_reg()
+                contexto.emit(f"mv {reg}, {valor}")
+                valor = reg
+            valores.append(valor)
+        for param, destino, valor in zip(self.params, destinos, valores):
+            if valor != destino:
+                contexto.escrever_variavel(param, valor)
+        for nome in self.zerar:
+            contexto.escrever_variavel(nome, "zero")
+        contexto.emit(f"j {self.entrada.label}")
+
+    def _verificar_semantica(self, contexto):
         contexto.checar_funcao(self.name, len(self.args))
         for arg in self.args:
-            arg.verificar_semantica(contexto)
+            yield arg
 
 
 class IfNode(ASTNode):
+    __slots__ = ('cond', 'then_body', 'else_body')
+
     def __init__(self, cond, then_body, else_body=None):
         self.cond = cond
         self.then_body = then_body
         self.else_body = else_body
 
-    def gerar_assembly(self, contexto):
-        cond_reg = self.cond.gerar_assembly(contexto)
+    def _gerar_assembly(self, contexto):
         label_else = contexto.nova_label("ELSE")
         label_end = contexto.nova_label("ENDIF")
-        contexto.emit(f"beq {cond_reg}, zero, {label_else}")
+        yield CondicaoNode(self.cond, label_else, False)
         for cmd in self.then_body:
-            cmd.gerar_assembly(contexto)
+            yield cmd
         contexto.emit(f"j {label_end}")
         contexto.emit(f"{label_else}:")
         if self.else_body:
             for cmd in self.else_body:
-                cmd.gerar_assembly(contexto)
+                yield cmd
         contexto.emit(f"{label_end}:")
 
-    def gerar_tac(self, contexto):
-        cond = self.cond.gerar_tac(contexto)
-        label_else = f"else_{id(self)}"
-        label_end = f"endif_{id(self)}"
-        contexto.emit(f"ifnot {cond} goto {label_else}")
+    def _gerar_tac(self, contexto):
+        label_else = contexto.nova_label("else")
+        label_end = contexto.nova_label("endif")
+        yield CondicaoNode(self.cond, label_else, False)
         for cmd in self.then_body:
-            cmd.gerar_tac(contexto)
-        contexto.emit(f"goto {label_end}")
-        contexto.emit(f"{label_else}:")
+            yield cmd
+        contexto.emit(GOTO, 0, label_end)
+        contexto.emit(LABEL, 0, label_else)
         if self.else_body:
             for cmd in self.else_body:
-                cmd.gerar_tac(contexto)
-        contexto.emit(f"{label_end}:")
+                yield cmd
+        contexto.emit(LABEL, 0, label_end)
 
-    def verificar_semantica(self, contexto):
-        self.cond.verificar_semantica(contexto)
+    def _verificar_semantica(self, contexto):
+        yield self.cond
+        contexto.entrar_bloco("if")
         for cmd in self.then_body:
-            cmd.verificar_semantica(contexto)
+            yield cmd
+        contexto.sair_escopo()
         if self.else_body:
+            contexto.entrar_bloco("else")
             for cmd in self.else_body:
-                cmd.verificar_semantica(contexto)
+                yield cmd
+            contexto.sair_escopo()
 
 class WhileNode(ASTNode):
+    __slots__ = ('cond', 'body')
+
     def __init__(self, cond, body):
         self.cond = cond
         self.body = body
 
-    def gerar_assembly(self, contexto):
+    def _gerar_assembly(self, contexto):
         label_start = contexto.nova_label("WHILE")
         label_end = contexto.nova_label("ENDWHILE")
         contexto.emit(f"{label_start}:")
-        cond_reg = self.cond.gerar_assembly(contexto)
-        contexto.emit(f"beq {cond_reg}, zero, {label_end}")
+        yield CondicaoNode(self.cond, label_end, False)
         for cmd in self.body:
-            cmd.gerar_assembly(contexto)
+            yield cmd
         contexto.emit(f"j {label_start}")
         contexto.emit(f"{label_end}:")
 
-    def gerar_tac(self, contexto):
-        label_start = f"while_{id(self)}"
-        label_end = f"endwhile_{id(self)}"
-        contexto.emit(f"{label_start}:")
-        cond = self.cond.gerar_tac(contexto)
-        contexto.emit(f"ifnot {cond} goto {label_end}")
+    def _gerar_tac(self, contexto):
+        label_start = contexto.nova_label("while")
+        label_end = contexto.nova_label("endwhile")
+        contexto.emit(LABEL, 0, label_start)
+        yield CondicaoNode(self.cond, label_end, False)
         for cmd in self.body:
-            cmd.gerar_tac(contexto)
-        contexto.emit(f"goto {label_start}")
-        contexto.emit(f"{label_end}:")
+            yield cmd
+        contexto.emit(GOTO, 0, label_start)
+        contexto.emit(LABEL, 0, label_end)
 
-    def verificar_semantica(self, contexto):
-        self.cond.verificar_semantica(contexto)
+    def _verificar_semantica(self, contexto):
+        yield self.cond
+        contexto.entrar_bloco("while")
         for cmd in self.body:
-            cmd.verificar_semantica(contexto)
+            yield cmd
+        contexto.sair_escopo()
 
 class ForNode(ASTNode):
+    __slots__ = ('init', 'cond', 'inc', 'body')
+
     def __init__(self, init, cond, inc, body):
         self.init = init      
         self.cond = cond      
         self.inc = inc        
         self.body = body      
 
-    def gerar_assembly(self, contexto):
+    def _gerar_assembly(self, contexto):
         if self.init:
-            self.init.gerar_assembly(contexto)
+            yield self.init
         label_start = contexto.nova_label("FOR")
         label_end = contexto.nova_label("ENDFOR")
         contexto.emit(f"{label_start}:")
-        cond_reg = self.cond.gerar_assembly(contexto)
-        contexto.emit(f"beq {cond_reg}, zero, {label_end}")
+        yield CondicaoNode(self.cond, label_end, False)
         for cmd in self.body:
-            cmd.gerar_assembly(contexto)
+            yield cmd
         if self.inc:
-            self.inc.gerar_assembly(contexto)
+            yield self.inc
         contexto.emit(f"j {label_start}")
         contexto.emit(f"{label_end}:")
 
-    def gerar_tac(self, contexto):
+    def _gerar_tac(self, contexto):
         if self.init:
-            self.init.gerar_tac(contexto)
-        label_start = f"for_{id(self)}"
-        label_end = f"endfor_{id(self)}"
-        contexto.emit(f"{label_start}:")
-        cond = self.cond.gerar_tac(contexto)
-        contexto.emit(f"ifnot {cond} goto {label_end}")
+            yield self.init
+        label_start = contexto.nova_label("for")
+        label_end = contexto.nova_label("endfor")
+        contexto.emit(LABEL, 0, label_start)
+        yield CondicaoNode(self.cond, label_end, False)
         for cmd in self.body:
-            cmd.gerar_tac(contexto)
+            yield cmd
         if self.inc:
-            self.inc.gerar_tac(contexto)
-        contexto.emit(f"goto {label_start}")
-        contexto.emit(f"{label_end}:")
+            yield self.inc
+        contexto.emit(GOTO, 0, label_start)
+        contexto.emit(LABEL, 0, label_end)
 
-    def verificar_semantica(self, contexto):
+    def _verificar_semantica(self, contexto):
+        contexto.entrar_bloco("for")
         if self.init:
-            self.init.verificar_semantica(contexto)
+            yield self.init
         if self.cond:
-            self.cond.verificar_semantica(contexto)
+            yield self.cond
         if self.inc:
-            self.inc.verificar_semantica(contexto)
+            yield self.inc
         for cmd in self.body:
-            cmd.verificar_semantica(contexto)
+            yield cmd
+        contexto.sair_escopo()
 
 class UnaryOpNode(ASTNode):
+    __slots__ = ('op', 'expr')
+
     def __init__(self, op, expr):
         self.op = op
         self.expr = expr
 
-    def gerar_assembly(self, contexto):
-        val = self.expr.gerar_assembly(contexto)
+    def _gerar_assembly(self, contexto):
+        val = yield self.expr
         dest = contexto.novo_reg()
         if self.op == '!':
             contexto.emit(f"seqz {dest}, {val}")  
@@ -358,8 +715,88 @@ class UnaryOpNode(ASTNode):
             contexto.emit(f"# Operador unário não suportado: {self.op}")
         return dest
 
-    def verificar_semantica(self, contexto):
-        self.expr.verificar_semantica(contexto)
+    def _gerar_tac(self, contexto):
+        val = yield self.expr
+        temp = contexto.novo_temp()
+        contexto.emit(IGUAL, temp, val, contexto.constantes[0])
+        return temp
+
+    def _verificar_semantica(self, contexto):
+        yield self.expr
+
+
+# Desvio do assembly para cada comparação: (instrução, troca os operandos).
+_DESVIO_COMPARACAO = {
+    '==': ('beq', False), '!=': ('bne', False),
+    '<': ('blt', False), '>=': ('bge', False),
+    '>': ('blt', True), '<=': ('bge', True),
+}
+_DESVIO_NEGADO = {'beq': 'bne', 'bne': 'beq', 'blt': 'bge', 'bge': 'blt'}
+
+
+class CondicaoNode(ASTNode):
+    # Condição de if/while/for avaliada só para desviar: salta para 'label'
+    # quando o valor dela é 'desviar_se'. && e || fazem curto-circuito, '!'
+    # inverte o sentido e, no assembly, uma comparação vira um único desvio
+    # entre os operandos (blt, bge, beq, bne) em vez de um booleano.
+    __slots__ = ('cond', 'label', 'desviar_se')
+
+    def __init__(self, cond, label, desviar_se):
+        self.cond = cond
+        self.label = label
+        self.desviar_se = desviar_se
+
+    def _filhos(self, nova_label, prefixo):
+        # Para '!', && e ||: as condições filhas e a label onde a condição
+        # inteira termina (None se não há). Para o resto, None.
+        cond, label, desviar_se = self.cond, self.label, self.desviar_se
+        if isinstance(cond, UnaryOpNode) and cond.op == '!':
+            return [CondicaoNode(cond.expr, label, not desviar_se)], None
+        if isinstance(cond, BinOpNode) and cond.op in ('&&', '||'):
+            if (cond.op == '||') == desviar_se:
+                return [CondicaoNode(cond.left, label, desviar_se),
+                        CondicaoNode(cond.right, label, desviar_se)], None
+            # a && b saltando se verdadeiro (ou a || b saltando se falso): se
+            # 'a' já decide, cai depois da condição inteira.
+            label_fim = nova_label(prefixo)
+            return [CondicaoNode(cond.left, label_fim, not desviar_se),
+                    CondicaoNode(cond.right, label, desviar_se)], label_fim
+        return None
+
+    def _gerar_tac(self, contexto):
+        filhos = self._filhos(contexto.nova_label, "cond")
+        if filhos is not None:
+            condicoes, label_fim = filhos
+            for condicao in condicoes:
+                yield condicao
+            if label_fim is not None:
+                contexto.emit(LABEL, 0, label_fim)
+            return
+        cond = yield self.cond
+        contexto.emit(IF if self.desviar_se else IFNOT, 0, cond, self.label)
+
+    def _gerar_assembly(self, contexto):
+        filhos = self._filhos(contexto.nova_label, "COND")
+        if filhos is not None:
+            condicoes, label_fim = filhos
+            for condicao in condicoes:
+                yield condicao
+            if label_fim is not None:
+                contexto.emit(f"{label_fim}:")
+            return
+        cond = self.cond
+        if isinstance(cond, BinOpNode) and cond.op in _DESVIO_COMPARACAO:
+            l = yield cond.left
+            r = yield cond.right
+            desvio, trocar = _DESVIO_COMPARACAO[cond.op]
+            if trocar:
+                l, r = r, l
+            if not self.desviar_se:
+                desvio = _DESVIO_NEGADO[desvio]
+            contexto.emit(f"{desvio} {l}, {r}, {self.label}")
+            return
+        val = yield cond
+        contexto.emit(f"{'bnez' if self.desviar_se else 'beqz'} {val}, {self.label}")
 
 class ContextoAssembly:
     def __init__(self):
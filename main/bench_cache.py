@@ -0,0 +1,65 @@
+import shutil
+import sys
+import tempfile
+import time
+
+from cache_compilacao import CacheCompilacao, compilar
+from simulador_riscv import simular
+
+
+def gerar_programa(funcoes, alterada=None):
+    # 'funcoes' funções independentes e um principal que chama todas; a
+    # 'alterada' ganha um termo a mais no corpo.
+    linhas = []
+    for k in range(funcoes):
+        extra = " + 1" if k == alterada else ""
+        linhas.append(f"int f{k}(int x) {{ int y = x * {k % 7 + 1}{extra}; "
+                      f"while (y > 100) {{ y = y - 100; }} return y; }}")
+    linhas.append("int t = 0;")
+    for k in range(funcoes):
+        linhas.append(f"t = t + f{k}({k});")
+    return "\n".join(linhas)
+
+
+def medir(fonte, cache):
+    inicio = time.perf_counter()
+    resultado = compilar(fonte, cache)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    funcoes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    fonte = gerar_programa(funcoes)
+    alterado = gerar_programa(funcoes, alterada=funcoes // 2)
+    diretorio = tempfile.mkdtemp(prefix="cache_compilacao_")
+    try:
+        cache = CacheCompilacao(diretorio)
+        casos = (
+            ("sem cache", fonte, None),
+            ("frio", fonte, cache),
+            ("sem mudança", fonte, cache),
+            ("uma função", alterado, cache),
+            ("sem cache", alterado, None),
+        )
+        assemblies = []
+        for rotulo, texto, usado in casos:
+            resultado, duracao = medir(texto, usado)
+            assemblies.append(resultado.assembly)
+            print(f"{rotulo:<12} {duracao * 1000:9.1f} ms  {resultado.estatisticas}")
+        print(f"cache: {len(cache.tamanhos)} entradas, {cache.total // 1024} KiB")
+        iguais = assemblies[0] == assemblies[1] == assemblies[2] and assemblies[3] == assemblies[4]
+        print("assembly igual ao sem cache" if iguais else "ASSEMBLY DIFERENTE")
+        esperado = 0
+        for k in range(funcoes):
+            y = k * (k % 7 + 1)
+            while y > 100:
+                y -= 100
+            esperado += y
+        t = simular(assemblies[2]).valor_da_variavel('t')
+        print(f"t={t}", "ok" if t == esperado else f"ESPERADO {esperado}")
+    finally:
+        shutil.rmtree(diretorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_assembly import ContextoAssembly
+from chamadas_de_cauda import otimizar_chamadas_de_cauda
+from simulador_riscv import simular
+
+PROGRAMAS = {
+    'acumulador': '''
+int soma(int n, int acc) { if (n == 0) { return acc; } return soma(n - 1, acc + n); }
+int s = 0;
+s = soma(2000, 0);
+''',
+    'mdc em laço': '''
+int mdc(int a, int b) { if (b == 0) { return a; } return mdc(b, a % b); }
+int k = 1, t = 0;
+while (k <= 200) {
+    t = t + mdc(k * 37, 1000 + k);
+    k = k + 1;
+}
+''',
+    'parâmetros trocados': '''
+int passos(int a, int b, int n) { int x; x = a + b; if (n == 0) { return x; } return passos(b, x, n - 1); }
+int k = 0, f = 0;
+while (k < 30) {
+    f = f + passos(0, 1, k);
+    k = k + 1;
+}
+''',
+}
+
+
+def executar(otimizar, fonte):
+    raiz = Parser(tokens_fluxo(fonte)).parse()
+    estatisticas = otimizar_chamadas_de_cauda(raiz) if otimizar else {}
+    contexto = ContextoAssembly()
+    raiz.gerar_assembly(contexto)
+    return simular(list(contexto.linhas())), estatisticas
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        print(f"== {nome}")
+        for rotulo, otimizar in (("chamadas", False), ("laço", True)):
+            simulacao, estatisticas = executar(otimizar, PROGRAMAS[nome])
+            print(f"{rotulo:<9} {simulacao.instrucoes:>7} instruções"
+                  f"  {simulacao.por_opcode.get('call', 0):>5} chamadas"
+                  f"  {simulacao.pilha_maxima:>6} bytes de pilha  {estatisticas or ''}")
+
+
+if __name__ == "__main__":
+    main()
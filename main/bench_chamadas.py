@@ -0,0 +1,56 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_assembly import ContextoAssembly
+from simulador_riscv import simular
+
+PROGRAMAS = {
+    'recursão': '''
+int fib(int n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }
+int fat(int n) { if (n <= 1) { return 1; } return n * fat(n - 1); }
+int r = 0, s = 0;
+r = fib(15);
+s = fat(10);
+''',
+    'folhas': '''
+int quadrado(int x) { return x * x; }
+int maior(int a, int b) { if (a > b) { return a; } return b; }
+int i = 0, t = 0;
+while (i < 300) {
+    t = t + maior(quadrado(i - 150), quadrado(i));
+    i = i + 1;
+}
+''',
+    'muitos argumentos': '''
+int pesos(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) {
+    return a + 2 * b + 3 * c + 4 * d + 5 * e + 6 * f + 7 * g + 8 * h + 9 * i + 10 * j;
+}
+int k = 0, t = 0;
+while (k < 100) {
+    t = t + pesos(k, 1, 2, 3, 4, 5, 6, 7, pesos(0, 0, 0, 0, 0, 0, 0, 0, 0, k), k);
+    k = k + 1;
+}
+''',
+}
+
+
+def executar(fonte):
+    contexto = ContextoAssembly()
+    Parser(tokens_fluxo(fonte)).parse().gerar_assembly(contexto)
+    contexto.aplicar_peephole()
+    estatisticas = contexto.alocar_registradores()
+    return simular(list(contexto.linhas())), estatisticas
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        simulacao, estatisticas = executar(PROGRAMAS[nome])
+        print(f"{nome:<18} {simulacao.instrucoes:>7} instruções"
+              f"  {simulacao.loads:>6} loads  {simulacao.stores:>6} stores"
+              f"  {estatisticas['funcoes_sem_quadro']} função(ões) sem quadro")
+
+
+if __name__ == "__main__":
+    main()
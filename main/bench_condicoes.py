@@ -0,0 +1,57 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_assembly import ContextoAssembly
+from simulador_riscv import simular
+
+PROGRAMAS = {
+    'comparações': '''
+int i = 0, a = 0, b = 0;
+while (i < 500) {
+    if (i >= 250) { a = a + 1; }
+    if (i != 100) { b = b + 1; }
+    i = i + 1;
+}
+''',
+    'curto-circuito': '''
+int caro(int x) {
+    int k = 0, s = 0;
+    while (k < 20) { s = s + x * k; k = k + 1; }
+    return s;
+}
+int i = 0, n = 0;
+while (i < 200) {
+    if (i < 10 && caro(i) > 100) { n = n + 1; }
+    if (i > 5 || caro(i) > 0) { n = n + 2; }
+    i = i + 1;
+}
+''',
+    'laço com &&': '''
+int i = 0, j = 0, t = 0;
+while (i < 100 && t < 100000) {
+    j = 0;
+    while (j < 30 && (j < i || i == 0)) { t = t + j; j = j + 1; }
+    i = i + 1;
+}
+''',
+}
+
+
+def executar(fonte):
+    contexto = ContextoAssembly()
+    Parser(tokens_fluxo(fonte)).parse().gerar_assembly(contexto)
+    return simular(list(contexto.linhas()))
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        simulacao = executar(PROGRAMAS[nome])
+        desvios = sum(vezes for opcode, vezes in simulacao.por_opcode.items() if opcode.startswith('b'))
+        print(f"{nome:<16} {simulacao.instrucoes:>7} instruções"
+              f"  {desvios:>6} desvios  {simulacao.por_opcode.get('call', 0):>5} chamadas")
+
+
+if __name__ == "__main__":
+    main()
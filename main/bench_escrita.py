@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import time
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_tac import ContextoTAC
+from contexto_assembly import ContextoAssembly
+from imprimir_ast import linhas_ast, print_ast, despejar_jsonl, despejar_sexpr
+from bench_cache import gerar_programa
+
+
+def print_por_linha(linhas, caminho):
+    # Como imprimir() e print_ast faziam: um print() por linha.
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        for linha in linhas:
+            print(linha, file=arquivo)
+
+
+def medir(rotulo, funcao, caminho, referencia=None):
+    inicio = time.perf_counter()
+    funcao(caminho)
+    duracao = time.perf_counter() - inicio
+    extra = f"  ({referencia / duracao:.1f}x)" if referencia else ""
+    print(f"{rotulo:<34} {duracao * 1000:9.1f} ms  {os.path.getsize(caminho):>9} bytes{extra}")
+    return duracao
+
+
+def main():
+    funcoes = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    ast = Parser(tokens_fluxo(gerar_programa(funcoes))).parse()
+    tac = ContextoTAC()
+    ast.gerar_tac(tac)
+    assembly = ContextoAssembly()
+    ast.gerar_assembly(assembly)
+    linhas_assembly = list(assembly.linhas())  # alocação fora da medida
+    iguais = True
+    with tempfile.TemporaryDirectory() as diretorio:
+        antes, depois = os.path.join(diretorio, "antes"), os.path.join(diretorio, "depois")
+        for rotulo, linhas, escrever in (
+                ("TAC", lambda: tac.linhas(), tac.escrever),
+                ("assembly", lambda: linhas_assembly, assembly.escrever),
+                ("AST (print_ast)", lambda: linhas_ast(ast), lambda destino: print_ast(ast, destino=destino))):
+            referencia = medir(f"{rotulo}: print por linha", lambda caminho: print_por_linha(linhas(), caminho), antes)
+            medir(f"{rotulo}: em blocos", escrever, depois, referencia)
+            with open(antes, 'rb') as a, open(depois, 'rb') as b:
+                iguais = iguais and a.read() == b.read()
+        medir("AST em JSON lines", lambda caminho: despejar_jsonl(ast, caminho), depois)
+        medir("AST em S-expressão", lambda caminho: despejar_sexpr(ast, caminho), depois)
+    print("saídas iguais" if iguais else "SAÍDAS DIFERENTES")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import sys
+import time
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_tac import ContextoTAC
+from contexto_assembly import ContextoAssembly
+from grafo_chamadas import remover_funcoes_mortas
+from simulador_riscv import simular
+
+
+def gerar_biblioteca(funcoes, usadas):
+    # 'funcoes' funções encadeadas de dez em dez (fK chama fK-1 se K % 10 != 0);
+    # o principal chama só as 'usadas' primeiras cadeias.
+    linhas = []
+    for k in range(funcoes):
+        chamada = f" + f{k - 1}(x - 1)" if k % 10 else ""
+        linhas.append(f"int f{k}(int x) {{ int y = x * {k % 7 + 1}; if (y > 100) {{ y = y - 100; }} "
+                      f"return y{chamada}; }}")
+    linhas.append("int t = 0;")
+    for k in range(usadas):
+        linhas.append(f"t = t + f{10 * k + 9}({k});")
+    return "\n".join(linhas)
+
+
+def compilar(fonte, remover):
+    ast = Parser(tokens_fluxo(fonte)).parse()
+    inicio = time.perf_counter()
+    estatisticas = remover_funcoes_mortas(ast) if remover else {}
+    ast.gerar_tac(ContextoTAC())
+    contexto = ContextoAssembly()
+    ast.gerar_assembly(contexto)
+    linhas = list(contexto.linhas())
+    return linhas, time.perf_counter() - inicio, estatisticas
+
+
+def main():
+    funcoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    fonte = gerar_biblioteca(funcoes, 5)
+    resultados = []
+    for rotulo, remover in (("todas", False), ("alcançáveis", True)):
+        linhas, duracao, estatisticas = compilar(fonte, remover)
+        resultados.append(simular(linhas).valor_da_variavel('t'))
+        print(f"{rotulo:<12} {len(linhas):>7} linhas de assembly  {duracao * 1000:8.1f} ms  {estatisticas or ''}")
+    print("resultados iguais" if resultados[0] == resultados[1] else "RESULTADOS DIFERENTES")
+
+
+if __name__ == "__main__":
+    main()
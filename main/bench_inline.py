@@ -0,0 +1,64 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_assembly import ContextoAssembly
+from contexto_semantico import ContextoSemantico
+from expansao_inline import expandir_chamadas
+from simulador_riscv import simular
+
+PROGRAMAS = {
+    'soma em laço': '''
+int soma(int x, int y) { return x + y; }
+int i = 0, t = 0;
+while (i < 500) {
+    t = soma(t, soma(i, 3));
+    i = i + 1;
+}
+''',
+    'retornos no meio': '''
+int quadrado(int x) { return x * x; }
+int maior(int a, int b) { if (a > b) { return a; } return b; }
+int limitar(int v) { if (v > 1000) { return 1000; } if (v < 0) { return 0; } return v; }
+int i = 0, t = 0;
+while (i < 300) {
+    t = t + limitar(maior(quadrado(i - 150), quadrado(i) / 50));
+    i = i + 1;
+}
+''',
+    'recursiva com ajudante': '''
+int dobro(int x) { return x + x; }
+int fib(int n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }
+int k = 0, s = 0;
+while (k < 12) {
+    s = s + dobro(fib(k));
+    k = k + 1;
+}
+''',
+}
+
+
+def executar(expandir, fonte):
+    raiz = Parser(tokens_fluxo(fonte)).parse()
+    estatisticas = {}
+    if expandir:
+        semantico = ContextoSemantico()
+        raiz.verificar_semantica(semantico)
+        estatisticas = expandir_chamadas(raiz, semantico)
+    contexto = ContextoAssembly()
+    raiz.gerar_assembly(contexto)
+    return simular(list(contexto.linhas())), estatisticas
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        print(f"== {nome}")
+        for rotulo, expandir in (("chamadas", False), ("expandidas", True)):
+            simulacao, estatisticas = executar(expandir, PROGRAMAS[nome])
+            print(f"{rotulo:<11} {simulacao.instrucoes:>7} instruções"
+                  f"  {simulacao.por_opcode.get('call', 0):>5} chamadas  {estatisticas or ''}")
+
+
+if __name__ == "__main__":
+    main()
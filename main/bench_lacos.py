@@ -0,0 +1,85 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_tac import ContextoTAC
+from otimizador_tac import propagar_constantes
+from otimizador_lacos import otimizar_lacos
+from grafo_fluxo import simplificar_fluxo
+from interpretador_tac import interpretar
+from geracao_paralela import gerar_em_paralelo
+
+PROGRAMAS = {
+    'invariantes': '''
+int valor(int x) { return x; }
+int a = valor(3), b = valor(4), c = valor(5), n = valor(300), i = 0, t = 0;
+while (i < n * 2) {
+    t = t + (a * b + c) * (n - a) + i;
+    i = i + 1;
+}
+''',
+    'indução': '''
+int i = 0, j = 0, s = 0;
+for (i = 0; i < 60; i = i + 1) {
+    for (j = 0; j < 40; j = j + 2) {
+        s = s + i * 40 + j * 4 + 7;
+    }
+}
+''',
+    'aninhados': '''
+int valor(int x) { return x; }
+int i = 0, j = 0, k = valor(5), s = 0;
+while (i < 50) {
+    j = 0;
+    while (j < 50) {
+        s = s + (i * k + 3) * (k + 1) + j * 8;
+        j = j + 1;
+    }
+    i = i + 1;
+}
+''',
+    'em função': '''
+int soma(int n) {
+    int i = 0, s = 0;
+    while (i < n) {
+        s = s + i * 4 + n * n;
+        i = i + 1;
+    }
+    return s;
+}
+int t = soma(100);
+''',
+}
+
+
+def executar(lacos, fonte, paralelo=False):
+    # paralelo: o TAC montado por gerar_em_paralelo, com as labels de cada
+    # função prefixadas pelo nome dela.
+    raiz = Parser(tokens_fluxo(fonte)).parse()
+    if paralelo:
+        contexto, _ = gerar_em_paralelo(raiz, processos=1)
+    else:
+        contexto = ContextoTAC()
+        raiz.gerar_tac(contexto)
+    propagar_constantes(contexto)
+    estatisticas = {}
+    if lacos:
+        estatisticas = otimizar_lacos(contexto)
+        propagar_constantes(contexto)
+    simplificar_fluxo(contexto)
+    return interpretar(contexto), estatisticas
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        print(f"== {nome}")
+        for rotulo, lacos, paralelo in (("sem laços", False, False), ("com laços", True, False),
+                                        ("paralelo", True, True)):
+            execucao, estatisticas = executar(lacos, PROGRAMAS[nome], paralelo)
+            print(f"{rotulo:<10} {execucao.instrucoes:>7} instruções TAC"
+                  f"  {execucao.por_opcode.get('MUL', 0):>6} MUL  {estatisticas or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import re
+import sys
+import time
+from collections import deque
+
+from analisador_lexico import analisador_lexico, tokens_fluxo, _classe, ID, NUMBER, STRING
+
+# Implementação anterior (regex mestre com KEYWORD antes de ID e UNKNOWN no fim),
+# mantida aqui só como referência de comparação.
+token_specification_original = [
+    ('KEYWORD', r'\b(if|else|while|for|return|func|int)\b'),
+    ('NUMBER', r'\b\d+\b'),
+    ('ID', r'\b[a-zA-Z_][a-zA-Z_0-9]*\b'),
+    ('OP', r'(==|!=|<=|>=|&&|\|\||[+\-*/=<>%])'),
+    ('STRING', r'"[^"\n]*"'),
+    ('SYMBOL', r'[;(),{}]'),
+    ('WHITESPACE', r'\s+'),
+    ('UNKNOWN', r'.'),
+]
+
+token_regex_original = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_specification_original)
+
+
+def analisador_lexico_original(codigo_fonte):
+    tokens = []
+    for match in re.finditer(token_regex_original, codigo_fonte):
+        tipo = match.lastgroup
+        valor = match.group()
+        if tipo == 'WHITESPACE':
+            continue
+        elif tipo == 'UNKNOWN':
+            raise ValueError(f'Erro: Caractere inválido "{valor}"')
+        else:
+            tokens.append((tipo, valor))
+    return tokens
+
+
+# Despacho pelo primeiro caractere: uma tabela diz o que cada caractere
+# inicia, e identificadores, números e espaços são estendidos por padrões
+# pequenos a partir dali. Dá os mesmos tokens que tokens_fluxo (para str);
+# fica aqui para medir a alternativa que tokens_fluxo não usa.
+_resto_id = re.compile(r'[a-zA-Z_0-9]*')
+_resto_numero = re.compile(r'\d*')
+_resto_espaco = re.compile(r'[^\S\n]*')
+_resto_string = re.compile(r'[^"\n]*"')
+_DOIS = frozenset(('==', '!=', '<=', '>=', '&&', '||'))
+_IDENT, _DIGITO, _SINAL, _LINHA, _ESPACO, _ASPAS = range(6)
+_despacho = {}
+_despacho.update(dict.fromkeys('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_', _IDENT))
+_despacho.update(dict.fromkeys('0123456789', _DIGITO))
+_despacho.update(dict.fromkeys('+-*/=<>%;(),{}!&|', _SINAL))
+_despacho.update(dict.fromkeys(' \t\r\f\v', _ESPACO))
+_despacho['\n'] = _LINHA
+_despacho['"'] = _ASPAS
+
+
+def tokens_despacho(fonte):
+    classe = _classe.get
+    intern = sys.intern
+    despacho = _despacho.get
+    posicao, tamanho, linha, inicio_linha = 0, len(fonte), 1, 0
+    while posicao < tamanho:
+        caractere = fonte[posicao]
+        acao = despacho(caractere)
+        coluna = posicao - inicio_linha + 1
+        if acao == _ESPACO:
+            posicao = _resto_espaco.match(fonte, posicao).end()
+            continue
+        if acao == _IDENT or acao == _DIGITO:
+            fim = (_resto_id if acao == _IDENT else _resto_numero).match(fonte, posicao + 1).end()
+            valor = fonte[posicao:fim]
+            if acao == _DIGITO and fim < tamanho and despacho(fonte[fim]) == _IDENT:
+                raise ValueError(f'Erro: Caractere inválido "{fonte[fim]}" na linha {linha}')
+            yield (classe(valor, ID) if acao == _IDENT else NUMBER, intern(valor), linha, coluna)
+            posicao = fim
+        elif acao == _SINAL:
+            valor = fonte[posicao:posicao + 2]
+            if valor not in _DOIS:
+                valor = caractere
+                if caractere in '!&|':
+                    raise ValueError(f'Erro: Caractere inválido "{caractere}" na linha {linha}')
+            yield (classe(valor), valor, linha, coluna)
+            posicao += len(valor)
+        elif acao == _LINHA:
+            posicao += 1
+            linha += 1
+            inicio_linha = posicao
+        else:
+            fim = _resto_string.match(fonte, posicao + 1) if acao == _ASPAS else None
+            if fim is None:
+                raise ValueError(f'Erro: Caractere inválido "{caractere}" na linha {linha}')
+            yield (STRING, intern(fonte[posicao:fim.end()]), linha, coluna)
+            posicao = fim.end()
+
+
+TRECHO = '''
+int soma(int x, int y) {
+    return x + y;
+}
+int total = 0, i;
+for (i = 0; i < 1000; i = i + 1) {
+    if (i % 3 == 0 && i != 10 || i >= 500) {
+        total = total + soma(i, 42) * 2;
+    } else {
+        total = total - i / 7;
+    }
+}
+while (total > 100000) { total = total - 12345; }
+'''
+
+
+def medir(nome, funcao, fonte, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        quantidade = len(deque(funcao(fonte)))
+        duracao = time.perf_counter() - inicio
+        if melhor is None or duracao < melhor:
+            melhor = duracao
+    print(f"{nome:<32} {quantidade:>10} tokens  {melhor * 1000:9.1f} ms  {quantidade / melhor:12,.0f} tokens/s")
+    return quantidade / melhor
+
+
+def main():
+    copias = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    fonte = TRECHO * copias
+    print(f"Entrada: {len(fonte) / 1e6:.1f} MB")
+    assert analisador_lexico(fonte) == analisador_lexico_original(fonte)
+    assert list(tokens_despacho(fonte)) == list(tokens_fluxo(fonte))
+    base = medir("regex mestre (original)", analisador_lexico_original, fonte, 5)
+    medir("analisador_lexico (lista)", analisador_lexico, fonte, 5)
+    despacho = medir("despacho pelo 1º caractere", tokens_despacho, fonte, 5)
+    novo = medir("tokens_fluxo (gerador)", tokens_fluxo, fonte, 5)
+    print(f"Ganho do gerador sobre o original: {novo / base:.2f}x; "
+          f"sobre o despacho pelo 1º caractere: {novo / despacho:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
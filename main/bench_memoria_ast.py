@@ -0,0 +1,72 @@
+import sys
+import tracemalloc
+
+from analisador_lexico import tokens_fluxo
+from arena_ast import ESQUEMA, ArenaAST
+from my_parser import Parser
+
+TRECHO = '''
+int soma(int x, int y) {
+    return x + y;
+}
+int total = 0, i;
+for (i = 0; i < 1000; i = i + 1) {
+    if (i % 3 == 0 && i != 10 || i >= 500) {
+        total = total + soma(i, 42) * 2;
+    } else {
+        total = total - i / 7;
+    }
+}
+'''
+
+# Classes equivalentes às de ast1 sem __slots__ (um __dict__ por instância),
+# para medir o "antes".
+_classes_com_dict = {classe: type(classe.__name__, (), {}) for classe, _ in ESQUEMA}
+
+
+def copiar(valor, com_dict):
+    # Cópia recursiva simples: o trecho usado aqui é raso.
+    if isinstance(valor, list):
+        return [copiar(item, com_dict) for item in valor]
+    if isinstance(valor, tuple):
+        return tuple(copiar(item, com_dict) for item in valor)
+    if valor is None or isinstance(valor, (int, str)):
+        return valor
+    classe = valor.__class__
+    copia = object.__new__(_classes_com_dict[classe] if com_dict else classe)
+    for nome in classe.__slots__:
+        setattr(copia, nome, copiar(getattr(valor, nome), com_dict))
+    return copia
+
+
+def medir(nome, construir, nos):
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objeto = construir()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    total = depois - antes
+    print(f"{nome:<28} {total / 1e6:8.2f} MB  {total / nos:7.1f} bytes/nó")
+    return objeto, total
+
+
+def _arena_de(ast):
+    arena = ArenaAST()
+    arena.adicionar(ast)
+    return arena
+
+
+def main():
+    copias = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    fonte = ''.join(TRECHO.replace('soma', f'soma{k}') for k in range(copias))
+    ast = Parser(tokens_fluxo(fonte)).parse()
+    nos = len(_arena_de(ast))
+    print(f"Nós na AST: {nos}")
+    _, com_dict = medir("objetos com __dict__", lambda: copiar(ast, True), nos)
+    _, com_slots = medir("objetos com __slots__", lambda: copiar(ast, False), nos)
+    _, arena = medir("arena (struct-of-arrays)", lambda: _arena_de(ast), nos)
+    print(f"__slots__: {com_dict / com_slots:.1f}x menor; arena: {com_dict / arena:.1f}x menor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_semantico import ContextoSemantico
+from contexto_tac import ContextoTAC
+from contexto_assembly import ContextoAssembly
+from geracao_paralela import gerar_em_paralelo
+from bench_cache import gerar_programa
+from simulador_riscv import simular
+
+
+def serial(ast):
+    # Um ContextoTAC e um ContextoAssembly para o programa inteiro.
+    ast.gerar_tac(ContextoTAC())
+    contexto = ContextoAssembly()
+    ast.gerar_assembly(contexto)
+    return list(contexto.linhas())
+
+
+def main():
+    funcoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ast = Parser(tokens_fluxo(gerar_programa(funcoes))).parse()
+    ast.verificar_semantica(ContextoSemantico())
+    cpus = os.cpu_count() or 1
+    casos = [("um contexto", lambda: serial(ast))]
+    for processos in sorted({1, 2, 4, cpus}):
+        casos.append((f"{processos} processo(s)",
+                      lambda processos=processos: gerar_em_paralelo(ast, processos)[1]))
+    resultados = []
+    for rotulo, gerar in casos:
+        inicio = time.perf_counter()
+        linhas = gerar()
+        duracao = time.perf_counter() - inicio
+        resultados.append(simular(linhas).valor_da_variavel('t'))
+        print(f"{rotulo:<14} {duracao * 1000:9.1f} ms  {len(linhas)} linhas")
+    print(f"{cpus} CPU(s);", "resultados iguais" if len(set(resultados)) == 1 else "RESULTADOS DIFERENTES")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import sys
+import time
+
+from analisador_lexico import tokens_fluxo, NUMBER, ID, OP, SYMBOL
+from ast1 import BinOpNode, NumberNode, VariableNode, FuncCallNode
+from my_parser import Parser
+
+
+class ParserCascata(Parser):
+    # Cadeia recursiva original (expr_or -> ... -> factor), mantida só para comparação.
+    def exp(self):
+        return self.expr_or()
+
+    def expr_or(self):
+        node = self.expr_and()
+        while self.token_atual()[0] == OP and self.token_atual()[1] == '||':
+            op = self.consumir(OP)
+            right = self.expr_and()
+            node = BinOpNode(op, node, right)
+        return node
+
+    def expr_and(self):
+        node = self.expr_rel()
+        while self.token_atual()[0] == OP and self.token_atual()[1] == '&&':
+            op = self.consumir(OP)
+            right = self.expr_rel()
+            node = BinOpNode(op, node, right)
+        return node
+
+    def expr_rel(self):
+        node = self.expr_arit()
+        while self.token_atual()[0] == OP and self.token_atual()[1] in ('==', '!=', '<', '<=', '>', '>='):
+            op = self.consumir(OP)
+            right = self.expr_arit()
+            node = BinOpNode(op, node, right)
+        return node
+
+    def expr_arit(self):
+        node = self.term()
+        while self.token_atual()[1] in ['+', '-']:
+            op = self.consumir(OP)
+            right = self.term()
+            node = BinOpNode(op, node, right)
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.token_atual()[1] in ['*', '/']:
+            op = self.consumir(OP)
+            right = self.factor()
+            node = BinOpNode(op, node, right)
+        return node
+
+    def factor(self):
+        token = self.token_atual()
+        tipo, val = token[0], token[1]
+        if tipo == NUMBER:
+            self.consumir(NUMBER)
+            return NumberNode(int(val))
+        elif tipo == ID:
+            self.consumir(ID)
+            if self.token_atual()[1] == '(':
+                self.consumir(SYMBOL)
+                args = self.arg_list()
+                self.consumir(SYMBOL)
+                return FuncCallNode(val, args)
+            return VariableNode(val)
+        elif val == '(':
+            self.consumir(SYMBOL)
+            expr = self.exp()
+            self.consumir(SYMBOL)
+            return expr
+        raise SyntaxError(f"Fator inválido: {val}")
+
+    def arg_list(self):
+        args = []
+        if self.token_atual()[0] != SYMBOL or self.token_atual()[1] != ')':
+            args.append(self.exp())
+            while self.token_atual()[1] == ',':
+                self.consumir(SYMBOL)
+                args.append(self.exp())
+        return args
+
+
+TRECHO = '''
+a = (x + 1) * (y - 2) / 3 + z * z - w;
+b = a < 10 && b >= 2 || c == d && e != f;
+c = f(a + 1, b * 2, (c - d) * (e + g)) - h(i) / 4;
+d = ((((a + b) * c) - d) / e) + ((f * g) - (h / i)) * 7;
+'''
+
+
+def formato(node):
+    # Representação estrutural mínima, usada para confirmar que as duas árvores batem.
+    if isinstance(node, list):
+        return [formato(item) for item in node]
+    if isinstance(node, (int, str)) or node is None:
+        return node
+    if isinstance(node, tuple):
+        return tuple(formato(item) for item in node)
+    return (node.__class__.__name__, {chave: formato(getattr(node, chave)) for chave in node.__slots__})
+
+
+def medir(nome, classe, tokens, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        classe(tokens).parse()
+        duracao = time.perf_counter() - inicio
+        if melhor is None or duracao < melhor:
+            melhor = duracao
+    print(f"{nome:<28} {melhor * 1000:9.1f} ms  {len(tokens) / melhor:12,.0f} tokens/s")
+    return melhor
+
+
+def main():
+    copias = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tokens = list(tokens_fluxo(TRECHO * copias))
+    print(f"Entrada: {len(tokens)} tokens")
+    amostra = list(tokens_fluxo(TRECHO))
+    assert formato(Parser(amostra).parse()) == formato(ParserCascata(amostra).parse())
+    antes = medir("cascata recursiva", ParserCascata, tokens, 5)
+    depois = medir("tabela de precedência", Parser, tokens, 5)
+    print(f"Ganho: {antes / depois:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_assembly import ContextoAssembly
+from simulador_riscv import simular
+from bench_registradores import PROGRAMAS as PROGRAMAS_REGISTRADORES
+
+PROGRAMAS = dict(PROGRAMAS_REGISTRADORES)
+PROGRAMAS.update({
+    'condições': '''
+int i = 0, pares = 0, iguais = 0, menores = 0;
+while (i < 300) {
+    if (i - (i / 2) * 2 == 0) { pares = pares + 1; }
+    if (i == 150) { iguais = iguais + 1; }
+    if (i <= 100) { menores = menores + 1; }
+    i = i + 1;
+}
+''',
+    'globais': '''
+int g = 0, n = 0;
+int soma(int x) { g = g + x; n = n + 1; return g; }
+int i = 0, r = 0;
+while (i < 100) {
+    r = soma(i) + soma(1);
+    i = i + 1;
+}
+''',
+})
+
+
+def executar(peephole, fonte):
+    contexto = ContextoAssembly(peephole=peephole)
+    Parser(tokens_fluxo(fonte)).parse().gerar_assembly(contexto)
+    acertos = contexto.aplicar_peephole() if peephole else {}
+    contexto.alocar_registradores()
+    linhas = list(contexto.linhas())
+    return simular(linhas), len(linhas), acertos
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        print(f"== {nome}")
+        for rotulo, peephole in (("sem peephole", False), ("com peephole", True)):
+            simulacao, tamanho, acertos = executar(peephole, PROGRAMAS[nome])
+            print(f"{rotulo:<13} {tamanho:>5} linhas"
+                  f"  {simulacao.instrucoes:>7} instruções  {simulacao.loads:>6} loads")
+            for regra, vezes in acertos.items():
+                print(f"    {regra:<36} {vezes:>4}")
+
+
+if __name__ == "__main__":
+    main()
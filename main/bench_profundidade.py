@@ -0,0 +1,46 @@
+import sys
+import time
+import tracemalloc
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_semantico import ContextoSemantico
+from contexto_tac import ContextoTAC
+from contexto_assembly import ContextoAssembly
+
+
+def gerar_fonte(profundidade):
+    linhas = ["int x = 0;"]
+    linhas.append("if (x < 1) {" * profundidade)
+    linhas.append("x = x + 1;")
+    linhas.append("}" * profundidade)
+    linhas.append("y = " + " + ".join(["x"] * (profundidade * 10)) + ";")
+    return "\n".join(linhas)
+
+
+def compilar(fonte):
+    ast = Parser(tokens_fluxo(fonte)).parse()
+    ast.verificar_semantica(ContextoSemantico())
+    ast.gerar_tac(ContextoTAC())
+    ast.gerar_assembly(ContextoAssembly())
+
+
+def main():
+    # Sem pilha explícita, profundidades acima do limite de recursão
+    # (sys.getrecursionlimit()) terminavam em RecursionError.
+    print(f"Limite de recursão do Python: {sys.getrecursionlimit()}")
+    profundidades = [int(arg) for arg in sys.argv[1:]] or [1000, 2000, 4000, 8000]
+    for profundidade in profundidades:
+        fonte = gerar_fonte(profundidade)
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        compilar(fonte)
+        duracao = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"profundidade {profundidade:>6}: {duracao * 1000:8.1f} ms  pico {pico / 1e6:7.1f} MB"
+              f"  ({duracao / profundidade * 1e6:.1f} us/nível)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import sys
+import time
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_tac import ContextoTAC
+from otimizador_tac import propagar_constantes
+from otimizador_redundancias import eliminar_stores_mortos, eliminar_subexpressoes_comuns
+from grafo_fluxo import construir_grafos, simplificar_fluxo
+from fluxo_dados import Vivas, DefinicoesAlcancantes, ExpressoesDisponiveis
+from interpretador_tac import interpretar
+
+PROGRAMAS = {
+    'subexpressões': '''
+int valor(int x) { return x; }
+int a = valor(7), b = valor(9), i = 0, s = 0, u = 0;
+while (i < 200) {
+    s = s + (a * b + i) * (a * b - i);
+    if (i % 3 == 0) { u = u + (a * b + i) / 2; }
+    i = i + 1;
+}
+''',
+    'stores mortos': '''
+int valor(int x) { return x; }
+int n = valor(300), i = 0, x = 0, y = 0, s = 0;
+while (i < n) {
+    x = i * 3;
+    y = x + n;
+    x = i + 2;
+    if (i > 10) { y = i; } else { y = n; }
+    s = s + x + y;
+    i = i + 1;
+}
+''',
+}
+
+# Trecho repetido para medir o tempo das análises conforme o programa cresce.
+TRECHO = '''
+if (a < b) { a = a + b * 2; } else { b = a - b; }
+while (c < 10) { c = c + a * b; a = a + 1; }
+c = 0;
+'''
+
+
+def executar(otimizar, fonte):
+    contexto = ContextoTAC()
+    Parser(tokens_fluxo(fonte)).parse().gerar_tac(contexto)
+    propagar_constantes(contexto)
+    estatisticas = {}
+    if otimizar:
+        estatisticas.update(eliminar_subexpressoes_comuns(contexto))
+        propagar_constantes(contexto)
+        estatisticas.update(eliminar_stores_mortos(contexto))
+    simplificar_fluxo(contexto)
+    return interpretar(contexto), estatisticas
+
+
+def escala():
+    for repeticoes in (500, 1000, 2000, 4000):
+        contexto = ContextoTAC()
+        fonte = "int a = 1, b = 2, c = 3;\n" + TRECHO * repeticoes
+        Parser(tokens_fluxo(fonte)).parse().gerar_tac(contexto)
+        grafo = construir_grafos(contexto)[0]
+        tempos = []
+        for analise in (Vivas, DefinicoesAlcancantes, ExpressoesDisponiveis):
+            inicio = time.perf_counter()
+            analise(contexto, grafo)
+            tempos.append(time.perf_counter() - inicio)
+        print(f"{len(contexto.instrucoes):>7} instruções  vivas {tempos[0]:.3f}s"
+              f"  definições {tempos[1]:.3f}s  disponíveis {tempos[2]:.3f}s")
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS) + ['escala']
+    for nome in nomes:
+        print(f"== {nome}")
+        if nome == 'escala':
+            escala()
+            continue
+        for rotulo, otimizar in (("sem", False), ("com", True)):
+            execucao, estatisticas = executar(otimizar, PROGRAMAS[nome])
+            print(f"{rotulo:<4} {execucao.instrucoes:>7} instruções TAC"
+                  f"  {estatisticas or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_assembly import ContextoAssembly
+from simulador_riscv import simular
+
+PROGRAMAS = {
+    'expressão grande': '''
+int a = 1, b = 2, c = 3, d = 4, e = 5;
+int r = (a + (b * (c + (d * (e + (a * (b + (c * (d + (e * (a + b)))))))))));
+int s = ((a + b) * (c + d)) - ((e + a) * (b + c)) + ((d + e) * (a + b)) - ((c + d) * (e + a));
+''',
+    'laço': '''
+int a = 1, b = 2, c = 3, d = 4, e = 5;
+int i = 0, t = 0;
+while (i < 200) {
+    t = t + (i * a + b) * (i * c + d) + (i * e + a) * (i * b + c) - (i * d + e) * (i * a + b);
+    i = i + 1;
+}
+''',
+    'chamadas': '''
+int quadrado(int x) { return x * x; }
+int a = 3, b = 4, r;
+r = (a + (b * (a + quadrado(b)))) + (quadrado(a) + (a * (b + quadrado(a + b))));
+''',
+}
+
+
+class ContextoAssemblyModulo7(ContextoAssembly):
+    # Alocação anterior: t{n % 7} direto na geração, sem análise nenhuma.
+    def novo_reg(self):
+        reg = f"t{self.reg_count % 7}"
+        self.reg_count += 1
+        return reg
+
+    def alocar_registradores(self):
+        self.alocado = True
+        return {}
+
+
+CONFIGURACOES = (
+    ("t{n % 7}", lambda: ContextoAssemblyModulo7(variaveis_em_registradores=False)),
+    ("linear scan", lambda: ContextoAssembly(variaveis_em_registradores=False)),
+    ("+ variáveis", lambda: ContextoAssembly(variaveis_em_registradores=True)),
+)
+
+
+def executar(criar, fonte):
+    contexto = criar()
+    Parser(tokens_fluxo(fonte)).parse().gerar_assembly(contexto)
+    estatisticas = contexto.alocar_registradores()
+    simulacao = simular(list(contexto.linhas()))
+    return simulacao, estatisticas
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        print(f"== {nome}")
+        for rotulo, criar in CONFIGURACOES:
+            simulacao, estatisticas = executar(criar, PROGRAMAS[nome])
+            print(f"{rotulo:<12} {simulacao.instrucoes:>7} instruções"
+                  f"  {simulacao.loads:>6} loads  {simulacao.stores:>6} stores  {estatisticas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import sys
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_assembly import ContextoAssembly
+from simulador_riscv import simular
+
+PROGRAMAS = {
+    'aritmética': '''
+int i = 0, s = 0, h = 7;
+while (i < 400) {
+    s = s + i * 8 + (i / 4) - (i % 16) + 3;
+    h = (h * 32 + i) % 1024;
+    i = i + 1;
+}
+''',
+    'negativos': '''
+int i = 0, a = 0, b = 0;
+for (i = 0 - 300; i < 300; i = i + 1) {
+    a = a + i / 8 + i % 2;
+    b = b + (i * 4) / 2;
+}
+''',
+    'booleanos': '''
+int i = 0, c = 0;
+while (i < 500) {
+    c = c + (i < 100) + (i >= 400) + (i == 250) + (250 != i) + (10 > i % 32);
+    i = i + 1;
+}
+''',
+}
+
+
+def executar(imediatos, fonte):
+    contexto = ContextoAssembly(imediatos=imediatos)
+    Parser(tokens_fluxo(fonte)).parse().gerar_assembly(contexto)
+    return simular(list(contexto.linhas()))
+
+
+def main():
+    nomes = sys.argv[1:] or list(PROGRAMAS)
+    for nome in nomes:
+        print(f"== {nome}")
+        for rotulo, imediatos in (("registradores", False), ("com imediatos", True)):
+            simulacao = executar(imediatos, PROGRAMAS[nome])
+            caras = sum(simulacao.por_opcode.get(opcode, 0) for opcode in ('mul', 'div', 'rem'))
+            print(f"{rotulo:<14} {simulacao.instrucoes:>7} instruções"
+                  f"  {simulacao.ciclos():>7} ciclos  {caras:>5} mul/div/rem")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import pickle
+import sys
+import time
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from ast1 import ASTNode, Saida, campos
+from contexto_tac import ContextoTAC
+from serializacao import salvar_ast, carregar_ast, materializar, salvar_tac, carregar_tac
+from bench_cache import gerar_programa
+
+
+def _classe(no):
+    # Uma vista da arena compara como o nó real de que ela é subclasse.
+    return no.__class__.__bases__[0] if hasattr(no.__class__, 'campos') else no.__class__
+
+
+def iguais(a, b):
+    # Comparação estrutural das duas árvores, com pilha explícita. Uma
+    # Saida/Entrada compartilhada em 'a' tem de corresponder sempre ao mesmo
+    # objeto em 'b', e só a ele.
+    pendentes = [(a, b)]
+    pares, usados = {}, set()
+    while pendentes:
+        a, b = pendentes.pop()
+        if isinstance(a, Saida):
+            if b.__class__ is not a.__class__:
+                return False
+            if id(a) in pares:
+                if pares[id(a)] is not b:
+                    return False
+            elif id(b) in usados:
+                return False
+            else:
+                pares[id(a)] = b
+                usados.add(id(b))
+        elif isinstance(a, ASTNode):
+            if not isinstance(b, ASTNode) or _classe(a) is not _classe(b):
+                return False
+            pendentes.extend((getattr(a, nome), getattr(b, nome)) for nome in campos(a))
+        elif isinstance(a, (list, tuple)):
+            if type(a) is not type(b) or len(a) != len(b):
+                return False
+            pendentes.extend(zip(a, b))
+        elif a != b or type(a) is not type(b):
+            return False
+    return True
+
+
+def medir(rotulo, funcao, referencia=None):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    extra = f"  ({referencia / duracao:.1f}x)" if referencia else ""
+    print(f"{rotulo:<28} {duracao * 1000:9.1f} ms{extra}")
+    return resultado, duracao
+
+
+def main():
+    funcoes = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    fonte = gerar_programa(funcoes)
+    ast, analise = medir("analisar o fonte", lambda: Parser(tokens_fluxo(fonte)).parse())
+    binario, _ = medir("salvar_ast", lambda: salvar_ast(ast))
+    empacotado = pickle.dumps(ast, pickle.HIGHEST_PROTOCOL)
+    vista, _ = medir("carregar_ast (vista)", lambda: carregar_ast(binario), analise)
+    nos, _ = medir("carregar_ast + materializar", lambda: materializar(carregar_ast(binario)), analise)
+    medir("pickle.loads", lambda: pickle.loads(empacotado), analise)
+    print(f"tamanhos: fonte {len(fonte)}, binário {len(binario)}, pickle {len(empacotado)} bytes")
+    sem_perda = iguais(ast, vista) and iguais(ast, nos)
+
+    contexto, geracao = medir("gerar o TAC", lambda: _tac(ast))
+    binario_tac, _ = medir("salvar_tac", lambda: salvar_tac(contexto))
+    carregado, _ = medir("carregar_tac", lambda: carregar_tac(binario_tac), geracao)
+    print(f"TAC: {len(contexto.instrucoes)} instruções, {len(binario_tac)} bytes")
+    sem_perda = sem_perda and all(
+        getattr(contexto, nome) == getattr(carregado, nome)
+        for nome in ('instrucoes', 'tipos', 'valores', 'listas', 'temp_count', 'label_count'))
+    sem_perda = sem_perda and list(contexto.linhas()) == list(carregado.linhas())
+    if not sem_perda:
+        sys.exit("IDA E VOLTA COM PERDA")
+    print("ida e volta sem perda")
+
+
+def _tac(ast):
+    contexto = ContextoTAC()
+    ast.gerar_tac(contexto)
+    return contexto
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import sys
+import time
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_semantico import ContextoSemantico
+
+
+def gerar_fonte(profundidade, usos):
+    # Um 'int xN' por nível de while; no mais interno, 'usos' leituras do
+    # nível mais externo, que é o último encontrado numa busca escopo a escopo.
+    linhas = ["int n = 0;"]
+    for nivel in range(profundidade):
+        linhas.append(f"while (n < 1) {{ int x{nivel} = n;")
+    linhas.append("n = " + " + ".join(["x0"] * usos) + ";")
+    linhas.append("}" * profundidade)
+    return "\n".join(linhas)
+
+
+def main():
+    profundidades = [int(arg) for arg in sys.argv[1:]] or [250, 500, 1000, 2000]
+    usos = 2000
+    for profundidade in profundidades:
+        ast = Parser(tokens_fluxo(gerar_fonte(profundidade, usos))).parse()
+        contexto = ContextoSemantico()
+        inicio = time.perf_counter()
+        ast.verificar_semantica(contexto)
+        duracao = time.perf_counter() - inicio
+        print(f"profundidade {profundidade:>5}: {duracao * 1000:7.1f} ms  {len(contexto.erros)} erro(s)"
+              f"  {len(contexto.historico)} escopos registrados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+from analisador_lexico import tokens_fluxo, KEYWORD, ID, SYMBOL
+from my_parser import Parser
+from ast1 import ProgramNode, FuncDeclNode
+from contexto_semantico import ContextoSemantico
+from promocao_variaveis import classificar_variaveis
+from geracao_paralela import dividir_unidades, gerar_unidades, juntar_tac, juntar_assembly
+
+# Compilação incremental com cache em disco endereçado pelo conteúdo. A
+# chave de cada entrada é o sha256 do que a produz:
+#  - o fonte inteiro: um programa que não mudou volta direto (TAC, assembly
+#    e erros), sem nem passar pelo léxico;
+#  - os tokens de cada declaração de função do nível de fora e de cada
+#    trecho do principal entre elas: a AST, o TAC e o assembly do pedaço.
+# Só os pedaços que mudaram são analisados e gerados de novo; a semântica e
+# classificar_variaveis rodam sempre sobre o programa montado, e o que elas
+# decidem para um pedaço (os locais das funções) entra na chave do assembly
+# dele. As unidades são as de geracao_paralela.
+
+VERSAO = 2  # mude quando o formato das entradas ou a geração de código mudar
+LIMITE_PADRAO = 64 * 1024 * 1024
+
+
+def _chave(*partes):
+    return hashlib.sha256(repr((VERSAO,) + partes).encode()).hexdigest()
+
+
+class CacheCompilacao:
+    # Uma entrada por arquivo, <diretorio>/<chave>, com o valor em pickle.
+    # A ordem de uso (LRU) fica num OrderedDict e, entre execuções, no mtime
+    # dos arquivos; passar de limite_bytes despeja as menos usadas.
+    def __init__(self, diretorio, limite_bytes=LIMITE_PADRAO):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        os.makedirs(diretorio, exist_ok=True)
+        entradas = []
+        for entrada in os.scandir(diretorio):
+            if entrada.is_file() and not entrada.name.endswith('.tmp'):
+                info = entrada.stat()
+                entradas.append((info.st_mtime_ns, entrada.name, info.st_size))
+        entradas.sort()
+        self.tamanhos = OrderedDict((nome, tamanho) for _, nome, tamanho in entradas)
+        self.total = sum(self.tamanhos.values())
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def obter(self, chave):
+        caminho = os.path.join(self.diretorio, chave)
+        try:
+            with open(caminho, 'rb') as arquivo:
+                valor = pickle.load(arquivo)
+            os.utime(caminho)
+        except FileNotFoundError:
+            self.tamanhos.pop(chave, None)
+            self.falhas += 1
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # Entrada truncada ou corrompida: conta como ausente.
+            self._remover(chave)
+            self.falhas += 1
+            return None
+        if chave not in self.tamanhos:
+            # Gravada por outro processo depois que este abriu o cache.
+            self.tamanhos[chave] = os.path.getsize(caminho)
+            self.total += self.tamanhos[chave]
+        self.tamanhos.move_to_end(chave)
+        self.acertos += 1
+        return valor
+
+    def guardar(self, chave, valor):
+        try:
+            dados = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            return  # AST funda demais para o pickle: fica fora do cache
+        if len(dados) > self.limite_bytes:
+            return
+        caminho = os.path.join(self.diretorio, chave)
+        # Escreve ao lado e renomeia: um leitor nunca vê a entrada pela metade.
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, caminho)
+        self.total += len(dados) - self.tamanhos.pop(chave, 0)
+        self.tamanhos[chave] = len(dados)
+        while self.total > self.limite_bytes:
+            self._remover(next(iter(self.tamanhos)))
+            self.despejos += 1
+
+    def _remover(self, chave):
+        self.total -= self.tamanhos.pop(chave, 0)
+        try:
+            os.remove(os.path.join(self.diretorio, chave))
+        except FileNotFoundError:
+            pass
+
+
+class _SemCache:
+    def obter(self, chave):
+        return None
+
+    def guardar(self, chave, valor):
+        pass
+
+
+class Compilacao:
+    # Resultado de compilar(). 'ast' é None quando o programa inteiro veio
+    # do cache.
+    __slots__ = ('ast', 'erros', 'tac', 'assembly', 'estatisticas')
+
+    def __init__(self, ast, erros, tac, assembly, estatisticas):
+        self.ast = ast
+        self.erros = erros
+        self.tac = tac
+        self.assembly = assembly
+        self.estatisticas = estatisticas
+
+
+def _fim_do_bloco(tokens, inicio):
+    # Posição logo depois do '}' que fecha o primeiro '{' a partir de
+    # 'inicio', ou None se ele não fecha.
+    profundidade = 0
+    for posicao in range(inicio, len(tokens)):
+        tipo, valor = tokens[posicao][0], tokens[posicao][1]
+        if tipo != SYMBOL:
+            continue
+        if valor == '{':
+            profundidade += 1
+        elif valor == '}':
+            profundidade -= 1
+            if profundidade == 0:
+                return posicao + 1
+            if profundidade < 0:
+                return None
+    return None
+
+
+def _dividir(tokens):
+    # (é função, início, fim) de cada pedaço: as declarações do nível de
+    # fora, do 'int'/'func' ao '}', e os trechos do principal entre elas.
+    pedacos = []
+    profundidade = 0
+    inicio = posicao = 0
+    while posicao < len(tokens):
+        tipo, valor = tokens[posicao][0], tokens[posicao][1]
+        if profundidade == 0 and tipo == KEYWORD and valor in ('int', 'func') \
+                and posicao + 2 < len(tokens) and tokens[posicao + 1][0] == ID \
+                and tokens[posicao + 2][1] == '(':
+            fim = _fim_do_bloco(tokens, posicao)
+            if fim is None:
+                break
+            if inicio < posicao:
+                pedacos.append((False, inicio, posicao))
+            pedacos.append((True, posicao, fim))
+            inicio = posicao = fim
+            continue
+        if tipo == SYMBOL:
+            if valor == '{':
+                profundidade += 1
+            elif valor == '}':
+                profundidade -= 1
+        posicao += 1
+    if inicio < len(tokens):
+        pedacos.append((False, inicio, len(tokens)))
+    return pedacos
+
+
+def _analisar_pedaco(tokens, eh_funcao):
+    # Comandos do pedaço, ou None se ele não se analisa sozinho como no
+    # programa inteiro (sobra token, ou não é uma declaração só).
+    parser = Parser(tokens)
+    try:
+        comandos = parser.parse().comandos
+    except SyntaxError:
+        return None
+    if parser.pos != len(tokens):
+        return None
+    if eh_funcao and (len(comandos) != 1 or not isinstance(comandos[0], FuncDeclNode)):
+        return None
+    return comandos
+
+
+def _analisar(tokens, cache, estatisticas):
+    # Devolve [(é função, comandos, chave)] na ordem do fonte. Se algum
+    # pedaço não se analisa sozinho, o programa é analisado inteiro (e o
+    # erro, se houver, sai de lá) e as unidades ficam sem chave.
+    pedacos = []
+    for eh_funcao, inicio, fim in _dividir(tokens):
+        chave = _chave('tokens', tuple((token[0], token[1]) for token in tokens[inicio:fim]))
+        comandos = cache.obter(_chave('ast', chave))
+        if comandos is None:
+            comandos = _analisar_pedaco(tokens[inicio:fim], eh_funcao)
+            if comandos is None:
+                break
+            cache.guardar(_chave('ast', chave), comandos)
+        else:
+            estatisticas['asts_em_cache'] += 1
+        pedacos.append((eh_funcao, comandos, chave))
+    else:
+        return pedacos
+    return [(isinstance(comando, FuncDeclNode), [comando], None)
+            for comando in Parser(tokens).parse().comandos]
+
+
+def _resumo(classificacao):
+    # A classificação restrita de uma unidade, em forma de chave.
+    promovidas, locais = classificacao
+    return tuple(sorted(promovidas)), tuple((nome, tuple(sorted(locais[nome]))) for nome in sorted(locais))
+
+
+def compilar(fonte, cache=None, variaveis_em_registradores=True, peephole=True, imediatos=True,
+             processos=1):
+    # Análise, semântica, TAC e assembly do fonte (str ou bytes), sem as
+    # otimizações entre funções, que mudariam um pedaço quando outro muda.
+    # As unidades que faltam no cache são geradas em 'processos' processos
+    # (None: um por CPU).
+    opcoes = {'variaveis_em_registradores': variaveis_em_registradores,
+              'peephole': peephole, 'imediatos': imediatos}
+    ajustes = tuple(sorted(opcoes.items()))
+    if cache is None:
+        cache = _SemCache()
+    estatisticas = {'programa_em_cache': False, 'funcoes': 0, 'asts_em_cache': 0,
+                    'tac_em_cache': 0, 'assembly_em_cache': 0}
+    bruto = fonte.encode() if isinstance(fonte, str) else bytes(fonte)
+    chave_programa = _chave('programa', hashlib.sha256(bruto).hexdigest(), ajustes)
+    guardado = cache.obter(chave_programa)
+    if guardado is not None:
+        estatisticas['programa_em_cache'] = True
+        return Compilacao(None, *guardado, estatisticas)
+
+    tokens = list(tokens_fluxo(fonte))
+    pedacos = _analisar(tokens, cache, estatisticas)
+    comandos = [comando for _, comandos_do_pedaco, _ in pedacos for comando in comandos_do_pedaco]
+    raiz = ProgramNode(comandos)
+    semantica = ContextoSemantico()
+    raiz.verificar_semantica(semantica)
+    unidades = dividir_unidades(comandos, classificar_variaveis(raiz))
+    estatisticas['funcoes'] = len(unidades) - 1
+
+    # O principal é identificado pelos trechos dele; cada função, pelos
+    # próprios tokens. A classificação restrita entra na chave do assembly.
+    trechos = tuple(chave for eh_funcao, _, chave in pedacos if not eh_funcao)
+    chaves = [None if None in trechos else trechos]
+    chaves += [chave for eh_funcao, _, chave in pedacos if eh_funcao]
+    resultados, tarefas, faltando = [], [], []
+    for indice, ((no, prefixo, classificacao), chave) in enumerate(zip(unidades, chaves)):
+        if chave is None:
+            chaves_da_unidade = (None, None)
+            resultado = [None, None]
+        else:
+            chaves_da_unidade = (_chave('tac', chave, prefixo),
+                                 _chave('assembly', chave, prefixo, _resumo(classificacao), ajustes))
+            resultado = [cache.obter(chaves_da_unidade[0]), cache.obter(chaves_da_unidade[1])]
+            estatisticas['tac_em_cache'] += resultado[0] is not None
+            estatisticas['assembly_em_cache'] += resultado[1] is not None
+        resultados.append(resultado)
+        if None in resultado:
+            tarefas.append((no, prefixo, classificacao, opcoes,
+                            resultado[0] is None, resultado[1] is None))
+            faltando.append((indice, chaves_da_unidade))
+    for (indice, chaves_da_unidade), gerado in zip(faltando, gerar_unidades(tarefas, processos)):
+        for posicao, valor in enumerate(gerado):
+            if valor is not None:
+                resultados[indice][posicao] = valor
+                if chaves_da_unidade[posicao] is not None:
+                    cache.guardar(chaves_da_unidade[posicao], valor)
+
+    tac = list(juntar_tac([tac for tac, _ in resultados]).linhas())
+    assembly = juntar_assembly([assembly for _, assembly in resultados])
+    cache.guardar(chave_programa, (semantica.erros, tac, assembly))
+    return Compilacao(raiz, semantica.erros, tac, assembly, estatisticas)
@@ -0,0 +1,60 @@
+from ast1 import (
+    ASTNode, ReturnNode, FuncDeclNode, FuncCallNode, ChamadaDeCaudaNode, EntradaNode, Entrada,
+    campos, filhos, exigir_mutavel,
+)
+from promocao_variaveis import classificar_variaveis
+
+# Eliminação de chamadas de cauda. Um 'return f(args)' dentro da própria f
+# vira ChamadaDeCaudaNode: os argumentos vão para os parâmetros e o corpo
+# recomeça da EntradaNode, posta no início dele. A função deixa de empilhar
+# um quadro por chamada e a recursão de cauda vira um laço. Roda sobre a AST
+# logo depois do parser; as chamadas entre funções diferentes ficam como
+# estão.
+
+
+def _trocar_retornos(no, declaracao, zerar, entrada):
+    # Troca no lugar os return de cauda das listas de comandos abaixo de
+    # 'no' e devolve quantos trocou. Não entra em outras funções.
+    trocadas = 0
+    pendentes = [no]
+    while pendentes:
+        no = pendentes.pop()
+        for nome in campos(no):
+            valor = getattr(no, nome)
+            if isinstance(valor, ASTNode) and not isinstance(valor, FuncDeclNode):
+                pendentes.append(valor)
+            elif isinstance(valor, list):
+                for posicao, item in enumerate(valor):
+                    if not isinstance(item, ASTNode) or isinstance(item, FuncDeclNode):
+                        continue
+                    chamada = item.value if isinstance(item, ReturnNode) else None
+                    if isinstance(chamada, FuncCallNode) and chamada.name == declaracao.name \
+                            and len(chamada.args) == len(declaracao.params):
+                        valor[posicao] = ChamadaDeCaudaNode(chamada.name, chamada.args,
+                                                            declaracao.params, zerar, entrada)
+                        trocadas += 1
+                    pendentes.append(valor[posicao])
+    return trocadas
+
+
+def otimizar_chamadas_de_cauda(raiz):
+    # Altera a AST no lugar e devolve as estatísticas.
+    exigir_mutavel(raiz, 'otimizar_chamadas_de_cauda')
+    _, locais = classificar_variaveis(raiz)
+    chamadas = funcoes = 0
+    pendentes = [raiz]
+    while pendentes:
+        declaracao = pendentes.pop()
+        pendentes.extend(filhos(declaracao))
+        if not isinstance(declaracao, FuncDeclNode):
+            continue
+        # Os locais que não são parâmetros voltam a 0, como numa chamada nova.
+        zerar = sorted(nome for nome in locais.get(declaracao.name, ())
+                       if nome not in declaracao.params and '.' not in nome)
+        entrada = Entrada()
+        trocadas = _trocar_retornos(declaracao.body, declaracao, zerar, entrada)
+        if trocadas:
+            declaracao.body.comandos.insert(0, EntradaNode(entrada))
+            chamadas += trocadas
+            funcoes += 1
+    return {'chamadas_de_cauda': chamadas, 'funcoes_com_laco': funcoes}
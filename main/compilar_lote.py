@@ -0,0 +1,119 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cache_compilacao import CacheCompilacao, LIMITE_PADRAO, compilar
+from geracao_paralela import tamanho_do_lote
+from escrita import escrever_linhas
+
+# Compila muitos arquivos de uma vez:
+#   python compilar_lote.py [-j N] [--cache DIR] arquivos_ou_diretorios...
+# Cada arquivo passa pelo pipeline inteiro (léxico, Parser,
+# ContextoSemantico, ContextoTAC e ContextoAssembly) num processo do pool, e
+# o TAC e o assembly vão para <nome>.tac e <nome>.s ao lado dele. Um arquivo
+# com erro é relatado e não interrompe os outros; o código de saída é 1 se
+# algum falhou.
+
+EXTENSOES_PADRAO = ('.c',)
+
+_cache = None  # CacheCompilacao do processo, criado por _iniciar
+
+
+def coletar(caminhos, extensoes):
+    # Arquivos citados entram sempre; diretórios são percorridos atrás das
+    # extensões pedidas. Sem repetidos, na ordem em que aparecem.
+    arquivos = []
+    for caminho in caminhos:
+        if not os.path.isdir(caminho):
+            arquivos.append(caminho)
+            continue
+        for raiz, diretorios, nomes in os.walk(caminho):
+            diretorios.sort()
+            for nome in sorted(nomes):
+                if nome.endswith(extensoes):
+                    arquivos.append(os.path.join(raiz, nome))
+    return list(dict.fromkeys(arquivos))
+
+
+def _iniciar(diretorio_cache, limite_bytes):
+    # Cada processo abre o cache por conta própria; as gravações são atômicas,
+    # então os processos podem dividir o mesmo diretório.
+    global _cache
+    if diretorio_cache is not None:
+        _cache = CacheCompilacao(diretorio_cache, limite_bytes)
+
+
+def compilar_arquivo(caminho):
+    # Devolve (caminho, segundos, erros). Com erros nada é escrito.
+    inicio = time.perf_counter()
+    try:
+        with open(caminho, 'rb') as arquivo:
+            fonte = arquivo.read()
+        resultado = compilar(fonte, _cache)
+        erros = list(resultado.erros)
+        if not erros:
+            base = os.path.splitext(caminho)[0]
+            escrever_linhas(resultado.tac, base + '.tac')
+            escrever_linhas(resultado.assembly, base + '.s')
+    except (SyntaxError, ValueError) as erro:
+        erros = [str(erro)]
+    except Exception as erro:
+        # Qualquer outra falha (arquivo ilegível, programa fundo demais...)
+        # fica no relatório deste arquivo e o lote segue.
+        erros = [f"{erro.__class__.__name__}: {erro}"]
+    return caminho, time.perf_counter() - inicio, erros
+
+
+def compilar_lote(arquivos, processos=None, diretorio_cache=None, limite_bytes=LIMITE_PADRAO):
+    # Gera (caminho, segundos, erros) na ordem de 'arquivos'. processos=1
+    # compila no próprio processo.
+    if processos == 1 or len(arquivos) <= 1:
+        _iniciar(diretorio_cache, limite_bytes)
+        for caminho in arquivos:
+            yield compilar_arquivo(caminho)
+        return
+    processos = processos or os.cpu_count() or 1
+    with ProcessPoolExecutor(processos, initializer=_iniciar,
+                             initargs=(diretorio_cache, limite_bytes)) as executor:
+        yield from executor.map(compilar_arquivo, arquivos,
+                                chunksize=tamanho_do_lote(arquivos, processos))
+
+
+def main(argv=None):
+    argumentos = argparse.ArgumentParser(description="Compila arquivos em paralelo.")
+    argumentos.add_argument('caminhos', nargs='+', help="arquivos ou diretórios")
+    argumentos.add_argument('-j', '--processos', type=int, default=None,
+                            help="processos no pool (padrão: um por CPU)")
+    argumentos.add_argument('-e', '--extensao', action='append',
+                            help=f"extensão procurada nos diretórios (padrão: {' '.join(EXTENSOES_PADRAO)})")
+    argumentos.add_argument('--cache', default=None, help="diretório do cache de compilação")
+    argumentos.add_argument('--limite-cache', type=int, default=LIMITE_PADRAO,
+                            help="tamanho máximo do cache, em bytes")
+    argumentos.add_argument('-q', '--quieto', action='store_true',
+                            help="só relata os arquivos com erro")
+    opcoes = argumentos.parse_args(argv)
+
+    arquivos = coletar(opcoes.caminhos, tuple(opcoes.extensao or EXTENSOES_PADRAO))
+    inicio = time.perf_counter()
+    soma = 0.0
+    falhas = 0
+    for caminho, duracao, erros in compilar_lote(arquivos, opcoes.processos,
+                                                 opcoes.cache, opcoes.limite_cache):
+        soma += duracao
+        if erros:
+            falhas += 1
+            print(f"ERRO {duracao * 1000:9.1f} ms  {caminho}")
+            for erro in erros:
+                print(f"     {erro}")
+        elif not opcoes.quieto:
+            print(f"ok   {duracao * 1000:9.1f} ms  {caminho}")
+    total = time.perf_counter() - inicio
+    print(f"{len(arquivos)} arquivo(s), {falhas} com erro; "
+          f"{soma:.2f} s de compilação em {total:.2f} s")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,37 @@
+from itertools import chain
+
+from alocador_registradores import (
+    alocar_registradores, REGISTRADORES_ARGUMENTO, PONTEIRO_DE_QUADRO, PREFIXO_VIRTUAL,
+)
+from otimizador_peephole import aplicar_peephole
+from promocao_variaveis import classificar_variaveis
+from escrita import escrever_linhas
+
+
 class ContextoAssembly:
-    def __init__(self):
+    def __init__(self, variaveis_em_registradores=True, peephole=True, imediatos=True):
         self.codigo = []
+        self.funcoes = []
         self.labels = 0
+        self.prefixo_labels = ""  # distingue as labels de unidades geradas à parte
         self.vars = set()
         self.reg_count = 0
+        self.alocado = False
+        self.variaveis_em_registradores = variaveis_em_registradores
+        self.peephole = peephole
+        self.imediatos = imediatos  # ladrilhos com imediato/deslocamento em BinOpNode
+        self.otimizado = False
+        self.locais_das_funcoes = {}
+        self.classificacao = None  # (principal, locais), se já vier calculada
+        self.em_registrador = {}  # variável -> registrador virtual na unidade atual
+        self._pendentes = []
+        self.fim_do_principal = None
 
     def emit(self, linha):
         self.codigo.append(linha)
 
     def nova_label(self, prefixo="L"):
-        label = f"{prefixo}{self.labels}"
+        label = f"{self.prefixo_labels}{prefixo}{self.labels}"
         self.labels += 1
         return label
 
@@ -17,19 +39,139 @@ class ContextoAssembly:
         self.vars.add(nome)
 
     def novo_reg(self):
-        reg = f"t{self.reg_count % 7}"  
+        # Registrador virtual; os físicos saem de alocar_registradores.
+        reg = f"{PREFIXO_VIRTUAL}{self.reg_count}"
         self.reg_count += 1
         return reg
 
-    def imprimir(self):
-        print("\n# Código Assembly RISC-V gerado:")
-        print(".data")
-        for var in self.vars:
-            print(f"{var}: .word 0")
-        print(".text")
-        print(".globl main")
-        print("main:")
-        for linha in self.codigo:
-            print(linha)
-        print("li a7, 93")
-        print("ecall")
+    def promover_variaveis(self, raiz):
+        # Parâmetros e locais das funções sempre moram em virtuais (registrador
+        # ou pilha), senão a recursão pisaria nos valores da chamada anterior;
+        # a opção só decide as variáveis do principal.
+        # Quem gera só um pedaço do programa passa a classificação do todo.
+        principal, self.locais_das_funcoes = self.classificacao or classificar_variaveis(raiz)
+        self._entrar_unidade(principal if self.variaveis_em_registradores else ())
+
+    def _entrar_unidade(self, nomes):
+        # Cada variável promovida ganha um virtual que começa em 0, como a
+        # palavra em .data; o alocador apaga o li se ela é escrita antes de lida.
+        self.em_registrador = {}
+        for nome in sorted(nomes):
+            reg = self.novo_reg()
+            self.em_registrador[nome] = reg
+            self.emit(f"li {reg}, 0")
+
+    def ler_variavel(self, nome):
+        reg = self.em_registrador.get(nome)
+        if reg is not None:
+            return reg
+        self.declarar_var(nome)
+        addr_reg = self.novo_reg()
+        val_reg = self.novo_reg()
+        self.emit(f"la {addr_reg}, {nome}")
+        self.emit(f"lw {val_reg}, 0({addr_reg})")
+        return val_reg
+
+    def escrever_variavel(self, nome, val):
+        reg = self.em_registrador.get(nome)
+        if reg is not None:
+            self.emit(f"mv {reg}, {val}")
+            return
+        self.declarar_var(nome)
+        addr_reg = self.novo_reg()
+        self.emit(f"la {addr_reg}, {nome}")
+        self.emit(f"sw {val}, 0({addr_reg})")
+
+    def guardar_variaveis(self):
+        # Fim do programa: as variáveis do principal que estavam em
+        # registradores voltam para .data, onde o resultado fica visível.
+        if self.fim_do_principal is not None:
+            self.emit(f"{self.fim_do_principal}:")
+        for nome, reg in sorted(self.em_registrador.items()):
+            if '.' in nome:
+                continue  # criada por expansao_inline, ninguém a lê depois
+            self.declarar_var(nome)
+            addr_reg = self.novo_reg()
+            self.emit(f"la {addr_reg}, {nome}")
+            self.emit(f"sw {reg}, 0({addr_reg})")
+
+    def iniciar_funcao(self, nome):
+        # O corpo de cada função é emitido numa lista própria e impresso depois
+        # do main, fora do fluxo do programa principal.
+        self._pendentes.append((self.codigo, self.em_registrador))
+        self.codigo = []
+        self.funcoes.append((nome, self.codigo))
+        self.emit(f"{nome}:")
+        self._entrar_unidade(self.locais_das_funcoes.get(nome, ()))
+
+    def terminar_funcao(self):
+        # Sem return no fim do corpo, a função volta mesmo assim.
+        if self.codigo[-1] != "ret":
+            self.emit("ret")
+        self.codigo, self.em_registrador = self._pendentes.pop()
+
+    def receber_parametro(self, indice, nome):
+        if indice < len(REGISTRADORES_ARGUMENTO):
+            self.escrever_variavel(nome, REGISTRADORES_ARGUMENTO[indice])
+            return
+        reg = self.novo_reg()
+        self.emit(f"lw {reg}, {4 * (indice - len(REGISTRADORES_ARGUMENTO))}({PONTEIRO_DE_QUADRO})")
+        self.escrever_variavel(nome, reg)
+
+    def chamar(self, nome, valores):
+        # Os argumentos já foram todos avaliados (uma chamada dentro de um
+        # argumento não pode pisar em a0..a7 já preenchidos); só então vão
+        # para os registradores e, do nono em diante, para a pilha.
+        for indice, valor in enumerate(valores):
+            if indice < len(REGISTRADORES_ARGUMENTO):
+                self.emit(f"mv {REGISTRADORES_ARGUMENTO[indice]}, {valor}")
+            else:
+                self.emit(f"sw {valor}, {4 * (indice - len(REGISTRADORES_ARGUMENTO))}(sp)")
+        self.emit(f"call {nome}")
+        dest = self.novo_reg()
+        self.emit(f"mv {dest}, a0")
+        return dest
+
+    def retornar(self, valor):
+        self.emit(f"mv a0, {valor}")
+        if self._pendentes:
+            self.emit("ret")
+            return
+        # return no principal encerra o programa.
+        if self.fim_do_principal is None:
+            self.fim_do_principal = self.nova_label("FIM")
+        self.emit(f"j {self.fim_do_principal}")
+
+    def aplicar_peephole(self):
+        # Antes da alocação: as regras contam usos dos registradores virtuais.
+        estatisticas = aplicar_peephole(self)
+        self.otimizado = True
+        return estatisticas
+
+    def alocar_registradores(self):
+        estatisticas = alocar_registradores(self)
+        self.alocado = True
+        return estatisticas
+
+    def linhas(self):
+        if not self.alocado:
+            if self.peephole and not self.otimizado:
+                self.aplicar_peephole()
+            self.alocar_registradores()
+        yield ".data"
+        for var in sorted(self.vars):
+            yield f"{var}: .word 0"
+        yield ".text"
+        yield ".globl main"
+        yield "main:"
+        yield from self.codigo
+        yield "li a7, 93"
+        yield "ecall"
+        for _, linhas in self.funcoes:
+            yield from linhas
+
+    def escrever(self, destino=None):
+        escrever_linhas(self.linhas(), destino)
+
+    def imprimir(self, destino=None):
+        escrever_linhas(chain(("", "# Código Assembly RISC-V gerado:"), self.linhas()), destino)
@@ -1,23 +1,55 @@
+import sys
+
+
+class Escopo:
+    # Registro de um escopo; fica em 'historico' depois de fechado.
+    __slots__ = ('carimbo', 'nome', 'dono', 'simbolos')
+
+    def __init__(self, carimbo, nome, dono=None):
+        self.carimbo = carimbo
+        self.nome = nome
+        self.dono = dono or self  # escopo global/da função que contém o bloco
+        self.simbolos = {}  # nome -> info, na ordem de declaração
+
+
 class ContextoSemantico:
     def __init__(self):
-        self.escopos = [{}]
         self.erros = []
         self.funcoes = {}
-        self.escopo_nomes = ["global"]  
+        self.declaracoes = {}  # nome -> FuncDeclNode, para expansao_inline
+        # Cada nome tem a pilha das suas ligações visíveis, (carimbo do
+        # escopo, info), com a mais interna no topo: busca e declaração não
+        # dependem da profundidade. Ao fechar um escopo, só os nomes dele
+        # desempilham.
+        self.ligacoes = {}
+        self.abertos = []
+        self.historico = []
+        self.entrar_escopo("global")
+
+    def _abrir(self, escopo):
+        self.abertos.append(escopo)
+        self.historico.append(escopo)
 
     def entrar_escopo(self, nome):
-        self.escopos.append({})
-        self.escopo_nomes.append(nome)
+        self._abrir(Escopo(len(self.historico), nome))
+
+    def entrar_bloco(self, tipo):
+        # Corpo de if/else/while/for: os 'int x' dele somem no fim do bloco.
+        dono = self.abertos[-1].dono
+        carimbo = len(self.historico)
+        self._abrir(Escopo(carimbo, f"{dono.nome}/{tipo}{carimbo}", dono))
 
     def sair_escopo(self):
-        self.escopos.pop()
-        self.escopo_nomes.pop()
+        escopo = self.abertos.pop()
+        for nome in escopo.simbolos:
+            self.ligacoes[nome].pop()
 
-    def declarar_funcao(self, nome, params):
+    def declarar_funcao(self, nome, params, declaracao=None):
         if nome in self.funcoes:
             self.erros.append(f"Função '{nome}' já declarada.")
         else:
             self.funcoes[nome] = len(params)
+            self.declaracoes[nome] = declaracao
 
     def checar_funcao(self, nome, qtd_args):
         if nome not in self.funcoes:
@@ -26,19 +58,27 @@ class ContextoSemantico:
             self.erros.append(f"Função '{nome}' chamada com {qtd_args} argumento(s), mas espera {self.funcoes[nome]}.")
 
     def foi_declarado(self, nome):
-        
-        for escopo in reversed(self.escopos):
-            if nome in escopo:
-                return True
-        return False
+        return bool(self.ligacoes.get(nome))
+
+    def _ligar(self, escopo, nome, tipo):
+        nome = sys.intern(nome)
+        info = {"tipo": tipo, "escopo": escopo.nome}
+        escopo.simbolos[nome] = info
+        self.ligacoes.setdefault(nome, []).append((escopo.carimbo, info))
 
     def declarar(self, nome, tipo="variável"):
-        escopo_atual = self.escopos[-1]
-        escopo_nome = self.escopo_nomes[-1]
-        if nome in escopo_atual:
+        escopo_atual = self.abertos[-1]
+        pilha = self.ligacoes.get(nome)
+        if pilha and pilha[-1][0] == escopo_atual.carimbo:
             self.erros.append(f"{tipo.capitalize()} '{nome}' já declarada no escopo atual.")
         else:
-            escopo_atual[nome] = {"tipo": tipo, "escopo": escopo_nome}
+            self._ligar(escopo_atual, nome, tipo)
+
+    def declarar_implicita(self, nome):
+        # Variável criada por atribuição: vale na função (ou no programa)
+        # inteira, como na geração de código, mesmo se surge num bloco.
+        if not self.foi_declarado(nome):
+            self._ligar(self.abertos[-1].dono, nome, "variável")
 
     def imprimir_erros(self):
         if not self.erros:
@@ -49,13 +89,11 @@ class ContextoSemantico:
                 print(erro)
 
     def imprimir_tabela(self):
+        # Todos os escopos, inclusive os já fechados (funções e blocos).
         print("\nTabela de Símbolos:")
         print("Nome\tTipo\tEscopo")
-        for i, escopo in enumerate(self.escopos):
-            for nome, info in escopo.items():
-                tipo = info["tipo"]
-                escopo_nome = info["escopo"]
-                print(f"{nome}\t{tipo}\t{escopo_nome}")
-        if hasattr(self, "funcoes"):
-            for nome, qtd in self.funcoes.items():
-                print(f"{nome}\tfunção\tglobal")
+        for escopo in self.historico:
+            for nome, info in escopo.simbolos.items():
+                print(f"{nome}\t{info['tipo']}\t{info['escopo']}")
+        for nome in self.funcoes:
+            print(f"{nome}\tfunção\tglobal")
@@ -1,16 +1,149 @@
+from itertools import chain
+
+from escrita import escrever_linhas
+
+# Opcodes do TAC estruturado; NOMES_OP traduz de volta para depuração.
+(SOMA, SUB, MUL, DIV, MOD, IGUAL, DIFERENTE, MENOR, MENOR_IGUAL, MAIOR, MAIOR_IGUAL, E, OU,
+ COPIA, LABEL, GOTO, IFNOT, IF, CALL, RETURN, FUNC, ENDFUNC) = range(22)
+NOMES_OP = (
+    'SOMA', 'SUB', 'MUL', 'DIV', 'MOD', 'IGUAL', 'DIFERENTE', 'MENOR', 'MENOR_IGUAL',
+    'MAIOR', 'MAIOR_IGUAL', 'E', 'OU',
+    'COPIA', 'LABEL', 'GOTO', 'IFNOT', 'IF', 'CALL', 'RETURN', 'FUNC', 'ENDFUNC',
+)
+# Formato de cada instrução (op, dest, a, b):
+#   binárias          dest = a <op> b
+#   COPIA             dest = a
+#   LABEL / GOTO      a: / goto a
+#   IFNOT / IF        ifnot a goto b / if a goto b
+#   CALL              dest = call a(listas[b])
+#   RETURN            return a
+#   FUNC / ENDFUNC    func a(listas[b]) / endfunc
+# dest é o único operando escrito (0 quando não há).
+
+OP_BINARIO = {
+    '+': SOMA, '-': SUB, '*': MUL, '/': DIV, '%': MOD,
+    '==': IGUAL, '!=': DIFERENTE, '<': MENOR, '<=': MENOR_IGUAL, '>': MAIOR, '>=': MAIOR_IGUAL,
+    '&&': E, '||': OU,
+}
+SIMBOLO_BINARIO = {op: simbolo for simbolo, op in OP_BINARIO.items()}
+
+# Tipos de operando. Temporários são inteiros negativos (-1 é t1) e não
+# ocupam a tabela; os demais operandos são índices positivos nela.
+NENHUM, VARIAVEL, TEMP, CONSTANTE, LABEL_OPERANDO, FUNCAO = range(6)
+
+
+class _Internados(dict):
+    # Nome/valor -> operando; o primeiro acesso cria a entrada na tabela.
+    # Indexar o dict evita uma chamada de método por folha da AST.
+    __slots__ = ('contexto', 'tipo')
+
+    def __init__(self, contexto, tipo):
+        self.contexto = contexto
+        self.tipo = tipo
+
+    def __missing__(self, chave):
+        operando = self[chave] = self.contexto._novo_operando(self.tipo, chave)
+        return operando
+
+
 class ContextoTAC:
     def __init__(self):
         self.temp_count = 0
+        self.label_count = 0
+        self.prefixo_labels = ""
         self.instrucoes = []
+        self.tipos = [NENHUM]
+        self.valores = [None]
+        self.listas = []
+        self.variaveis = _Internados(self, VARIAVEL)
+        self.constantes = _Internados(self, CONSTANTE)
+        self.funcoes = _Internados(self, FUNCAO)
+
+    def _novo_operando(self, tipo, valor):
+        self.tipos.append(tipo)
+        self.valores.append(valor)
+        return len(self.tipos) - 1
 
     def novo_temp(self):
         self.temp_count += 1
-        return f"t{self.temp_count}"
+        return -self.temp_count
+
+    def nova_label(self, prefixo):
+        label = self._novo_operando(LABEL_OPERANDO, f"{self.prefixo_labels}{prefixo}_{self.label_count}")
+        self.label_count += 1
+        return label
+
+    def incorporar(self, outro):
+        # Acrescenta as instruções de outro contexto, gerado à parte. Nomes,
+        # constantes e funções passam a ser os daqui; as labels entram como
+        # estão (o prefixo de cada unidade as distingue) e os temporários
+        # são renumerados depois dos daqui.
+        mapa = [0] * len(outro.tipos)
+        internados = {VARIAVEL: self.variaveis, CONSTANTE: self.constantes, FUNCAO: self.funcoes}
+        for operando in range(1, len(outro.tipos)):
+            tipo, valor = outro.tipos[operando], outro.valores[operando]
+            if tipo in internados:
+                mapa[operando] = internados[tipo][valor]
+            else:
+                mapa[operando] = self._novo_operando(tipo, valor)
+        deslocamento = self.temp_count
+
+        def traduzir(operando):
+            return operando - deslocamento if operando < 0 else mapa[operando]
+
+        base = len(self.listas)
+        for lista in outro.listas:
+            self.listas.append(tuple(map(traduzir, lista)))
+        for op, dest, a, b in outro.instrucoes:
+            b = b + base if op == CALL or op == FUNC else traduzir(b)
+            self.instrucoes.append((op, traduzir(dest), traduzir(a), b))
+        self.temp_count += outro.temp_count
+        self.label_count += outro.label_count
+
+    def tipo(self, operando):
+        return TEMP if operando < 0 else self.tipos[operando]
+
+    def lista(self, operandos):
+        self.listas.append(tuple(operandos))
+        return len(self.listas) - 1
+
+    def emit(self, op, dest=0, a=0, b=0):
+        self.instrucoes.append((op, dest, a, b))
+
+    def texto(self, operando):
+        if operando < 0:
+            return f"t{-operando}"
+        return str(self.valores[operando])
+
+    def formatar(self, instrucao):
+        op, dest, a, b = instrucao
+        texto = self.texto
+        if op <= OU:
+            return f"{texto(dest)} = {texto(a)} {SIMBOLO_BINARIO[op]} {texto(b)}"
+        if op == COPIA:
+            return f"{texto(dest)} = {texto(a)}"
+        if op == LABEL:
+            return f"{texto(a)}:"
+        if op == GOTO:
+            return f"goto {texto(a)}"
+        if op == IFNOT:
+            return f"ifnot {texto(a)} goto {texto(b)}"
+        if op == IF:
+            return f"if {texto(a)} goto {texto(b)}"
+        if op == CALL:
+            return f"{texto(dest)} = call {texto(a)}({', '.join(map(texto, self.listas[b]))})"
+        if op == RETURN:
+            return f"return {texto(a)}"
+        if op == FUNC:
+            return f"func {texto(a)}({', '.join(map(texto, self.listas[b]))})"
+        return "endfunc"
+
+    def linhas(self):
+        for instrucao in self.instrucoes:
+            yield self.formatar(instrucao)
 
-    def emit(self, instrucao):
-        self.instrucoes.append(instrucao)
+    def escrever(self, destino=None):
+        escrever_linhas(self.linhas(), destino)
 
-    def imprimir(self):
-        print("Código TAC gerado:")
-        for instr in self.instrucoes:
-            print(instr)
+    def imprimir(self, destino=None):
+        escrever_linhas(chain(("Código TAC gerado:",), self.linhas()), destino)
@@ -0,0 +1,36 @@
+import os
+import sys
+from itertools import islice
+
+# Saída de texto em blocos: os pedaços (linhas do TAC, do assembly, da AST)
+# são juntados de LOTE em LOTE e vão num write() só, em vez de um print()
+# por linha. O destino é qualquer objeto com write() ou um caminho; None é
+# o sys.stdout do momento da chamada (redirect_stdout continua valendo).
+
+LOTE = 4096  # pedaços por write()
+BUFFER = 1 << 20  # buffer do arquivo aberto a partir de um caminho
+
+
+def escrever_pedacos(pedacos, destino=None):
+    if destino is None:
+        destino = sys.stdout
+    if isinstance(destino, (str, bytes, os.PathLike)):
+        with open(destino, 'w', encoding='utf-8', buffering=BUFFER) as arquivo:
+            _escrever(pedacos, arquivo)
+        return
+    _escrever(pedacos, destino)
+
+
+def _escrever(pedacos, arquivo):
+    pedacos = iter(pedacos)
+    write = arquivo.write
+    while True:
+        lote = list(islice(pedacos, LOTE))
+        if not lote:
+            return
+        write(''.join(lote))
+
+
+def escrever_linhas(linhas, destino=None):
+    # Cada linha ganha o '\n', como print() faria.
+    escrever_pedacos((linha + '\n' for linha in linhas), destino)
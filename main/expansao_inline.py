@@ -0,0 +1,268 @@
+from ast1 import (
+    ASTNode, AssignNode, ReturnNode, NumberNode, VariableNode, FuncDeclNode, FuncCallNode,
+    ExpansaoNode, SaidaNode, Saida, ChamadaDeCaudaNode, campos, filhos, exigir_mutavel,
+)
+from my_parser import DeclVarNode
+
+# Expansão (inlining) de funções pequenas nos FuncCallNode. Usa a tabela de
+# funções do ContextoSemantico, então roda depois de verificar_semantica.
+# Uma função é expandida se não é recursiva (nem através de outras) e se o
+# corpo, já com as expansões dele, tem até 'orcamento' nós. Os locais do
+# corpo (mesma regra de classificar_variaveis) ganham nomes novos em cada
+# expansão, x -> x.N, que nenhum identificador do fonte pode ter.
+
+ORCAMENTO_PADRAO = 24
+
+
+def _nos(raiz, dentro_de_funcoes=True):
+    pendentes = [raiz]
+    while pendentes:
+        no = pendentes.pop()
+        yield no
+        for filho in filhos(no):
+            if dentro_de_funcoes or not isinstance(filho, FuncDeclNode):
+                pendentes.append(filho)
+
+
+def _nomes(raiz):
+    # Variáveis lidas ou escritas e as declaradas com 'int'.
+    usadas, declaradas = set(), set()
+    for no in _nos(raiz):
+        if isinstance(no, VariableNode):
+            usadas.add(no.name)
+        elif isinstance(no, AssignNode):
+            usadas.add(no.var)
+        elif isinstance(no, (ExpansaoNode, SaidaNode)):
+            usadas.add(no.resultado)
+        elif isinstance(no, DeclVarNode):
+            for nome, _ in no.vars:
+                declaradas.add(nome)
+    return usadas | declaradas, declaradas
+
+
+def _chamadas(raiz):
+    # Uma chamada de cauda ainda é chamada: a função segue recursiva.
+    return {no.name for no in _nos(raiz) if isinstance(no, (FuncCallNode, ChamadaDeCaudaNode))}
+
+
+def _recursivas(declaracoes):
+    # Funções que alcançam a si mesmas no grafo de chamadas.
+    chama = {nome: _chamadas(declaracao.body) for nome, declaracao in declaracoes.items()}
+    recursivas = set()
+    for inicio in chama:
+        vistos = set()
+        pendentes = list(chama[inicio])
+        while pendentes:
+            nome = pendentes.pop()
+            if nome == inicio:
+                recursivas.add(inicio)
+                break
+            if nome in vistos or nome not in chama:
+                continue
+            vistos.add(nome)
+            pendentes.extend(chama[nome])
+    return recursivas
+
+
+def _ordem_de_chamada(declaracoes):
+    # Chamadas antes de quem chama (pós-ordem do grafo de chamadas).
+    ordem, vistos = [], set()
+    for inicio in declaracoes:
+        pendentes = [(inicio, False)]
+        while pendentes:
+            nome, pronto = pendentes.pop()
+            if pronto:
+                ordem.append(nome)
+                continue
+            if nome in vistos or nome not in declaracoes:
+                continue
+            vistos.add(nome)
+            pendentes.append((nome, True))
+            for chamada in sorted(_chamadas(declaracoes[nome].body)):
+                pendentes.append((chamada, False))
+    return ordem
+
+
+def _copiar(no, renomear, saidas, retorno):
+    # Cópia do corpo com os locais renomeados (ou, para parâmetros trocados
+    # pelo argumento, substituídos por ele) e cada return trocado por
+    # SaidaNode(valor, *retorno). Corpos cabem no orçamento, então a recursão
+    # é rasa.
+    if isinstance(no, list):
+        return [_copiar(item, renomear, saidas, retorno) for item in no]
+    if isinstance(no, tuple):
+        nome, valor = no
+        return renomear.get(nome, nome), _copiar(valor, renomear, saidas, retorno)
+    if not isinstance(no, ASTNode):
+        return no
+    if isinstance(no, VariableNode):
+        novo = renomear.get(no.name, no.name)
+        if isinstance(novo, ASTNode):
+            return _copiar(novo, {}, saidas, retorno)
+        return VariableNode(novo)
+    if isinstance(no, AssignNode):
+        return AssignNode(renomear.get(no.var, no.var), _copiar(no.value, renomear, saidas, retorno))
+    if isinstance(no, ReturnNode):
+        return SaidaNode(_copiar(no.value, renomear, saidas, retorno), *retorno)
+    if isinstance(no, ExpansaoNode):
+        saida = None
+        if no.saida is not None:
+            saida = saidas[no.saida] = Saida()
+        return ExpansaoNode(_copiar(no.comandos, renomear, saidas, retorno),
+                            renomear.get(no.resultado, no.resultado), saida)
+    if isinstance(no, SaidaNode):
+        return SaidaNode(_copiar(no.value, renomear, saidas, retorno),
+                         renomear.get(no.resultado, no.resultado), saidas[no.saida])
+    copia = no.__class__.__new__(no.__class__)
+    for nome in campos(no):
+        setattr(copia, nome, _copiar(getattr(no, nome), renomear, saidas, retorno))
+    return copia
+
+
+class _Expansor:
+    def __init__(self, raiz, contexto, orcamento):
+        self.funcoes = contexto.funcoes
+        self.declaracoes = {nome: declaracao for nome, declaracao in contexto.declaracoes.items()
+                            if declaracao is not None}
+        self.orcamento = orcamento
+        self.recursivas = _recursivas(self.declaracoes)
+        self.no_principal, _ = _nomes_do_principal(raiz)
+        self.locais = {}  # função -> nomes renomeados a cada expansão
+        self.compartilhadas = {}  # função -> nomes globais que ela usa
+        self.tamanho = {}
+        self.escritas = {}  # função -> (nomes que o corpo escreve, se ainda chama alguém)
+        self.contador = 0
+        self.expandidas = 0
+
+    def analisar(self, nome):
+        declaracao = self.declaracoes[nome]
+        usadas, declaradas = _nomes(declaracao.body)
+        locais = set(declaracao.params) | declaradas | (usadas - self.no_principal)
+        self.locais[nome] = locais
+        self.compartilhadas[nome] = usadas - locais
+        self.tamanho[nome] = sum(1 for _ in _nos(declaracao.body))
+        escritas, tem_chamadas = set(), False
+        for no in _nos(declaracao.body):
+            if isinstance(no, (AssignNode, SaidaNode, ExpansaoNode)):
+                escritas.add(no.var if isinstance(no, AssignNode) else no.resultado)
+            elif isinstance(no, DeclVarNode):
+                escritas.update(nome for nome, _ in no.vars)
+            elif isinstance(no, FuncCallNode):
+                tem_chamadas = True
+        self.escritas[nome] = escritas, tem_chamadas
+
+    def pode_expandir(self, chamada, escondidas):
+        # 'escondidas': parâmetros e 'int x' de quem chama, que esconderiam a
+        # global x lida pelo corpo expandido.
+        nome = chamada.name
+        if nome not in self.tamanho or nome in self.recursivas:
+            return False
+        if self.funcoes.get(nome) != len(chamada.args) or self.tamanho[nome] > self.orcamento:
+            return False
+        return not (self.compartilhadas[nome] & escondidas)
+
+    def novo_nome(self, nome):
+        # x -> x.N; um x.M de uma expansão interna vira x.N também.
+        self.contador += 1
+        return f"{nome.split('.', 1)[0]}.{self.contador}"
+
+    def expandir(self, chamada):
+        declaracao = self.declaracoes[chamada.name]
+        renomear = {local: self.novo_nome(local) for local in sorted(self.locais[chamada.name])}
+        resultado = self.novo_nome(chamada.name)
+        saida = Saida()
+        escritas, tem_chamadas = self.escritas[chamada.name]
+        comandos = []
+        for posicao, (param, arg) in enumerate(zip(declaracao.params, chamada.args)):
+            # Parâmetro que o corpo não escreve recebe direto uma constante, ou
+            # uma variável que nada muda entre a avaliação do argumento e o
+            # fim do corpo; os outros viram cópias.
+            if param not in escritas and (isinstance(arg, NumberNode) or (
+                    isinstance(arg, VariableNode) and arg.name not in escritas and not tem_chamadas
+                    and not any(isinstance(no, (FuncCallNode, ExpansaoNode))
+                                for depois in chamada.args[posicao + 1:] for no in _nos(depois)))):
+                renomear[param] = arg
+            else:
+                comandos.append(AssignNode(renomear[param], arg))
+        # Locais começam em 0 a cada chamada; os x.N de expansões internas já
+        # são iniciados por elas.
+        for local in sorted(self.locais[chamada.name] - set(declaracao.params)):
+            if '.' not in local:
+                comandos.append(AssignNode(renomear[local], NumberNode(0)))
+        corpo = _copiar(declaracao.body.comandos, renomear, {}, (resultado, saida))
+        if corpo and isinstance(corpo[-1], SaidaNode) and corpo[-1].saida is saida:
+            # O último return não precisa saltar: o fim já vem a seguir.
+            corpo[-1] = AssignNode(resultado, corpo[-1].value)
+        else:
+            comandos.append(AssignNode(resultado, NumberNode(0)))
+        tem_saidas = any(isinstance(no, SaidaNode) and no.saida is saida
+                         for comando in corpo for no in _nos(comando))
+        self.expandidas += 1
+        return ExpansaoNode(comandos + corpo, resultado, saida if tem_saidas else None)
+
+    def percorrer(self, raiz, funcao):
+        # Troca no lugar cada chamada expansível dentro de 'raiz'; os
+        # argumentos, que vão para dentro da expansão, também são visitados.
+        escondidas = set()
+        if funcao is not None:
+            escondidas = set(funcao.params) | _nomes(funcao.body)[1]
+        pendentes = [raiz]
+        while pendentes:
+            no = pendentes.pop()
+            for nome in campos(no):
+                valor = getattr(no, nome)
+                if isinstance(valor, ASTNode):
+                    if isinstance(valor, FuncDeclNode):
+                        continue
+                    if isinstance(valor, FuncCallNode) and self.pode_expandir(valor, escondidas):
+                        valor = self.expandir(valor)
+                        setattr(no, nome, valor)
+                    pendentes.append(valor)
+                elif isinstance(valor, list):
+                    for posicao, item in enumerate(valor):
+                        chave = None
+                        if isinstance(item, tuple):
+                            chave, item = item
+                        if not isinstance(item, ASTNode) or isinstance(item, FuncDeclNode):
+                            continue
+                        if isinstance(item, FuncCallNode) and self.pode_expandir(item, escondidas):
+                            item = self.expandir(item)
+                            valor[posicao] = item if chave is None else (chave, item)
+                        pendentes.append(item)
+
+
+def _nomes_do_principal(raiz):
+    usadas = set()
+    declaradas = set()
+    for no in _nos(raiz, dentro_de_funcoes=False):
+        if isinstance(no, VariableNode):
+            usadas.add(no.name)
+        elif isinstance(no, AssignNode):
+            usadas.add(no.var)
+        elif isinstance(no, DeclVarNode):
+            for nome, _ in no.vars:
+                usadas.add(nome)
+                declaradas.add(nome)
+    return usadas, declaradas
+
+
+def expandir_chamadas(raiz, contexto, orcamento=ORCAMENTO_PADRAO):
+    # Altera a AST no lugar e devolve as estatísticas. As declarações das
+    # funções ficam (outras chamadas, ou recursivas, ainda as usam).
+    exigir_mutavel(raiz, 'expandir_chamadas')
+    expansor = _Expansor(raiz, contexto, orcamento)
+    # As declarações vêm do ContextoSemantico, que pode ter visto outra árvore.
+    for declaracao in expansor.declaracoes.values():
+        exigir_mutavel(declaracao, 'expandir_chamadas')
+    # Primeiro o corpo de cada função, das chamadas para quem chama: ao ser
+    # expandida, uma função já traz as expansões dela.
+    for nome in _ordem_de_chamada(expansor.declaracoes):
+        declaracao = expansor.declaracoes[nome]
+        expansor.percorrer(declaracao.body, declaracao)
+        expansor.analisar(nome)
+    expansor.percorrer(raiz, None)
+    return {
+        'chamadas_expandidas': expansor.expandidas,
+        'funcoes_expansiveis': sum(1 for nome, tamanho in expansor.tamanho.items()
+                                   if tamanho <= orcamento and nome not in expansor.recursivas),
+    }
@@ -0,0 +1,263 @@
+from heapq import heappop, heappush
+
+from contexto_tac import OU, CALL, VARIAVEL, CONSTANTE, SOMA, MUL, IGUAL, DIFERENTE, E
+from otimizador_tac import _usos
+
+# Análises de fluxo de dados sobre o GrafoFluxo de uma unidade, em vetores
+# de bits: cada fato é um bit de um int do Python, então união, interseção
+# e diferença custam uma operação por bloco, qualquer que seja o número de
+# fatos. resolver() itera uma lista de trabalho na ordem do fluxo (pós-ordem
+# reversa para frente, pós-ordem para trás), o que faz a maioria dos
+# programas convergir em duas ou três passadas.
+
+_COMUTATIVAS = (SOMA, MUL, IGUAL, DIFERENTE, E, OU)
+
+
+def _ordem(grafo):
+    # Pós-ordem reversa a partir da entrada; inalcançáveis no fim. Os
+    # sucessores são visitados do último para o primeiro, então o corpo de
+    # um laço (a queda do cabeçalho) fica logo depois dele, antes da saída.
+    visitados = {0}
+    pos_ordem = []
+    pendentes = [(grafo.blocos[0], reversed(grafo.blocos[0].sucessores))]
+    while pendentes:
+        bloco, sucessores = pendentes[-1]
+        for sucessor in sucessores:
+            if sucessor.numero not in visitados:
+                visitados.add(sucessor.numero)
+                pendentes.append((sucessor, reversed(sucessor.sucessores)))
+                break
+        else:
+            pendentes.pop()
+            pos_ordem.append(bloco.numero)
+    pos_ordem.reverse()
+    return pos_ordem + [bloco.numero for bloco in grafo.blocos if bloco.numero not in visitados]
+
+
+def resolver(grafo, gera, mata, para_frente=True, uniao=True, fronteira=0, inicial=0):
+    # Ponto fixo de saida = gera | (entrada & ~mata) (para frente; para trás
+    # troque entrada e saida). A junção é a união ou a interseção dos
+    # vizinhos; 'fronteira' vale na entrada do grafo (ou na saída dos blocos
+    # sem sucessor) e 'inicial' é o valor de partida dos demais blocos (tudo
+    # para interseção). Devolve (entrada, saida), um int por bloco.
+    blocos = grafo.blocos
+    ordem = _ordem(grafo)
+    if not para_frente:
+        ordem.reverse()
+    posicao = {numero: indice for indice, numero in enumerate(ordem)}
+    entrada = [inicial] * len(blocos)
+    saida = [inicial] * len(blocos)
+    pendentes = list(range(len(ordem)))
+    na_fila = set(ordem)
+    while pendentes:
+        numero = ordem[heappop(pendentes)]
+        na_fila.discard(numero)
+        bloco = blocos[numero]
+        vizinhos = bloco.predecessores if para_frente else bloco.sucessores
+        if (para_frente and numero == 0) or not vizinhos:
+            juntado = fronteira
+        else:
+            juntado = 0 if uniao else inicial
+        for vizinho in vizinhos:
+            if uniao:
+                juntado |= (saida if para_frente else entrada)[vizinho.numero]
+            else:
+                juntado &= (saida if para_frente else entrada)[vizinho.numero]
+        transferido = gera[numero] | (juntado & ~mata[numero])
+        if para_frente:
+            entrada[numero] = juntado
+            mudou = transferido != saida[numero]
+            saida[numero] = transferido
+            afetados = bloco.sucessores
+        else:
+            saida[numero] = juntado
+            mudou = transferido != entrada[numero]
+            entrada[numero] = transferido
+            afetados = bloco.predecessores
+        if mudou:
+            for afetado in afetados:
+                if afetado.numero not in na_fila:
+                    na_fila.add(afetado.numero)
+                    heappush(pendentes, posicao[afetado.numero])
+    return entrada, saida
+
+
+class Bits:
+    # Numera os fatos de uma análise: fato -> bit.
+    __slots__ = ('indice', 'fatos')
+
+    def __init__(self):
+        self.indice = {}
+        self.fatos = []
+
+    def bit(self, fato):
+        indice = self.indice.get(fato)
+        if indice is None:
+            indice = self.indice[fato] = len(self.fatos)
+            self.fatos.append(fato)
+        return 1 << indice
+
+    def todos(self):
+        return (1 << len(self.fatos)) - 1
+
+    def membros(self, vetor):
+        return [self.fatos[indice] for indice in range(len(self.fatos)) if vetor >> indice & 1]
+
+
+def locais_das_funcoes(contexto, grafos):
+    # FUNC -> variáveis locais, pela regra de classificar_variaveis:
+    # parâmetros e os nomes que o principal não usa.
+    tipos = contexto.tipos
+
+    def variaveis(grafo):
+        nomes = set()
+        for bloco in grafo.blocos:
+            for instrucao in bloco.instrucoes:
+                for operando in (instrucao[1],) + tuple(_usos(contexto, instrucao)):
+                    if operando > 0 and tipos[operando] == VARIAVEL:
+                        nomes.add(operando)
+        return nomes
+
+    principal = variaveis(grafos[0])
+    locais = {}
+    for grafo in grafos[1:]:
+        parametros = set(contexto.listas[grafo.funcao[3]])
+        locais[grafo.funcao] = parametros | (variaveis(grafo) - principal)
+    return locais
+
+
+class Vivas:
+    # Operandos (variáveis e temporários) vivos na entrada e na saída de
+    # cada bloco. Na saída da unidade, e em cada call, todas as variáveis que
+    # não são locais dela estão vivas: o resultado do programa fica nelas e
+    # a função chamada pode lê-las.
+    def __init__(self, contexto, grafo, locais=()):
+        self.contexto = contexto
+        self.bits = Bits()
+        tipos = contexto.tipos
+        blocos = grafo.blocos
+        for bloco in blocos:
+            for instrucao in bloco.instrucoes:
+                for operando in (instrucao[1],) + tuple(_usos(contexto, instrucao)):
+                    if operando < 0 or (operando > 0 and tipos[operando] == VARIAVEL):
+                        self.bits.bit(operando)
+        self.globais = 0
+        for operando in self.bits.fatos:
+            if operando > 0 and operando not in locais:
+                self.globais |= self.bits.bit(operando)
+        usa, define = [], []
+        for bloco in blocos:
+            lidos = escritos = 0
+            for instrucao in reversed(bloco.instrucoes):
+                escrito, lido = self.efeito(instrucao)
+                lidos = (lidos & ~escrito) | lido
+                escritos |= escrito
+            usa.append(lidos)
+            define.append(escritos)
+        self.entrada, self.saida = resolver(grafo, usa, define, para_frente=False,
+                                            fronteira=self.globais)
+
+    def efeito(self, instrucao):
+        # (bits escritos, bits lidos) pela instrução.
+        bit = self.bits.indice
+        op, dest = instrucao[0], instrucao[1]
+        escrito = 1 << bit[dest] if dest in bit else 0
+        lido = self.globais if op == CALL else 0
+        for operando in _usos(self.contexto, instrucao):
+            if operando in bit:
+                lido |= 1 << bit[operando]
+        return escrito, lido
+
+    def viva(self, vetor, operando):
+        indice = self.bits.indice.get(operando)
+        return indice is not None and vetor >> indice & 1
+
+
+class DefinicoesAlcancantes:
+    # Cada instrução que escreve um operando é uma definição (bloco,
+    # posição); o bit dela alcança um ponto se algum caminho chega lá sem
+    # outra escrita do mesmo operando. Um call não mata definições.
+    def __init__(self, contexto, grafo):
+        self.bits = Bits()
+        self.do_operando = {}  # operando -> bits de todas as suas definições
+        for bloco in grafo.blocos:
+            for posicao, (_, dest, _, _) in enumerate(bloco.instrucoes):
+                if dest:
+                    bit = self.bits.bit((bloco.numero, posicao))
+                    self.do_operando[dest] = self.do_operando.get(dest, 0) | bit
+        gera, mata = [], []
+        for bloco in grafo.blocos:
+            geradas = mortas = 0
+            for posicao, (_, dest, _, _) in enumerate(bloco.instrucoes):
+                if dest:
+                    bit = 1 << self.bits.indice[(bloco.numero, posicao)]
+                    geradas = (geradas & ~self.do_operando[dest]) | bit
+                    mortas |= self.do_operando[dest]
+            gera.append(geradas)
+            mata.append(mortas & ~geradas)
+        self.entrada, self.saida = resolver(grafo, gera, mata)
+
+    def de(self, vetor, operando):
+        # Definições de 'operando' presentes em 'vetor', como (bloco, posição).
+        return self.bits.membros(vetor & self.do_operando.get(operando, 0))
+
+
+def expressao(op, a, b):
+    # Chave de 'a op b', com os operandos das comutativas em ordem.
+    if op in _COMUTATIVAS and b < a:
+        a, b = b, a
+    return op, a, b
+
+
+class ExpressoesDisponiveis:
+    # Expressões binárias já calculadas em todo caminho até o ponto, sem
+    # escrita de nenhum operando desde então. Um call mata as que leem
+    # variáveis.
+    def __init__(self, contexto, grafo):
+        self.contexto = contexto
+        self.bits = Bits()
+        self.com_operando = {}  # operando -> bits das expressões que o leem
+        self.com_variavel = 0
+        tipos = contexto.tipos
+        for bloco in grafo.blocos:
+            for op, _, a, b in bloco.instrucoes:
+                if op > OU or (self._constante(a) and self._constante(b)):
+                    continue
+                bit = self.bits.bit(expressao(op, a, b))
+                for operando in (a, b):
+                    if not self._constante(operando):
+                        self.com_operando[operando] = self.com_operando.get(operando, 0) | bit
+                        if operando > 0 and tipos[operando] == VARIAVEL:
+                            self.com_variavel |= bit
+        gera, mata = [], []
+        for bloco in grafo.blocos:
+            disponiveis, mortas = 0, 0
+            for instrucao in bloco.instrucoes:
+                geradas, morreram = self.efeito(instrucao)
+                disponiveis = (disponiveis & ~morreram) | geradas
+                mortas = (mortas | morreram) & ~geradas
+            gera.append(disponiveis)
+            mata.append(mortas)
+        self.entrada, self.saida = resolver(grafo, gera, mata, uniao=False, inicial=self.bits.todos())
+
+    def _constante(self, operando):
+        return operando > 0 and self.contexto.tipos[operando] == CONSTANTE
+
+    def efeito(self, instrucao):
+        # (bits gerados, bits mortos) pela instrução, nessa ordem: 't = t + 1'
+        # calcula a expressão e logo a mata.
+        op, dest, a, b = instrucao
+        morreram = self.com_operando.get(dest, 0) if dest else 0
+        if op == CALL:
+            morreram |= self.com_variavel
+        geradas = 0
+        if op <= OU:
+            indice = self.bits.indice.get(expressao(op, a, b))
+            if indice is not None:
+                geradas = (1 << indice) & ~morreram
+        return geradas, morreram
+
+    def aplicar(self, vetor, instrucao):
+        geradas, morreram = self.efeito(instrucao)
+        return (vetor & ~morreram) | geradas
+
@@ -0,0 +1,138 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from ast1 import ProgramNode, FuncDeclNode, filhos
+from contexto_tac import ContextoTAC
+from contexto_assembly import ContextoAssembly
+from promocao_variaveis import classificar_variaveis
+
+# Geração de código por unidade: o principal (com as funções declaradas
+# dentro dele) é uma unidade, e cada declaração de função do nível de fora
+# é outra. Cada unidade é gerada num ContextoTAC e num ContextoAssembly
+# próprios, com as labels prefixadas pelo nome da função (soma.else_0,
+# soma.ELSE0); a única informação do programa inteiro de que ela precisa,
+# os locais das funções que declara, é calculada antes por
+# classificar_variaveis e vai junto. Sem nada em comum, as unidades são
+# geradas em processos separados e montadas depois na ordem do fonte: o TAC
+# por ContextoTAC.incorporar, que renumera os temporários, e o assembly
+# pela concatenação de .data, do main e das funções.
+
+
+def declaradas(raiz):
+    # Nomes das funções declaradas em 'raiz' (ela inclusive), em ordem.
+    nomes = set()
+    pendentes = [raiz]
+    while pendentes:
+        no = pendentes.pop()
+        if isinstance(no, FuncDeclNode):
+            nomes.add(no.name)
+        pendentes.extend(filhos(no))
+    return sorted(nomes)
+
+
+def dividir_unidades(comandos, classificacao):
+    # [(nó, prefixo das labels, classificação restrita à unidade)], o
+    # principal primeiro e depois as funções na ordem em que aparecem. A
+    # classificação restrita é tudo o que a geração da unidade lê dela.
+    principal, locais = classificacao
+
+    def restrita(no, promovidas):
+        return promovidas, {nome: locais.get(nome, set()) for nome in declaradas(no)}
+
+    corpo = ProgramNode([comando for comando in comandos if not isinstance(comando, FuncDeclNode)])
+    unidades = [(corpo, "", restrita(corpo, principal))]
+    for comando in comandos:
+        if isinstance(comando, FuncDeclNode):
+            unidades.append((comando, f"{comando.name}.", restrita(comando, set())))
+    return unidades
+
+
+def gerar_tac(no, prefixo):
+    contexto = ContextoTAC()
+    contexto.prefixo_labels = prefixo
+    no.gerar_tac(contexto)
+    return contexto
+
+
+def gerar_assembly(no, prefixo, classificacao, opcoes):
+    # (variáveis de .data, código do main, [linhas de cada função]), já com
+    # peephole e registradores físicos.
+    contexto = ContextoAssembly(**opcoes)
+    contexto.prefixo_labels = prefixo
+    contexto.classificacao = classificacao
+    contexto.locais_das_funcoes = classificacao[1]
+    no.gerar_assembly(contexto)
+    if contexto.peephole:
+        contexto.aplicar_peephole()
+    contexto.alocar_registradores()
+    return sorted(contexto.vars), contexto.codigo, [linhas for _, linhas in contexto.funcoes]
+
+
+def gerar_unidade(tarefa):
+    # tarefa: (nó, prefixo, classificação, opções do ContextoAssembly,
+    # quer o TAC, quer o assembly). Devolve (ContextoTAC, assembly), com
+    # None no que não foi pedido.
+    no, prefixo, classificacao, opcoes, quer_tac, quer_assembly = tarefa
+    tac = gerar_tac(no, prefixo) if quer_tac else None
+    assembly = gerar_assembly(no, prefixo, classificacao, opcoes) if quer_assembly else None
+    return tac, assembly
+
+
+def tamanho_do_lote(tarefas, processos):
+    # Tarefas por envio ao pool. Lotes de algumas diluem o custo da
+    # comunicação entre processos sem deixar um processo com a cauda toda.
+    return max(1, len(tarefas) // (processos * 8))
+
+
+def gerar_unidades(tarefas, processos=None):
+    # Resultados de gerar_unidade na ordem das tarefas. processos=None usa
+    # um processo por CPU; com 1, ou uma tarefa só, gera aqui mesmo.
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(tarefas) <= 1:
+        return [gerar_unidade(tarefa) for tarefa in tarefas]
+    try:
+        with ProcessPoolExecutor(processos) as executor:
+            return list(executor.map(gerar_unidade, tarefas,
+                                     chunksize=tamanho_do_lote(tarefas, processos)))
+    except (RecursionError, pickle.PicklingError):
+        # AST funda demais para ir ao processo pelo pickle.
+        return [gerar_unidade(tarefa) for tarefa in tarefas]
+
+
+def juntar_tac(contextos):
+    contexto = ContextoTAC()
+    for parte in contextos:
+        contexto.incorporar(parte)
+    return contexto
+
+
+def juntar_assembly(partes):
+    # Linhas do programa, como ContextoAssembly.linhas(); 'partes' vem de
+    # gerar_assembly, o principal primeiro.
+    variaveis = set()
+    for parte in partes:
+        variaveis.update(parte[0])
+    linhas = [".data"]
+    linhas += [f"{var}: .word 0" for var in sorted(variaveis)]
+    linhas += [".text", ".globl main", "main:"]
+    linhas += partes[0][1]
+    linhas += ["li a7, 93", "ecall"]
+    for parte in partes:
+        for funcao in parte[2]:
+            linhas += funcao
+    return linhas
+
+
+def gerar_em_paralelo(raiz, processos=None, variaveis_em_registradores=True, peephole=True,
+                      imediatos=True):
+    # TAC (um ContextoTAC) e linhas de assembly do programa, gerados por
+    # unidade em 'processos' processos. A AST já deve ter passado por
+    # verificar_semantica e pelas otimizações que se queira.
+    opcoes = {'variaveis_em_registradores': variaveis_em_registradores,
+              'peephole': peephole, 'imediatos': imediatos}
+    unidades = dividir_unidades(raiz.comandos, classificar_variaveis(raiz))
+    resultados = gerar_unidades([(no, prefixo, classificacao, opcoes, True, True)
+                                 for no, prefixo, classificacao in unidades], processos)
+    return (juntar_tac([tac for tac, _ in resultados]),
+            juntar_assembly([assembly for _, assembly in resultados]))
@@ -0,0 +1,80 @@
+from ast1 import ASTNode, FuncDeclNode, FuncCallNode, ChamadaDeCaudaNode, campos, filhos, exigir_mutavel
+
+# Grafo de chamadas do programa inteiro, sobre a AST. A raiz é o programa
+# principal (None); cada FuncDeclNode é um vértice, e cada FuncCallNode (ou
+# chamada de cauda) no corpo dele, uma aresta. Serve às análises entre
+# funções e a remover_funcoes_mortas, que tira as declarações que o
+# principal não alcança antes de gerar TAC ou assembly.
+
+
+class GrafoChamadas:
+    def __init__(self, raiz):
+        self.declaracoes = {}  # nome -> FuncDeclNode (a primeira, se repetida)
+        self.chama = {None: set()}  # função (None: principal) -> funções que ela chama
+        self.chamadas = {}  # função chamada -> [(quem chama, FuncCallNode)]
+        self.dentro_de = {}  # função -> função em cujo corpo ela é declarada
+        pendentes = [(raiz, None)]
+        while pendentes:
+            no, funcao = pendentes.pop()
+            if isinstance(no, FuncDeclNode):
+                self.declaracoes.setdefault(no.name, no)
+                if funcao is not None:
+                    self.dentro_de.setdefault(no.name, funcao)
+                self.chama.setdefault(no.name, set())
+                pendentes.append((no.body, no.name))
+                continue
+            if isinstance(no, (FuncCallNode, ChamadaDeCaudaNode)):
+                self.chama[funcao].add(no.name)
+                self.chamadas.setdefault(no.name, []).append((funcao, no))
+            for filho in filhos(no):
+                pendentes.append((filho, funcao))
+
+    def chamadores(self, nome):
+        return {funcao for funcao, _ in self.chamadas.get(nome, ())}
+
+    def alcancaveis(self):
+        # Funções declaradas que alguma cadeia de chamadas a partir do
+        # principal alcança.
+        vistas = set()
+        pendentes = [None]
+        while pendentes:
+            for chamada in self.chama.get(pendentes.pop(), ()):
+                if chamada not in vistas and chamada in self.declaracoes:
+                    vistas.add(chamada)
+                    pendentes.append(chamada)
+        return vistas
+
+
+def remover_funcoes_mortas(raiz):
+    # Altera a AST no lugar e devolve as estatísticas. Uma função morta com
+    # uma declaração viva no corpo fica: é lá que a viva é gerada.
+    exigir_mutavel(raiz, 'remover_funcoes_mortas')
+    grafo = GrafoChamadas(raiz)
+    vivas = grafo.alcancaveis()
+    for nome in list(vivas):
+        while nome in grafo.dentro_de:
+            nome = grafo.dentro_de[nome]
+            vivas.add(nome)
+    removidas = 0
+    pendentes = [raiz]
+    while pendentes:
+        no = pendentes.pop()
+        for nome in campos(no):
+            valor = getattr(no, nome)
+            if not isinstance(valor, list):
+                if isinstance(valor, ASTNode):
+                    pendentes.append(valor)
+                continue
+            ficam = []
+            for item in valor:
+                if isinstance(item, FuncDeclNode) and item.name not in vivas:
+                    removidas += 1
+                    continue
+                ficam.append(item)
+                if isinstance(item, tuple):
+                    item = item[1]
+                if isinstance(item, ASTNode):
+                    pendentes.append(item)
+            if len(ficam) != len(valor):
+                valor[:] = ficam
+    return {'funcoes_removidas': removidas, 'funcoes_mantidas': len(vivas)}
@@ -0,0 +1,234 @@
+from contexto_tac import LABEL, GOTO, IFNOT, IF, RETURN, FUNC, ENDFUNC
+
+
+class BlocoBasico:
+    __slots__ = ('numero', 'label', 'instrucoes', 'sucessores', 'predecessores')
+
+    def __init__(self, label):
+        self.numero = 0
+        self.label = label  # operando da label que abre o bloco (0 se não há)
+        self.instrucoes = []
+        self.sucessores = []
+        self.predecessores = []
+
+    def terminador(self):
+        if self.instrucoes and self.instrucoes[-1][0] in (GOTO, IFNOT, IF, RETURN):
+            return self.instrucoes[-1]
+        return None
+
+
+class GrafoFluxo:
+    # Uma unidade de código (o programa principal ou uma função) em blocos
+    # básicos. As labels não ficam nas instruções: cada bloco guarda a sua,
+    # e os desvios no fim do bloco definem as arestas. blocos[0] é a entrada.
+    __slots__ = ('funcao', 'blocos', 'bloco_da_label')
+
+    def __init__(self, funcao, instrucoes):
+        self.funcao = funcao  # instrução FUNC da unidade (None no principal)
+        self.blocos = [BlocoBasico(0)]
+        for instrucao in instrucoes:
+            atual = self.blocos[-1]
+            if instrucao[0] == LABEL:
+                if atual.instrucoes or atual.label:
+                    atual = BlocoBasico(instrucao[2])
+                    self.blocos.append(atual)
+                else:
+                    atual.label = instrucao[2]
+                continue
+            if atual.terminador() is not None:
+                atual = BlocoBasico(0)
+                self.blocos.append(atual)
+            atual.instrucoes.append(instrucao)
+        self.ligar()
+
+    def ligar(self):
+        # (Re)calcula numeração e arestas a partir da ordem dos blocos.
+        self.bloco_da_label = {}
+        for numero, bloco in enumerate(self.blocos):
+            bloco.numero = numero
+            bloco.predecessores = []
+            if bloco.label:
+                self.bloco_da_label[bloco.label] = bloco
+        for bloco in self.blocos:
+            bloco.sucessores = self.sucessores(bloco)
+            for sucessor in bloco.sucessores:
+                sucessor.predecessores.append(bloco)
+
+    def proximo(self, bloco):
+        if bloco.numero + 1 < len(self.blocos):
+            return self.blocos[bloco.numero + 1]
+        return None
+
+    def sucessores(self, bloco):
+        terminador = bloco.terminador()
+        proximo = self.proximo(bloco)
+        if terminador is None:
+            return [proximo] if proximo is not None else []
+        op, _, a, b = terminador
+        if op == GOTO:
+            return [self.bloco_da_label[a]]
+        if op == RETURN:
+            return []
+        destino = self.bloco_da_label[b]
+        if proximo is None or proximo is destino:
+            return [destino]
+        return [proximo, destino]
+
+    def remover_inalcancaveis(self):
+        alcancados = {id(self.blocos[0])}
+        pendentes = [self.blocos[0]]
+        while pendentes:
+            for sucessor in pendentes.pop().sucessores:
+                if id(sucessor) not in alcancados:
+                    alcancados.add(id(sucessor))
+                    pendentes.append(sucessor)
+        mortos = [bloco for bloco in self.blocos if id(bloco) not in alcancados]
+        if mortos:
+            self.blocos = [bloco for bloco in self.blocos if id(bloco) in alcancados]
+            self.ligar()
+        return mortos
+
+    def destino_final(self, label):
+        # Segue blocos vazios (só label, ou só um goto) até o primeiro que
+        # faz algo; desviar direto para lá economiza saltos.
+        vistos = set()
+        while label not in vistos:
+            vistos.add(label)
+            bloco = self.bloco_da_label[label]
+            if not bloco.instrucoes:
+                proximo = self.proximo(bloco)
+                if proximo is None or not proximo.label:
+                    break
+                label = proximo.label
+            elif len(bloco.instrucoes) == 1 and bloco.instrucoes[0][0] == GOTO:
+                label = bloco.instrucoes[0][2]
+            else:
+                break
+        return label
+
+    def encurtar_saltos(self):
+        encurtados = 0
+        for bloco in self.blocos:
+            terminador = bloco.terminador()
+            if terminador is None or terminador[0] == RETURN:
+                continue
+            op, dest, a, b = terminador
+            if op == GOTO:
+                novo = (op, dest, self.destino_final(a), b)
+            else:
+                novo = (op, dest, a, self.destino_final(b))
+            if novo != terminador:
+                bloco.instrucoes[-1] = novo
+                encurtados += 1
+        if encurtados:
+            self.ligar()
+        return encurtados
+
+    def remover_saltos_para_o_proximo(self):
+        # 'goto L' (ou 'if/ifnot t goto L') seguido do próprio bloco L não desvia nada.
+        removidos = 0
+        for bloco in self.blocos:
+            terminador = bloco.terminador()
+            if terminador is None or terminador[0] == RETURN:
+                continue
+            destino = terminador[2] if terminador[0] == GOTO else terminador[3]
+            proximo = self.proximo(bloco)
+            if proximo is not None and proximo.label == destino:
+                bloco.instrucoes.pop()
+                removidos += 1
+        if removidos:
+            self.ligar()
+        return removidos
+
+    def juntar_blocos(self):
+        # Labels que ninguém referencia somem; o bloco sem label que só é
+        # alcançado pela queda do anterior é fundido a ele.
+        usadas = set()
+        for bloco in self.blocos:
+            terminador = bloco.terminador()
+            if terminador is not None and terminador[0] != RETURN:
+                usadas.add(terminador[2] if terminador[0] == GOTO else terminador[3])
+        blocos = [self.blocos[0]]
+        for bloco in self.blocos[1:]:
+            if bloco.label not in usadas:
+                bloco.label = 0
+            anterior = blocos[-1]
+            if not bloco.label and anterior.terminador() is None:
+                anterior.instrucoes.extend(bloco.instrucoes)
+            else:
+                blocos.append(bloco)
+        juntados = len(self.blocos) - len(blocos)
+        self.blocos = blocos
+        self.ligar()
+        return juntados
+
+    def instrucoes(self):
+        if self.funcao is not None:
+            yield self.funcao
+        for bloco in self.blocos:
+            if bloco.label:
+                yield (LABEL, 0, bloco.label, 0)
+            yield from bloco.instrucoes
+        if self.funcao is not None:
+            yield (ENDFUNC, 0, 0, 0)
+
+
+def construir_grafos(contexto):
+    # Um grafo para o programa principal e um por função, nessa ordem. O
+    # principal não executa o corpo das funções, que só rodam via call.
+    principal = []
+    funcoes = []
+    atual = principal
+    for instrucao in contexto.instrucoes:
+        op = instrucao[0]
+        if op == FUNC:
+            atual = []
+            funcoes.append((instrucao, atual))
+        elif op == ENDFUNC:
+            atual = principal
+        else:
+            atual.append(instrucao)
+    return [GrafoFluxo(None, principal)] + [GrafoFluxo(funcao, corpo) for funcao, corpo in funcoes]
+
+
+def linearizar(contexto, grafos):
+    # Principal primeiro, depois cada função.
+    contexto.instrucoes = [instrucao for grafo in grafos for instrucao in grafo.instrucoes()]
+
+
+def renumerar_labels(contexto, grafos):
+    # Numera as labels restantes em ordem de aparição (else_0, endif_1, ...),
+    # então a saída não depende de quantas labels foram criadas e descartadas.
+    numero = 0
+    for grafo in grafos:
+        for bloco in grafo.blocos:
+            if bloco.label:
+                prefixo = contexto.valores[bloco.label].rsplit('_', 1)[0]
+                contexto.valores[bloco.label] = f"{prefixo}_{numero}"
+                numero += 1
+
+
+def simplificar_fluxo(contexto):
+    # Encurta cadeias de saltos, remove blocos inalcançáveis (ex.: código
+    # depois de um return), saltos para a instrução seguinte e labels sem
+    # uso, e renumera as labels.
+    antes = len(contexto.instrucoes)
+    grafos = construir_grafos(contexto)
+    blocos_removidos = saltos_removidos = saltos_encurtados = 0
+    for grafo in grafos:
+        saltos_encurtados += grafo.encurtar_saltos()
+        blocos_removidos += len(grafo.remover_inalcancaveis())
+        # Cada junção pode deixar outro salto caindo no bloco seguinte.
+        mudou = True
+        while mudou:
+            removidos = grafo.remover_saltos_para_o_proximo()
+            saltos_removidos += removidos
+            mudou = grafo.juntar_blocos() > 0 or removidos > 0
+    renumerar_labels(contexto, grafos)
+    linearizar(contexto, grafos)
+    return {
+        'instrucoes_removidas': antes - len(contexto.instrucoes),
+        'blocos_removidos': blocos_removidos,
+        'saltos_removidos': saltos_removidos,
+        'saltos_encurtados': saltos_encurtados,
+    }
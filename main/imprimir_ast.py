@@ -1,17 +1,124 @@
-def print_ast(node, indent=0):
-    espaco = '  ' * indent
-    if isinstance(node, list):
-        print(f"{espaco}[")
-        for item in node:
-            print_ast(item, indent + 1)
-        print(f"{espaco}]")
-    elif isinstance(node, (int, str)):
-        print(f"{espaco}{repr(node)}")
-    elif hasattr(node, '__dict__'):
-        print(f"{espaco}{node.__class__.__name__}")
-        for attr in vars(node):
-            valor = getattr(node, attr)
-            print(f"{espaco}  .{attr}:")
-            print_ast(valor, indent + 2)
-    else:
-        print(f"{espaco}{repr(node)}")
+import json
+
+from ast1 import ASTNode, campos
+from escrita import escrever_linhas, escrever_pedacos
+
+
+def linhas_ast(node, indent=0):
+    # Pilha explícita de (objeto, indentação, já_formatado) para não recursar
+    # em árvores profundas; as linhas são as mesmas da versão recursiva.
+    pilha = [(node, indent, False)]
+    while pilha:
+        node, indent, formatado = pilha.pop()
+        espaco = '  ' * indent
+        if formatado:
+            yield f"{espaco}{node}"
+        elif isinstance(node, list):
+            yield f"{espaco}["
+            pilha.append(("]", indent, True))
+            for item in reversed(node):
+                pilha.append((item, indent + 1, False))
+        elif isinstance(node, (int, str)):
+            yield f"{espaco}{repr(node)}"
+        elif isinstance(node, ASTNode):
+            yield f"{espaco}{node.__class__.__name__}"
+            for attr in reversed(campos(node)):
+                pilha.append((getattr(node, attr), indent + 2, False))
+                pilha.append((f".{attr}:", indent + 1, True))
+        else:
+            yield f"{espaco}{repr(node)}"
+
+
+def print_ast(node, indent=0, destino=None):
+    escrever_linhas(linhas_ast(node, indent), destino)
+
+
+def _eh_objeto(valor):
+    # Nós e os objetos que eles compartilham (Saida, Entrada).
+    return hasattr(valor, '__slots__')
+
+
+def linhas_jsonl(raiz):
+    # Um objeto JSON por linha e por nó, em pré-ordem:
+    #   {"id": 3, "tipo": "BinOpNode", "op": "+", "left": {"no": 4}, ...}
+    # Filhos (e Saida/Entrada, que vários nós compartilham) aparecem como
+    # {"no": id} e têm a própria linha, uma vez só; listas e pares viram
+    # arrays.
+    vistos = {id(raiz): (0, raiz)}  # guarda o objeto para o id não ser reusado
+    novos = []  # objetos vistos pela primeira vez no registro atual
+
+    def converter(valor):
+        if _eh_objeto(valor):
+            if id(valor) not in vistos:
+                vistos[id(valor)] = (len(vistos), valor)
+                novos.append(valor)
+            return {'no': vistos[id(valor)][0]}
+        if isinstance(valor, (list, tuple)):
+            return [converter(item) for item in valor]
+        return valor
+
+    codificar = json.JSONEncoder(ensure_ascii=False).encode
+    pendentes = [raiz]
+    while pendentes:
+        objeto = pendentes.pop()
+        registro = {'id': vistos[id(objeto)][0], 'tipo': objeto.__class__.__name__}
+        for nome in campos(objeto):
+            registro[nome] = converter(getattr(objeto, nome))
+        pendentes.extend(reversed(novos))
+        novos.clear()
+        yield codificar(registro)
+
+
+def despejar_jsonl(raiz, destino=None):
+    escrever_linhas(linhas_jsonl(raiz), destino)
+
+
+_FECHA = object()
+
+
+def pedacos_sexpr(raiz):
+    # A AST como uma S-expressão: (Tipo campo ...) por nó, com os campos na
+    # ordem de __slots__; listas e pares entre parênteses, textos entre
+    # aspas (escapados como em JSON) e None como nil. Saida e Entrada, que
+    # vários nós compartilham, saem como #n=(Saida ...) na primeira vez e
+    # #n# nas outras.
+    numeros = {}
+    pendentes = [raiz]
+    separar = False
+    while pendentes:
+        item = pendentes.pop()
+        if item is _FECHA:
+            yield ")"
+            separar = True
+            continue
+        if separar:
+            yield " "
+        separar = True
+        if _eh_objeto(item):
+            prefixo = ""
+            if not isinstance(item, ASTNode):
+                if id(item) in numeros:
+                    yield f"#{numeros[id(item)][0]}#"
+                    continue
+                numeros[id(item)] = (len(numeros), item)
+                prefixo = f"#{numeros[id(item)][0]}="
+            yield f"{prefixo}({item.__class__.__name__}"
+            pendentes.append(_FECHA)
+            for nome in reversed(campos(item)):
+                pendentes.append(getattr(item, nome))
+        elif isinstance(item, (list, tuple)):
+            yield "("
+            separar = False
+            pendentes.append(_FECHA)
+            pendentes.extend(reversed(item))
+        elif item is None:
+            yield "nil"
+        elif isinstance(item, str):
+            yield json.dumps(item, ensure_ascii=False)
+        else:
+            yield str(item)
+    yield "\n"
+
+
+def despejar_sexpr(raiz, destino=None):
+    escrever_pedacos(pedacos_sexpr(raiz), destino)
@@ -0,0 +1,139 @@
+from contexto_tac import (
+    OU, COPIA, LABEL, GOTO, IFNOT, IF, CALL, RETURN, FUNC, ENDFUNC, DIV,
+    NOMES_OP, VARIAVEL, CONSTANTE,
+)
+from otimizador_tac import _dobrar
+
+# Interpretador do TAC estruturado. Serve para conferir as otimizações sobre
+# o TAC e contar instruções executadas, como simulador_riscv faz com o
+# assembly. As variáveis seguem a regra de classificar_variaveis: numa
+# função, os parâmetros e os nomes que o principal não usa são locais (cada
+# chamada tem os seus, começando em 0); o resto é global.
+
+
+class ErroInterpretacao(Exception):
+    pass
+
+
+class InterpretadorTAC:
+    def __init__(self, contexto):
+        self.contexto = contexto
+        self.instrucoes_tac = contexto.instrucoes
+        self.labels = {}
+        self.funcoes = {}  # operando da função -> índice da instrução FUNC
+        self.locais = {}  # índice da FUNC -> operandos das variáveis locais
+        self.globais = {}
+        self.instrucoes = 0
+        self.por_opcode = {}
+        self.profundidade_maxima = 0  # chamadas ativas ao mesmo tempo
+        self._carregar()
+
+    def _carregar(self):
+        tipos = self.contexto.tipos
+        usadas_no_principal = set()
+        inicio = None
+        for indice, (op, dest, a, b) in enumerate(self.instrucoes_tac):
+            if op == LABEL:
+                self.labels[a] = indice
+            elif op == FUNC:
+                inicio = indice
+                self.funcoes[a] = indice
+                self.locais[indice] = set(self.contexto.listas[b])
+            elif op == ENDFUNC:
+                inicio = None
+            else:
+                operandos = [dest, a, b] if op != CALL else [dest] + list(self.contexto.listas[b])
+                for operando in operandos:
+                    if operando > 0 and tipos[operando] == VARIAVEL:
+                        (self.locais[inicio] if inicio is not None else usadas_no_principal).add(operando)
+        parametros = {indice: set(self.contexto.listas[self.instrucoes_tac[indice][3]]) for indice in self.locais}
+        for indice, nomes in self.locais.items():
+            nomes -= usadas_no_principal - parametros[indice]
+
+    def valor_da_variavel(self, nome):
+        return self.globais.get(self.contexto.variaveis.get(nome), 0)
+
+    def executar(self, limite=10_000_000):
+        # Sem recursão: cada chamada empilha (retorno, destino, temporários,
+        # locais) do chamador.
+        instrucoes = self.instrucoes_tac
+        tipos, valores, listas = self.contexto.tipos, self.contexto.valores, self.contexto.listas
+        globais = self.globais
+        por_opcode = self.por_opcode
+        pilha = []
+        temps, locais = {}, {}
+
+        def ler(operando):
+            if operando < 0:
+                return temps.get(operando, 0)
+            if tipos[operando] == CONSTANTE:
+                return valores[operando]
+            return (locais if operando in locais else globais).get(operando, 0)
+
+        def escrever(operando, valor):
+            if operando < 0:
+                temps[operando] = valor
+            elif operando in locais:
+                locais[operando] = valor
+            else:
+                globais[operando] = valor
+
+        pc = 0
+        while pc < len(instrucoes):
+            op, dest, a, b = instrucoes[pc]
+            if op == FUNC and not pilha:
+                # O principal pula o corpo das funções.
+                while instrucoes[pc][0] != ENDFUNC:
+                    pc += 1
+                pc += 1
+                continue
+            if op == LABEL or op == FUNC:
+                pc += 1
+                continue
+            if self.instrucoes >= limite:
+                raise ErroInterpretacao("Limite de instruções excedido")
+            self.instrucoes += 1
+            por_opcode[NOMES_OP[op]] = por_opcode.get(NOMES_OP[op], 0) + 1
+            if op <= OU:
+                x, y = ler(a), ler(b)
+                valor = _dobrar(op, x, y)
+                if valor is None:
+                    # Divisão por zero, como no RISC-V: quociente -1, resto x.
+                    valor = -1 if op == DIV else x
+                escrever(dest, valor)
+            elif op == COPIA:
+                escrever(dest, ler(a))
+            elif op == GOTO:
+                pc = self.labels[a]
+                continue
+            elif op == IFNOT or op == IF:
+                if (ler(a) != 0) == (op == IF):
+                    pc = self.labels[b]
+                    continue
+            elif op == CALL:
+                if a not in self.funcoes:
+                    raise ErroInterpretacao(f"Função desconhecida: {valores[a]}")
+                argumentos = [ler(argumento) for argumento in listas[b]]
+                inicio = self.funcoes[a]
+                pilha.append((pc + 1, dest, temps, locais))
+                if len(pilha) > self.profundidade_maxima:
+                    self.profundidade_maxima = len(pilha)
+                temps = {}
+                locais = dict.fromkeys(self.locais[inicio], 0)
+                for parametro, valor in zip(listas[instrucoes[inicio][3]], argumentos):
+                    locais[parametro] = valor
+                pc = inicio + 1
+                continue
+            elif op == RETURN or op == ENDFUNC:
+                valor = ler(a) if op == RETURN else 0
+                if not pilha:
+                    break  # return no principal encerra o programa
+                pc, dest, temps, locais = pilha.pop()
+                escrever(dest, valor)
+                continue
+            pc += 1
+        return self
+
+
+def interpretar(contexto, limite=10_000_000):
+    return InterpretadorTAC(contexto).executar(limite=limite)
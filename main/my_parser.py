@@ -1,4 +1,10 @@
-from analisador_lexico import analisador_lexico
+from collections import deque
+from itertools import chain, islice
+
+from analisador_lexico import (
+    analisador_lexico, NOMES_TIPOS,
+    KEYWORD, NUMBER, ID, OP, SYMBOL,
+)
 from ast1 import (
     ProgramNode, AssignNode, ReturnNode,
     BinOpNode, NumberNode, VariableNode,
@@ -6,259 +12,352 @@ from ast1 import (
     IfNode, WhileNode, ForNode,
     ASTNode, UnaryOpNode,
 )
+from contexto_tac import COPIA
+
+EOF = -1
+TAMANHO_LOTE = 64
+EOF_TOKEN = (EOF, '')
+
+_tipo_por_nome = {nome: tipo for tipo, nome in enumerate(NOMES_TIPOS)}
+_tipo_por_nome['EOF'] = EOF
+
+
+def nome_tipo(tipo):
+    return 'EOF' if tipo == EOF else NOMES_TIPOS[tipo]
+
+PRECEDENCIA = {
+    '||': 1,
+    '&&': 2,
+    '==': 3, '!=': 3, '<': 3, '<=': 3, '>': 3, '>=': 3,
+    '+': 4, '-': 4,
+    '*': 5, '/': 5, '%': 5,
+}
+PRECEDENCIA_UNARIO = 6
+MARCA_PARENTESE = 0
+MARCA_CHAMADA = -1
 
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
+        # tokens pode ser uma lista de (tipo, valor) ou um gerador de tokens_fluxo;
+        # só um lote pequeno de tokens de lookahead fica em memória.
+        fonte = iter(tokens)
+        primeiro = next(fonte, EOF_TOKEN)
+        if primeiro[0].__class__ is str:
+            # lista antiga de (tipo, valor) com tipos por nome
+            fonte = ((_tipo_por_nome[token[0]],) + tuple(token[1:]) for token in chain((primeiro,), fonte))
+        else:
+            fonte = chain((primeiro,), fonte)
+        self._fonte = fonte
+        self._buffer = deque()
         self.pos = 0
 
+    def olhar(self, k=0):
+        buffer = self._buffer
+        if len(buffer) <= k:
+            buffer.extend(islice(self._fonte, TAMANHO_LOTE + k))
+            while len(buffer) <= k:
+                buffer.append(EOF_TOKEN)
+        return buffer[k]
+
     def token_atual(self):
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
-        return ('EOF', '')
+        if self._buffer:
+            return self._buffer[0]
+        return self.olhar(0)
+
+    def posicao(self, token):
+        if len(token) >= 4:
+            return f" na linha {token[2]}, coluna {token[3]}"
+        return ""
 
     def consumir(self, tipo_esperado):
-        tipo, valor = self.token_atual()
+        token = self.token_atual()
+        tipo, valor = token[0], token[1]
         if tipo == tipo_esperado:
+            self._buffer.popleft()
             self.pos += 1
             return valor
-        raise SyntaxError(f"Esperado {tipo_esperado}, encontrado {tipo} ({valor})")
+        raise SyntaxError(f"Esperado {nome_tipo(tipo_esperado)}, encontrado {nome_tipo(tipo)} ({valor}){self.posicao(token)}")
 
     def parse(self):
         comandos = self.cmd_list()
         return ProgramNode(comandos)
 
     def cmd_list(self):
-        comandos = []
-        while self.token_atual()[0] in ['KEYWORD', 'ID']:
-            comandos.append(self.cmd())
-        return comandos
+        return self._comandos()
 
     def cmd(self):
-        tipo, val = self.token_atual()
+        return self._comandos(um_comando=True)[0]
+
+    def _comandos(self, um_comando=False):
+        # Blocos aninhados ficam numa pilha explícita: cada entrada guarda a
+        # função que monta o nó quando o '}' chegar e a lista do nível de fora.
+        raiz = []
+        comandos = raiz
+        pilha = []
+        while True:
+            token = self.token_atual()
+            if token[0] == KEYWORD or token[0] == ID:
+                resultado = self._inicio_comando()
+                if isinstance(resultado, ASTNode):
+                    comandos.append(resultado)
+                    if um_comando and not pilha:
+                        return raiz
+                else:
+                    pilha.append((resultado, comandos))
+                    comandos = []
+            elif pilha:
+                self.consumir(SYMBOL)  # }
+                fechar, externo = pilha.pop()
+                resultado = fechar(comandos)
+                if isinstance(resultado, ASTNode):
+                    comandos = externo
+                    comandos.append(resultado)
+                    if um_comando and not pilha:
+                        return raiz
+                else:
+                    pilha.append((resultado, externo))
+                    comandos = []
+            else:
+                return raiz
+
+    def _inicio_comando(self):
+        # Devolve o nó do comando ou, se ele abre um bloco, a função que
+        # fecha esse bloco (chamada com a lista de comandos do corpo).
+        token = self.token_atual()
+        tipo, val = token[0], token[1]
 
-        if tipo == 'KEYWORD' and val == 'int':
+        if tipo == KEYWORD and val == 'int':
             
-            if self.tokens[self.pos + 1][0] == 'ID' and self.tokens[self.pos + 2][1] == '(':
-                self.consumir('KEYWORD')  # consome 'int'
-                nome = self.consumir('ID')
-                self.consumir('SYMBOL')  # (
+            if self.olhar(1)[0] == ID and self.olhar(2)[1] == '(':
+                self.consumir(KEYWORD)  # consome 'int'
+                nome = self.consumir(ID)
+                self.consumir(SYMBOL)  # (
                 params = self.param_list()
-                self.consumir('SYMBOL')  # )
-                body = self.bloco()
-                return FuncDeclNode(nome, params, body)
+                self.consumir(SYMBOL)  # )
+                self.consumir(SYMBOL)  # {
+                return lambda corpo: FuncDeclNode(nome, params, ProgramNode(corpo))
            
-            self.consumir('KEYWORD')  
+            self.consumir(KEYWORD)  
             vars = []
             while True:
-                nome = self.consumir('ID')
+                nome = self.consumir(ID)
                 valor = None
-                if self.token_atual()[0] == 'OP' and self.token_atual()[1] == '=':
-                    self.consumir('OP')  
+                if self.token_atual()[0] == OP and self.token_atual()[1] == '=':
+                    self.consumir(OP)  
                     valor = self.exp()
                 vars.append((nome, valor))
                 if self.token_atual()[1] == ',':
-                    self.consumir('SYMBOL')
+                    self.consumir(SYMBOL)
                 else:
                     break
-            self.consumir('SYMBOL')  
+            self.consumir(SYMBOL)  
             return DeclVarNode(vars)
 
         if val == 'return':
-            self.consumir('KEYWORD')
+            self.consumir(KEYWORD)
             expr = self.exp()
-            self.consumir('SYMBOL')  # ;
+            self.consumir(SYMBOL)  # ;
             return ReturnNode(expr)
 
         elif val == 'func':
-            self.consumir('KEYWORD')
-            nome = self.consumir('ID')
-            self.consumir('SYMBOL')  # (
+            self.consumir(KEYWORD)
+            nome = self.consumir(ID)
+            self.consumir(SYMBOL)  # (
             params = self.param_list()
-            self.consumir('SYMBOL')  # )
-            body = self.bloco()
-            return FuncDeclNode(nome, params, body)
+            self.consumir(SYMBOL)  # )
+            self.consumir(SYMBOL)  # {
+            return lambda corpo: FuncDeclNode(nome, params, ProgramNode(corpo))
 
         elif val == 'if':
-            self.consumir('KEYWORD')
-            self.consumir('SYMBOL')  # (
+            self.consumir(KEYWORD)
+            self.consumir(SYMBOL)  # (
             cond = self.exp()
-            self.consumir('SYMBOL')  # )
-            then_body = self.bloco().comandos
-            else_body = None
-            if self.token_atual()[1] == 'else':
-                self.consumir('KEYWORD')
-                else_body = self.bloco().comandos
-            return IfNode(cond, then_body, else_body)
+            self.consumir(SYMBOL)  # )
+            self.consumir(SYMBOL)  # {
+
+            def fechar_then(then_body):
+                if self.token_atual()[1] == 'else':
+                    self.consumir(KEYWORD)
+                    self.consumir(SYMBOL)  # {
+                    return lambda else_body: IfNode(cond, then_body, else_body)
+                return IfNode(cond, then_body, None)
+            return fechar_then
 
         elif val == 'while':
-            self.consumir('KEYWORD')
-            self.consumir('SYMBOL')  # (
+            self.consumir(KEYWORD)
+            self.consumir(SYMBOL)  # (
             cond = self.exp()
-            self.consumir('SYMBOL')  # )
-            body = self.bloco().comandos
-            return WhileNode(cond, body)
+            self.consumir(SYMBOL)  # )
+            self.consumir(SYMBOL)  # {
+            return lambda body: WhileNode(cond, body)
 
         elif val == 'for':
-            self.consumir('KEYWORD')
-            self.consumir('SYMBOL')  # (
+            self.consumir(KEYWORD)
+            self.consumir(SYMBOL)  # (
             init = self.atribuicao() if self.token_atual()[1] != ';' else None
-            self.consumir('SYMBOL')  # ;
+            self.consumir(SYMBOL)  # ;
             cond = self.exp() if self.token_atual()[1] != ';' else None
-            self.consumir('SYMBOL')  # ;
+            self.consumir(SYMBOL)  # ;
             inc = self.atribuicao() if self.token_atual()[1] != ')' else None
-            self.consumir('SYMBOL')  # )
-            body = self.bloco().comandos
-            return ForNode(init, cond, inc, body)
+            self.consumir(SYMBOL)  # )
+            self.consumir(SYMBOL)  # {
+            return lambda body: ForNode(init, cond, inc, body)
 
-        elif tipo == 'ID':
-            lookahead = self.tokens[self.pos + 1][1] if self.pos + 1 < len(self.tokens) else ''
-            if lookahead == '(':
+        elif tipo == ID:
+            if self.olhar(1)[1] == '(':
                 func_call = self.factor()
-                self.consumir('SYMBOL')  # ;
+                self.consumir(SYMBOL)  # ;
                 return func_call  
             else:
                 atrib = self.atribuicao()
-                self.consumir('SYMBOL')  # ;
+                self.consumir(SYMBOL)  # ;
                 return atrib
 
         else:
-            raise SyntaxError(f"Comando inválido: {val}")
+            raise SyntaxError(f"Comando inválido: {val}{self.posicao(token)}")
 
     def atribuicao(self):
-        var = self.consumir('ID')
-        op = self.consumir('OP')
+        var = self.consumir(ID)
+        op = self.consumir(OP)
         expr = self.exp()
         if op != '=':
             raise SyntaxError("Atribuição precisa usar '='")
         return AssignNode(var, expr)
 
     def exp(self):
-        node = self.expr_or()
-        return node
-
-    def expr_or(self):
-        node = self.expr_and()
-        while self.token_atual()[0] == 'OP' and self.token_atual()[1] == '||':
-            op = self.consumir('OP')
-            right = self.expr_and()
-            node = BinOpNode(op, node, right)
-        return node
-
-    def expr_and(self):
-        node = self.expr_rel()
-        while self.token_atual()[0] == 'OP' and self.token_atual()[1] == '&&':
-            op = self.consumir('OP')
-            right = self.expr_rel()
-            node = BinOpNode(op, node, right)
-        return node
-
-    def expr_rel(self):
-        node = self.expr_arit()
-        while self.token_atual()[0] == 'OP' and self.token_atual()[1] in ('==', '!=', '<', '<=', '>', '>='):
-            op = self.consumir('OP')
-            right = self.expr_arit()
-            node = BinOpNode(op, node, right)
-        return node
-
-    def expr_arit(self):
-        node = self.term()
-        while self.token_atual()[1] in ['+', '-']:
-            op = self.consumir('OP')
-            right = self.term()
-            node = BinOpNode(op, node, right)
-        return node
-
-    def term(self):
-        node = self.factor()
-        while self.token_atual()[1] in ['*', '/']:
-            op = self.consumir('OP')
-            right = self.factor()
-            node = BinOpNode(op, node, right)
-        return node
+        return self._expressao(False)
 
     def factor(self):
-        if self.token_atual()[0] == 'OP' and self.token_atual()[1] == '!':
-            self.consumir('OP')
-            node = self.factor()
-            return UnaryOpNode('!', node)
-
-        tipo, val = self.token_atual()
-        if tipo == 'NUMBER':
-            self.consumir('NUMBER')
-            return NumberNode(int(val))
-        elif tipo == 'ID':
-            nome = self.consumir('ID')
-            if self.token_atual()[1] == '(':
-                self.consumir('SYMBOL')
-                args = self.arg_list()
-                self.consumir('SYMBOL')
-                return FuncCallNode(nome, args)
-            else:
-                return VariableNode(nome)
-        elif val == '(':
-            self.consumir('SYMBOL')
-            expr = self.exp()
-            self.consumir('SYMBOL')
-            return expr
+        return self._expressao(True)
+
+    def _reduzir(self, operandos, operador):
+        precedencia, op = operador
+        if precedencia == PRECEDENCIA_UNARIO:
+            operandos.append(UnaryOpNode(op, operandos.pop()))
         else:
-            raise SyntaxError(f"Fator inválido: {val}")
+            right = operandos.pop()
+            operandos.append(BinOpNode(op, operandos.pop(), right))
+
+    def _expressao(self, so_fator):
+        # Operator precedence com pilhas explícitas, guiado pela tabela
+        # PRECEDENCIA. Parênteses e chamadas entram na pilha de operadores
+        # como marcadores (precedência <= 0), então o aninhamento não recursa.
+        buffer = self._buffer
+        operandos = []
+        operadores = []
+        marcadores = 0
+        esperando_operando = True
+        while True:
+            token = buffer[0] if buffer else self.olhar(0)
+            tipo, val = token[0], token[1]
+            if esperando_operando:
+                if tipo == NUMBER:
+                    buffer.popleft()
+                    self.pos += 1
+                    operandos.append(NumberNode(int(val)))
+                    esperando_operando = False
+                elif tipo == ID:
+                    buffer.popleft()
+                    self.pos += 1
+                    if self.token_atual()[1] == '(':
+                        self.consumir(SYMBOL)
+                        proximo = self.token_atual()
+                        if proximo[0] == SYMBOL and proximo[1] == ')':
+                            self.consumir(SYMBOL)
+                            operandos.append(FuncCallNode(val, []))
+                            esperando_operando = False
+                        else:
+                            operadores.append((MARCA_CHAMADA, val, []))
+                            marcadores += 1
+                    else:
+                        operandos.append(VariableNode(val))
+                        esperando_operando = False
+                elif tipo == OP and val == '!':
+                    self.consumir(OP)
+                    operadores.append((PRECEDENCIA_UNARIO, '!'))
+                elif val == '(':
+                    self.consumir(SYMBOL)
+                    operadores.append((MARCA_PARENTESE, '('))
+                    marcadores += 1
+                else:
+                    raise SyntaxError(f"Fator inválido: {val}{self.posicao(token)}")
+                continue
+
+            precedencia = PRECEDENCIA.get(val, 0) if tipo == OP else 0
+            if precedencia and not (so_fator and marcadores == 0):
+                while operadores and operadores[-1][0] >= precedencia:
+                    self._reduzir(operandos, operadores.pop())
+                buffer.popleft()
+                self.pos += 1
+                operadores.append((precedencia, val))
+                esperando_operando = True
+                continue
+
+            while operadores and operadores[-1][0] > 0:
+                self._reduzir(operandos, operadores.pop())
+            if marcadores == 0:
+                return operandos.pop()
+            marca = operadores[-1]
+            if marca[0] == MARCA_PARENTESE:
+                self.consumir(SYMBOL)  # )
+                operadores.pop()
+                marcadores -= 1
+            elif val == ',':
+                self.consumir(SYMBOL)
+                marca[2].append(operandos.pop())
+                esperando_operando = True
+            else:
+                self.consumir(SYMBOL)  # )
+                operadores.pop()
+                marcadores -= 1
+                marca[2].append(operandos.pop())
+                operandos.append(FuncCallNode(marca[1], marca[2]))
 
     def bloco(self):
-        self.consumir('SYMBOL')  # {
+        self.consumir(SYMBOL)  # {
         comandos = self.cmd_list()
-        self.consumir('SYMBOL')  # }
+        self.consumir(SYMBOL)  # }
         return ProgramNode(comandos)
 
     def param_list(self):
         params = []
         while True:
             
-            if self.token_atual()[0] == 'KEYWORD' and self.token_atual()[1] == 'int':
-                self.consumir('KEYWORD')
-            if self.token_atual()[0] == 'ID':
-                params.append(self.consumir('ID'))
+            if self.token_atual()[0] == KEYWORD and self.token_atual()[1] == 'int':
+                self.consumir(KEYWORD)
+            if self.token_atual()[0] == ID:
+                params.append(self.consumir(ID))
             else:
                 break
             if self.token_atual()[1] == ',':
-                self.consumir('SYMBOL')
+                self.consumir(SYMBOL)
             else:
                 break
         return params
 
-    def arg_list(self):
-        args = []
-        if self.token_atual()[0] != 'SYMBOL' or self.token_atual()[1] != ')':
-            args.append(self.exp())
-            while self.token_atual()[1] == ',':
-                self.consumir('SYMBOL')
-                args.append(self.exp())
-        return args
-
 class DeclVarNode(ASTNode):
+    __slots__ = ('vars',)
+
     def __init__(self, vars):
         self.vars = vars  
 
-    def gerar_assembly(self, contexto):
+    def _gerar_assembly(self, contexto):
         for nome, valor in self.vars:
-            contexto.declarar_var(nome)
             if valor is not None:
-                val_reg = valor.gerar_assembly(contexto)
-                addr_reg = contexto.novo_reg()
-                contexto.emit(f"la {addr_reg}, {nome}")
-                contexto.emit(f"sw {val_reg}, 0({addr_reg})")
+                val_reg = yield valor
+                contexto.escrever_variavel(nome, val_reg)
 
-    def gerar_tac(self, contexto):
+    def _gerar_tac(self, contexto):
         for nome, valor in self.vars:
             if valor is not None:
-                temp = valor.gerar_tac(contexto)
-                contexto.emit(f"{nome} = {temp}")
+                temp = yield valor
+                contexto.emit(COPIA, contexto.variaveis[nome], temp)
 
-    def verificar_semantica(self, contexto):
+    def _verificar_semantica(self, contexto):
         for nome, valor in self.vars:
             if not contexto.foi_declarado(nome):
                 contexto.declarar(nome, "variável")
             else:
                 contexto.erros.append(f"Variável '{nome}' já declarada.")
             if valor is not None:
-                valor.verificar_semantica(contexto)
+                yield valor
@@ -0,0 +1,216 @@
+from contexto_tac import SOMA, SUB, MUL, DIV, MOD, OU, COPIA, GOTO, RETURN, CALL, VARIAVEL, CONSTANTE
+from grafo_fluxo import BlocoBasico, construir_grafos, linearizar
+from otimizador_tac import _truncar
+
+# Otimizações de laço sobre o grafo de fluxo do TAC. Os laços vêm dos
+# while/for: o cabeçalho é o bloco da label while_N/for_N e o corpo são os
+# blocos que chegam a um salto de volta para ele sem passar pelo cabeçalho.
+# No TAC gerado por unidade (geracao_paralela), a label vem com o nome da
+# função na frente (soma.while_0); conta só o que vem depois do último '.'.
+# Antes do cabeçalho entra um pré-cabeçalho, executado uma vez por entrada
+# no laço, que recebe:
+#  - as expressões invariantes (operandos que o laço não escreve), tiradas
+#    do corpo;
+#  - o valor inicial de i * c para cada variável de indução i (só escrita
+#    por i = i + k), e a multiplicação no corpo vira uma soma de c * k.
+# Os temporários que sobram como cópias (t = s) somem com propagar_constantes.
+
+_PREFIXOS_DE_LACO = ('while_', 'for_')
+
+
+def _eh_cabecalho(label):
+    return label.rpartition('.')[2].startswith(_PREFIXOS_DE_LACO)
+
+
+def _eh_constante(contexto, operando):
+    return operando > 0 and contexto.tipos[operando] == CONSTANTE
+
+
+class _Laco:
+    __slots__ = ('cabecalho', 'blocos', 'escritos', 'tem_chamada')
+
+    def __init__(self, cabecalho, blocos):
+        self.cabecalho = cabecalho
+        self.blocos = blocos  # em ordem de programa
+        self.escritos = {}  # operando -> quantas instruções do laço o escrevem
+        self.tem_chamada = False
+        for bloco in blocos:
+            for op, dest, _, _ in bloco.instrucoes:
+                if dest:
+                    self.escritos[dest] = self.escritos.get(dest, 0) + 1
+                if op == CALL:
+                    self.tem_chamada = True
+
+    def invariante(self, contexto, operando):
+        # Uma chamada pode mudar qualquer variável; temporários, só o laço.
+        if _eh_constante(contexto, operando):
+            return True
+        if self.escritos.get(operando):
+            return False
+        return operando < 0 or not self.tem_chamada
+
+
+def _encontrar_laco(grafo, cabecalho):
+    # Laço natural dos saltos de volta para 'cabecalho' (None se não há).
+    voltas = [bloco for bloco in cabecalho.predecessores if bloco.numero >= cabecalho.numero]
+    if not voltas:
+        return None
+    numeros = {cabecalho.numero}
+    pendentes = list(voltas)
+    while pendentes:
+        bloco = pendentes.pop()
+        if bloco.numero not in numeros:
+            numeros.add(bloco.numero)
+            pendentes.extend(bloco.predecessores)
+    return _Laco(cabecalho, [grafo.blocos[numero] for numero in sorted(numeros)])
+
+
+def _inserir_pre_cabecalho(contexto, grafo, laco):
+    # Bloco novo logo antes do cabeçalho. Quem entra no laço por salto passa
+    # a saltar para ele; quem entra pela queda já cai nele. None se o bloco
+    # anterior faz parte do laço (não há um ponto de entrada só).
+    cabecalho = laco.cabecalho
+    dentro = {bloco.numero for bloco in laco.blocos}
+    if cabecalho.numero > 0 and cabecalho.numero - 1 in dentro:
+        return None
+    pre = BlocoBasico(0)
+    for bloco in cabecalho.predecessores:
+        terminador = bloco.terminador()
+        if bloco.numero in dentro or terminador is None or terminador[0] == RETURN:
+            continue
+        op, dest, a, b = terminador
+        if (a if op == GOTO else b) != cabecalho.label:
+            continue
+        if not pre.label:
+            pre.label = contexto.nova_label("pre_laco")
+        bloco.instrucoes[-1] = (op, dest, pre.label, b) if op == GOTO else (op, dest, a, pre.label)
+    grafo.blocos.insert(cabecalho.numero, pre)
+    grafo.ligar()
+    return pre
+
+
+def _mover_invariantes(contexto, laco, pre, definicoes):
+    # Só expressões em temporários de uma única definição: o valor calculado
+    # no pré-cabeçalho é o mesmo em todo uso. Divisão só por constante não
+    # nula, para não criar uma divisão por zero que o laço não faria.
+    movidas = 0
+    mudou = True
+    while mudou:
+        mudou = False
+        for bloco in laco.blocos:
+            ficam = []
+            for instrucao in bloco.instrucoes:
+                op, dest, a, b = instrucao
+                if op <= OU and dest < 0 and definicoes.get(dest) == 1 \
+                        and laco.invariante(contexto, a) and laco.invariante(contexto, b) \
+                        and not ((op == DIV or op == MOD)
+                                 and not (_eh_constante(contexto, b) and contexto.valores[b] != 0)):
+                    pre.instrucoes.append(instrucao)
+                    laco.escritos[dest] -= 1
+                    movidas += 1
+                    mudou = True
+                else:
+                    ficam.append(instrucao)
+            bloco.instrucoes = ficam
+    return movidas
+
+
+def _variaveis_de_inducao(contexto, laco):
+    # i -> (bloco, posição da escrita de i, passo) para cada variável escrita
+    # uma vez no laço, por 'i = i + k' / 'i = i - k' (direto ou via
+    # 't = i + k; i = t').
+    if laco.tem_chamada:
+        return {}
+    inducao = {}
+    for bloco in laco.blocos:
+        somas = {}
+        for posicao, (op, dest, a, b) in enumerate(bloco.instrucoes):
+            if op == SOMA and _eh_constante(contexto, a):
+                a, b = b, a
+            if (op == SOMA or op == SUB) and _eh_constante(contexto, b):
+                passo = contexto.valores[b] if op == SOMA else -contexto.valores[b]
+                somas[dest] = (a, passo)
+                if dest == a:
+                    candidata = (a, passo)
+                else:
+                    continue
+            elif op == COPIA and a in somas:
+                candidata = somas[a]
+            else:
+                continue
+            variavel, passo = candidata
+            if variavel == dest and dest > 0 and contexto.tipos[dest] == VARIAVEL \
+                    and laco.escritos.get(dest) == 1:
+                inducao[dest] = (bloco, posicao, passo)
+    return inducao
+
+
+def _reduzir_multiplicacoes(contexto, laco, pre):
+    # t = i * c  ->  t = s, com s = i * c no pré-cabeçalho e s = s + c * k
+    # logo depois de cada 'i = i + k'. Como i só muda ali, s == i * c em
+    # todo o resto do laço.
+    inducao = _variaveis_de_inducao(contexto, laco)
+    if not inducao:
+        return 0
+    acumuladores = {}  # (i, c) -> s
+    reduzidas = 0
+    for bloco in laco.blocos:
+        for posicao, (op, dest, a, b) in enumerate(bloco.instrucoes):
+            if op != MUL:
+                continue
+            if _eh_constante(contexto, a):
+                a, b = b, a
+            if a not in inducao or not _eh_constante(contexto, b):
+                continue
+            chave = (a, b)
+            if chave not in acumuladores:
+                acumuladores[chave] = contexto.novo_temp()
+            bloco.instrucoes[posicao] = (COPIA, dest, acumuladores[chave], 0)
+            reduzidas += 1
+    # Cada s = s + c * k entra logo depois da escrita de i; de trás para
+    # frente dentro do bloco, para não deslocar as outras posições.
+    incrementos = {}
+    for (variavel, fator), acumulador in acumuladores.items():
+        pre.instrucoes.append((MUL, acumulador, variavel, fator))
+        bloco, posicao, passo = inducao[variavel]
+        incremento = contexto.constantes[_truncar(passo * contexto.valores[fator])]
+        incrementos.setdefault(bloco, []).append((posicao, (SOMA, acumulador, acumulador, incremento)))
+    for bloco, novas in incrementos.items():
+        for posicao, instrucao in sorted(novas, key=lambda nova: nova[0], reverse=True):
+            bloco.instrucoes.insert(posicao + 1, instrucao)
+    return reduzidas
+
+
+def otimizar_lacos(contexto):
+    # Devolve as estatísticas. Melhor seguida de propagar_constantes, que
+    # apaga as cópias deixadas pela redução.
+    grafos = construir_grafos(contexto)
+    lacos = movidas = reduzidas = 0
+    for grafo in grafos:
+        definicoes = {}
+        for bloco in grafo.blocos:
+            for _, dest, _, _ in bloco.instrucoes:
+                if dest:
+                    definicoes[dest] = definicoes.get(dest, 0) + 1
+        tamanhos = {}
+        for bloco in grafo.blocos:
+            if bloco.label and _eh_cabecalho(contexto.valores[bloco.label]):
+                laco = _encontrar_laco(grafo, bloco)
+                if laco is not None:
+                    tamanhos[bloco.label] = len(laco.blocos)
+        # Os de dentro primeiro: o que sobe para o pré-cabeçalho deles ainda
+        # pode sair do laço de fora.
+        for label in sorted(tamanhos, key=tamanhos.get):
+            laco = _encontrar_laco(grafo, grafo.bloco_da_label[label])
+            pre = _inserir_pre_cabecalho(contexto, grafo, laco)
+            if pre is None:
+                continue
+            lacos += 1
+            movidas += _mover_invariantes(contexto, laco, pre, definicoes)
+            reduzidas += _reduzir_multiplicacoes(contexto, laco, pre)
+    linearizar(contexto, grafos)
+    return {
+        'lacos': lacos,
+        'instrucoes_movidas': movidas,
+        'multiplicacoes_reduzidas': reduzidas,
+    }
@@ -0,0 +1,293 @@
+import re
+
+from alocador_registradores import DEFINE_PRIMEIRO, REGISTRADOR_VIRTUAL, eh_virtual
+
+# Peephole sobre o assembly ainda com registradores virtuais (antes da
+# alocação). Cada regra olha uma janela de linhas consecutivas do mesmo bloco
+# e devolve (quantas linhas consome, linhas novas, renomeações) ou None.
+# Como os virtuais de novo_reg têm uma única definição, contar usos e
+# definições (_Unidade) basta para saber se um valor morre dentro da janela.
+
+
+def _partes(linha):
+    opcode, _, resto = linha.strip().partition(' ')
+    return opcode, [parte.strip() for parte in resto.split(',')] if resto else []
+
+
+def _cabe_em_12_bits(valor):
+    return -2048 <= valor <= 2047
+
+
+class _Unidade:
+    # O que as regras sabem além da janela: quantas vezes cada virtual é
+    # lido e escrito na unidade, e quais guardam o endereço de uma variável.
+    __slots__ = ('usos', 'definicoes', 'enderecos')
+
+    def __init__(self):
+        self.usos = {}
+        self.definicoes = {}
+        self.enderecos = {}
+
+    def unico(self, virtual, leituras=1):
+        return self.usos.get(virtual, 0) == leituras and self.definicoes.get(virtual, 0) == leituras
+
+    def variavel(self, base):
+        if self.definicoes.get(base) == 1:
+            return self.enderecos.get(base)
+        return None
+
+
+def _la_repetido(janela, unidade):
+    # la vA, x ... la vB, x  ->  o segundo some e vB passa a ser vA.
+    opcode, operandos = _partes(janela[0])
+    if opcode != 'la' or not eh_virtual(operandos[0]) or unidade.definicoes.get(operandos[0]) != 1:
+        return None
+    for posicao in range(1, len(janela)):
+        outro, outros = _partes(janela[posicao])
+        if outro in ('call', 'jal'):
+            return None
+        if outro == 'la' and outros[1] == operandos[1] and eh_virtual(outros[0]) \
+                and unidade.definicoes.get(outros[0]) == 1:
+            return posicao + 1, janela[:posicao], {outros[0]: operandos[0]}
+    return None
+
+
+def _escreve(linha, registrador):
+    opcode, operandos = _partes(linha)
+    return opcode in DEFINE_PRIMEIRO and operandos and operandos[0] == registrador
+
+
+def _sw_seguido_de_lw(janela, unidade):
+    # sw vX, d(vA) ; ... ; lw vY, d(vA)  ->  o lw vira mv vY, vX. No meio só
+    # podem aparecer stores em outras variáveis, e nada que mude vX ou vA.
+    opcode, guardar = _partes(janela[0])
+    if opcode != 'sw':
+        return None
+    valor, endereco = guardar
+    base = endereco[endereco.index('(') + 1:-1]
+    variavel = unidade.variavel(base)
+    for posicao in range(1, len(janela)):
+        linha = janela[posicao]
+        outro, outros = _partes(linha)
+        if outro == 'lw' and outros[1] == endereco:
+            return posicao + 1, janela[:posicao] + [f"mv {outros[0]}, {valor}"], None
+        if outro in ('call', 'jal', 'ecall') or _escreve(linha, valor) or _escreve(linha, base):
+            return None
+        if outro == 'sw':
+            outra_base = outros[1][outros[1].index('(') + 1:-1]
+            outra = unidade.variavel(outra_base)
+            if variavel is None or outra is None or outra == variavel:
+                return None
+    return None
+
+
+# Desvio equivalente a "beq vD, zero, L" para cada forma de calcular vD.
+_DESVIO_INVERSO = {'seqz': 'bne', 'snez': 'beq'}
+
+
+def _li_zero(janela, unidade):
+    # li vC, 0 com um único uso: o uso lê direto de zero.
+    opcode, operandos = _partes(janela[0])
+    if opcode == 'li' and operandos[1] == '0' and eh_virtual(operandos[0]) and unidade.unico(operandos[0]):
+        return 1, [], {operandos[0]: 'zero'}
+    return None
+
+
+def _li_e_add(janela, unidade):
+    # li vB, c ; ... ; add vD, vA, vB  ->  addi vD, vA, c (vB sem outro uso)
+    opcode, operandos = _partes(janela[0])
+    if opcode != 'li' or not eh_virtual(operandos[0]) or not unidade.unico(operandos[0]):
+        return None
+    constante = operandos[0]
+    valor = int(operandos[1])
+    for posicao in range(1, len(janela)):
+        if constante not in REGISTRADOR_VIRTUAL.findall(janela[posicao]):
+            continue
+        outro, outros = _partes(janela[posicao])
+        if outro == 'add' and outros[2] == constante and outros[1] != constante:
+            base, imediato = outros[1], valor
+        elif outro == 'add' and outros[1] == constante and outros[2] != constante:
+            base, imediato = outros[2], valor
+        elif outro == 'sub' and outros[2] == constante and outros[1] != constante:
+            # Se é um '==' ou '!=' indo para um desvio, a regra de comparação
+            # aproveita melhor o sub.
+            if posicao + 1 < len(janela) and _partes(janela[posicao + 1])[0] in _DESVIO_INVERSO:
+                return None
+            base, imediato = outros[1], -valor
+        else:
+            return None
+        if not _cabe_em_12_bits(imediato):
+            return None
+        return posicao + 1, janela[1:posicao] + [f"addi {outros[0]}, {base}, {imediato}"], None
+    return None
+
+
+def _op_e_mv(janela, unidade):
+    # op vX, ... ; ... ; mv R, vX  ->  op R, ...  (vX só existia para o mv).
+    # O op continua no lugar; basta que nada no meio leia ou escreva R.
+    opcode, operandos = _partes(janela[0])
+    if opcode not in DEFINE_PRIMEIRO or not operandos:
+        return None
+    temporario = operandos[0]
+    if not eh_virtual(temporario) or not unidade.unico(temporario):
+        return None
+    for posicao in range(1, len(janela)):
+        outro, outros = _partes(janela[posicao])
+        if outro == 'mv' and outros[1] == temporario:
+            destino = outros[0]
+            meio = janela[1:posicao]
+            uso = re.compile(rf'(?<![\w%]){re.escape(destino)}(?!\w)')
+            if any(uso.search(linha) for linha in meio):
+                return None
+            return posicao + 1, [f"{opcode} {', '.join([destino] + operandos[1:])}"] + meio, None
+        if outro in ('call', 'jal', 'ecall') or temporario in REGISTRADOR_VIRTUAL.findall(janela[posicao]):
+            return None
+    return None
+
+
+def _comparacao_e_desvio(janela, unidade):
+    #   sub vD, l, r ; seqz vD, vD ; beq vD, zero, L  ->  bne l, r, L
+    #   sub vD, l, r ; snez vD, vD ; beq vD, zero, L  ->  beq l, r, L
+    #   slt vD, l, r ; xori vD, vD, 1 ; beq vD, zero, L  ->  blt l, r, L
+    #   slt vD, l, r ; beq vD, zero, L  ->  bge l, r, L
+    opcode, operandos = _partes(janela[0])
+    if opcode not in ('sub', 'slt') or not eh_virtual(operandos[0]) or len(janela) < 2:
+        return None
+    destino = operandos[0]
+    esquerda, direita = operandos[1], operandos[2]
+    if destino in (esquerda, direita):
+        return None
+    segundo, meio = _partes(janela[1])
+    if opcode == 'slt' and segundo == 'beq' and meio[:2] == [destino, 'zero'] \
+            and unidade.unico(destino):
+        return 2, [f"bge {esquerda}, {direita}, {meio[2]}"], None
+    if len(janela) < 3:
+        return None
+    terceiro, desvio = _partes(janela[2])
+    if terceiro != 'beq' or desvio[:2] != [destino, 'zero'] or not unidade.unico(destino, 2):
+        return None
+    if opcode == 'sub' and segundo in _DESVIO_INVERSO and meio == [destino, destino]:
+        return 3, [f"{_DESVIO_INVERSO[segundo]} {esquerda}, {direita}, {desvio[2]}"], None
+    if opcode == 'slt' and segundo == 'xori' and meio == [destino, destino, '1']:
+        return 3, [f"blt {esquerda}, {direita}, {desvio[2]}"], None
+    return None
+
+
+# (nome, opcodes que abrem o padrão, tamanho da janela, função). Outras
+# regras entram nesta lista ou numa lista própria passada para aplicar_peephole.
+REGRAS = [
+    ('la repetido', {'la'}, 16, _la_repetido),
+    ('sw seguido de lw', {'sw'}, 8, _sw_seguido_de_lw),
+    ('li 0 vira zero', {'li'}, 1, _li_zero),
+    ('li + add/sub vira addi', {'li'}, 4, _li_e_add),
+    ('op + mv vira op no destino', DEFINE_PRIMEIRO, 8, _op_e_mv),
+    ('comparação + beq zero vira desvio', {'sub', 'slt'}, 3, _comparacao_e_desvio),
+]
+
+# Depois de uma troca, quantas linhas voltar: basta para os padrões de
+# tamanho fixo terminarem na linha nova.
+_RECUO = 3
+
+
+def _eh_label(linha):
+    return linha.endswith(':') and ' ' not in linha
+
+
+def _encerra_bloco(linha):
+    opcode = linha.strip().partition(' ')[0]
+    return opcode in ('j', 'ret') or (opcode.startswith('b') and opcode != 'b')
+
+
+def _contar(linha, unidade, sinal):
+    opcode, operandos = _partes(linha)
+    if opcode in DEFINE_PRIMEIRO and operandos:
+        escritos = REGISTRADOR_VIRTUAL.findall(operandos[0])
+        lidos = REGISTRADOR_VIRTUAL.findall(', '.join(operandos[1:]))
+        if opcode == 'la' and sinal > 0:
+            unidade.enderecos[operandos[0]] = operandos[1]
+    else:
+        escritos = []
+        lidos = REGISTRADOR_VIRTUAL.findall(', '.join(operandos))
+    for virtual in escritos:
+        unidade.definicoes[virtual] = unidade.definicoes.get(virtual, 0) + sinal
+    for virtual in lidos:
+        unidade.usos[virtual] = unidade.usos.get(virtual, 0) + sinal
+
+
+def _renomear(linha, renomeados):
+    return REGISTRADOR_VIRTUAL.sub(
+        lambda encontrado: renomeados.get(encontrado.group(0), encontrado.group(0)), linha)
+
+
+def _otimizar_unidade(linhas, regras, acertos):
+    linhas = list(linhas)
+    unidade = _Unidade()
+    for linha in linhas:
+        _contar(linha, unidade, 1)
+    por_opcode = {}
+    for regra in regras:
+        for opcode in regra[1]:
+            por_opcode.setdefault(opcode, []).append(regra)
+    maior_janela = max(regra[2] for regra in regras)
+    # Renomeações valem da definição removida em diante; as linhas antes de
+    # 'renomeadas_ate' já estão com os nomes novos.
+    renomeados = {}
+    renomeadas_ate = 0
+    posicao = 0
+    while posicao < len(linhas):
+        fim = min(posicao + maior_janela, len(linhas))
+        if renomeados and renomeadas_ate < fim:
+            for indice in range(max(renomeadas_ate, posicao), fim):
+                linhas[indice] = _renomear(linhas[indice], renomeados)
+            renomeadas_ate = fim
+        candidatas = por_opcode.get(linhas[posicao].strip().partition(' ')[0])
+        if not candidatas:
+            posicao += 1
+            continue
+        # A janela vai até o fim do bloco básico: para antes de uma label e
+        # inclui o desvio que encerra o bloco.
+        janela = []
+        for linha in linhas[posicao:fim]:
+            if _eh_label(linha):
+                break
+            janela.append(linha)
+            if _encerra_bloco(linha):
+                break
+        for nome, _, tamanho, regra in candidatas:
+            resultado = regra(janela[:tamanho], unidade)
+            if resultado is None:
+                continue
+            consumidas, novas, renomear = resultado
+            for linha in janela[:consumidas]:
+                _contar(linha, unidade, -1)
+            for linha in novas:
+                _contar(linha, unidade, 1)
+            linhas[posicao:posicao + consumidas] = novas
+            renomeadas_ate = max(renomeadas_ate + len(novas) - consumidas, posicao)
+            if renomear:
+                for antigo, novo in renomear.items():
+                    renomeados[antigo] = novo
+                    unidade.usos[novo] = unidade.usos.get(novo, 0) + unidade.usos.pop(antigo, 0)
+                    unidade.definicoes.pop(antigo, None)
+                for indice in range(posicao, renomeadas_ate):
+                    linhas[indice] = _renomear(linhas[indice], renomear)
+            acertos[nome] += 1
+            # Volta um pouco: a troca pode formar um padrão com o que veio antes.
+            posicao = max(posicao - _RECUO, 0)
+            break
+        else:
+            posicao += 1
+    if renomeados:
+        for indice in range(renomeadas_ate, len(linhas)):
+            linhas[indice] = _renomear(linhas[indice], renomeados)
+    return linhas
+
+
+def aplicar_peephole(contexto, regras=REGRAS):
+    # Roda as regras sobre o principal e cada função; devolve quantas vezes
+    # cada regra disparou.
+    acertos = {regra[0]: 0 for regra in regras}
+    contexto.codigo = _otimizar_unidade(contexto.codigo, regras, acertos)
+    contexto.funcoes = [(nome, _otimizar_unidade(linhas, regras, acertos))
+                        for nome, linhas in contexto.funcoes]
+    return acertos
@@ -0,0 +1,96 @@
+from contexto_tac import OU, COPIA
+from fluxo_dados import Vivas, ExpressoesDisponiveis, expressao, locais_das_funcoes
+from grafo_fluxo import construir_grafos, linearizar
+
+# Clientes de fluxo_dados sobre o TAC:
+#  - eliminar_stores_mortos: some toda escrita (conta ou cópia) cujo valor
+#    ninguém lê antes da próxima escrita ou do fim da unidade;
+#  - eliminar_subexpressoes_comuns: uma expressão recalculada com os mesmos
+#    operandos, em todo caminho até ali, passa a ser lida de um temporário.
+
+
+def eliminar_stores_mortos(contexto):
+    # Repete até nada mudar: apagar um store pode matar os que o alimentam
+    # em outro bloco. Devolve as estatísticas, com as variáveis que tinham
+    # valores nunca lidos.
+    grafos = construir_grafos(contexto)
+    locais = locais_das_funcoes(contexto, grafos)
+    removidos = 0
+    nunca_lidas = set()
+    for grafo in grafos:
+        mudou = True
+        while mudou:
+            mudou = False
+            vivas = Vivas(contexto, grafo, locais.get(grafo.funcao, ()))
+            for numero, bloco in enumerate(grafo.blocos):
+                vivo = vivas.saida[numero]
+                ficam = []
+                for instrucao in reversed(bloco.instrucoes):
+                    op, dest = instrucao[0], instrucao[1]
+                    if (op <= OU or op == COPIA) and not vivas.viva(vivo, dest):
+                        removidos += 1
+                        mudou = True
+                        if dest > 0:
+                            nunca_lidas.add(contexto.valores[dest])
+                        continue
+                    escrito, lido = vivas.efeito(instrucao)
+                    vivo = (vivo & ~escrito) | lido
+                    ficam.append(instrucao)
+                ficam.reverse()
+                bloco.instrucoes = ficam
+    linearizar(contexto, grafos)
+    return {
+        'stores_removidos': removidos,
+        'variaveis_nunca_lidas': sorted(nome for nome in nunca_lidas if '.' not in nome),
+    }
+
+
+def _repetidas(disponiveis, grafo):
+    # Expressões calculadas em algum ponto onde já estão disponíveis.
+    indice = disponiveis.bits.indice
+    repetidas = set()
+    for numero, bloco in enumerate(grafo.blocos):
+        vetor = disponiveis.entrada[numero]
+        for instrucao in bloco.instrucoes:
+            op, _, a, b = instrucao
+            if op <= OU:
+                bit = indice.get(expressao(op, a, b))
+                if bit is not None and vetor >> bit & 1:
+                    repetidas.add(bit)
+            vetor = disponiveis.aplicar(vetor, instrucao)
+    return repetidas
+
+
+def eliminar_subexpressoes_comuns(contexto):
+    # Cada expressão repetida ganha um temporário escrito em todo cálculo
+    # dela; onde ela está disponível, o cálculo vira cópia desse
+    # temporário. Melhor seguida de propagar_constantes e
+    # eliminar_stores_mortos, que apagam as cópias que sobram.
+    grafos = construir_grafos(contexto)
+    eliminadas = 0
+    for grafo in grafos:
+        disponiveis = ExpressoesDisponiveis(contexto, grafo)
+        repetidas = _repetidas(disponiveis, grafo)
+        if not repetidas:
+            continue
+        guarda = {bit: contexto.novo_temp() for bit in sorted(repetidas)}
+        indice = disponiveis.bits.indice
+        for numero, bloco in enumerate(grafo.blocos):
+            vetor = disponiveis.entrada[numero]
+            novas = []
+            for instrucao in bloco.instrucoes:
+                op, dest, a, b = instrucao
+                bit = indice.get(expressao(op, a, b)) if op <= OU else None
+                if bit in guarda:
+                    if vetor >> bit & 1:
+                        novas.append((COPIA, dest, guarda[bit], 0))
+                        eliminadas += 1
+                    else:
+                        novas.append((op, guarda[bit], a, b))
+                        novas.append((COPIA, dest, guarda[bit], 0))
+                else:
+                    novas.append(instrucao)
+                vetor = disponiveis.aplicar(vetor, instrucao)
+            bloco.instrucoes = novas
+    linearizar(contexto, grafos)
+    return {'expressoes_eliminadas': eliminadas}
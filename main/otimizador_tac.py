@@ -0,0 +1,238 @@
+from heapq import heappop, heappush
+
+from contexto_tac import (
+    SOMA, SUB, MUL, DIV, MOD, IGUAL, DIFERENTE, MENOR, MENOR_IGUAL, MAIOR, MAIOR_IGUAL, E, OU,
+    COPIA, GOTO, IFNOT, IF, CALL, RETURN,
+    VARIAVEL, CONSTANTE,
+)
+from grafo_fluxo import construir_grafos, linearizar
+
+
+def _truncar(valor):
+    # Palavras de 32 bits com sinal, como no alvo RISC-V.
+    valor &= 0xFFFFFFFF
+    return valor - (1 << 32) if valor & 0x80000000 else valor
+
+
+def _dobrar(op, x, y):
+    # Mesma semântica do assembly gerado: divisão truncada para zero e
+    # comparações/lógicos resultando em 0 ou 1. Divisão por zero não é dobrada.
+    if op == SOMA:
+        return _truncar(x + y)
+    if op == SUB:
+        return _truncar(x - y)
+    if op == MUL:
+        return _truncar(x * y)
+    if op == DIV or op == MOD:
+        if y == 0:
+            return None
+        quociente = abs(x) // abs(y)
+        if (x < 0) != (y < 0):
+            quociente = -quociente
+        return _truncar(quociente if op == DIV else x - quociente * y)
+    if op == IGUAL:
+        return int(x == y)
+    if op == DIFERENTE:
+        return int(x != y)
+    if op == MENOR:
+        return int(x < y)
+    if op == MENOR_IGUAL:
+        return int(x <= y)
+    if op == MAIOR:
+        return int(x > y)
+    if op == MAIOR_IGUAL:
+        return int(x >= y)
+    if op == E:
+        return int(x != 0 and y != 0)
+    return int(x != 0 or y != 0)
+
+
+def _limitar_ao_bloco(estado):
+    # Temporários quase sempre nascem e morrem dentro do bloco que avalia a
+    # expressão (a exceção é o resultado de && e ||, escrito nos dois lados
+    # do curto-circuito); fatos sobre eles (ou cópias deles) não atravessam labels.
+    for chave in [chave for chave, valor in estado.items() if chave < 0 or valor < 0]:
+        del estado[chave]
+
+
+class _Propagacao:
+    def __init__(self, contexto):
+        self.contexto = contexto
+        self.dobradas = 0
+        self.propagadas = 0
+        self.desvios = 0
+
+    def constante(self, operando):
+        # Valor inteiro do operando, ou None se ele não for constante.
+        if operando > 0 and self.contexto.tipos[operando] == CONSTANTE:
+            return self.contexto.valores[operando]
+        return None
+
+    def matar(self, estado, nome):
+        # 'nome' foi redefinido: some o fato sobre ele e toda cópia dele.
+        estado.pop(nome, None)
+        for chave in [chave for chave, valor in estado.items() if valor == nome]:
+            del estado[chave]
+
+    def matar_variaveis(self, estado):
+        # Uma chamada pode alterar qualquer variável (todas são globais).
+        tipos = self.contexto.tipos
+        for chave in [chave for chave, valor in estado.items()
+                      if (chave > 0 and tipos[chave] == VARIAVEL) or (valor > 0 and tipos[valor] == VARIAVEL)]:
+            del estado[chave]
+
+    def usar(self, estado, operando, reescrever):
+        valor = estado.get(operando, operando)
+        if reescrever and valor != operando:
+            self.propagadas += 1
+        return valor
+
+    def transferir(self, grafo, bloco, estado, reescrever):
+        # Aplica o bloco sobre 'estado' e devolve os sucessores alcançáveis.
+        # Com 'reescrever', grava as instruções simplificadas no bloco.
+        contexto = self.contexto
+        sucessores = bloco.sucessores
+        novas = []
+        for instrucao in bloco.instrucoes:
+            op, dest, a, b = instrucao
+            nova = instrucao
+            if op <= OU:
+                a = self.usar(estado, a, reescrever)
+                b = self.usar(estado, b, reescrever)
+                x, y = self.constante(a), self.constante(b)
+                valor = _dobrar(op, x, y) if x is not None and y is not None else None
+                self.matar(estado, dest)
+                if valor is None:
+                    nova = (op, dest, a, b)
+                else:
+                    nova = (COPIA, dest, contexto.constantes[valor], 0)
+                    estado[dest] = nova[2]
+                    if reescrever:
+                        self.dobradas += 1
+            elif op == COPIA:
+                a = self.usar(estado, a, reescrever)
+                self.matar(estado, dest)
+                if a != dest:
+                    estado[dest] = a
+                nova = (op, dest, a, b)
+            elif op == CALL:
+                argumentos = [self.usar(estado, arg, reescrever) for arg in contexto.listas[b]]
+                if reescrever and tuple(argumentos) != contexto.listas[b]:
+                    b = contexto.lista(argumentos)
+                self.matar(estado, dest)
+                self.matar_variaveis(estado)
+                nova = (op, dest, a, b)
+            elif op == RETURN:
+                nova = (op, dest, self.usar(estado, a, reescrever), b)
+            elif op == IFNOT or op == IF:
+                a = self.usar(estado, a, reescrever)
+                condicao = self.constante(a)
+                nova = (op, dest, a, b)
+                if condicao is not None:
+                    # Só um dos lados é seguido: a queda ou a label.
+                    destino = grafo.bloco_da_label[b]
+                    proximo = grafo.proximo(bloco)
+                    if (condicao != 0) == (op == IFNOT):
+                        nova = None
+                        sucessores = [proximo] if proximo is not None else []
+                    else:
+                        nova = (GOTO, 0, b, 0)
+                        sucessores = [destino]
+                    if reescrever:
+                        self.desvios += 1
+            if nova is not None:
+                novas.append(nova)
+        if reescrever:
+            bloco.instrucoes = novas
+        return sucessores
+
+    def executar(self, grafo):
+        # Estados de entrada: None significa "ainda não alcançado". Os blocos
+        # pendentes saem sempre em ordem de programa (heap), o que faz os laços
+        # convergirem em poucas voltas.
+        blocos = grafo.blocos
+        entrada = [None] * len(blocos)
+        entrada[0] = {}
+        pendentes = [0]
+        na_fila = {0}
+        while pendentes:
+            numero = heappop(pendentes)
+            na_fila.discard(numero)
+            estado = dict(entrada[numero])
+            sucessores = self.transferir(grafo, blocos[numero], estado, False)
+            _limitar_ao_bloco(estado)
+            for sucessor in sucessores:
+                anterior = entrada[sucessor.numero]
+                if anterior is None:
+                    novo = estado
+                else:
+                    novo = {chave: valor for chave, valor in anterior.items() if estado.get(chave) == valor}
+                if novo != anterior:
+                    entrada[sucessor.numero] = novo
+                    if sucessor.numero not in na_fila:
+                        na_fila.add(sucessor.numero)
+                        heappush(pendentes, sucessor.numero)
+        for numero, bloco in enumerate(blocos):
+            if entrada[numero] is not None:
+                self.transferir(grafo, bloco, dict(entrada[numero]), True)
+        grafo.ligar()
+
+
+def _remover_temps_mortos(contexto, instrucoes):
+    # Temporários são lidos onde a expressão foi gerada; depois da
+    # propagação muitos ficam sem uso. Chamadas são mantidas.
+    usos = {}
+    for instrucao in instrucoes:
+        if instrucao is None:
+            continue
+        for operando in _usos(contexto, instrucao):
+            if operando < 0:
+                usos[operando] = usos.get(operando, 0) + 1
+    # Percorre de trás para frente: os usos de um temporário vêm depois da
+    # definição, então cadeias inteiras caem numa única passada.
+    for indice in range(len(instrucoes) - 1, -1, -1):
+        instrucao = instrucoes[indice]
+        if instrucao is None:
+            continue
+        op, dest, _, _ = instrucao
+        if dest < 0 and op != CALL and not usos.get(dest):
+            instrucoes[indice] = None
+            for operando in _usos(contexto, instrucao):
+                if operando < 0:
+                    usos[operando] -= 1
+
+def _usos(contexto, instrucao):
+    op, _, a, b = instrucao
+    if op <= OU:
+        return (a, b)
+    if op == COPIA or op == RETURN or op == IFNOT or op == IF:
+        return (a,)
+    if op == CALL:
+        return contexto.listas[b]
+    return ()
+
+
+def _temps_definidos(instrucoes):
+    return {dest for _, dest, _, _ in instrucoes if dest < 0}
+
+
+def propagar_constantes(contexto):
+    # Dobra expressões constantes e propaga constantes e cópias pelo grafo de
+    # fluxo de cada unidade (inclusive através das labels de if/while/for).
+    # Desvios com condição constante viram goto ou somem. Devolve as estatísticas.
+    originais = contexto.instrucoes
+    grafos = construir_grafos(contexto)
+    propagacao = _Propagacao(contexto)
+    for grafo in grafos:
+        propagacao.executar(grafo)
+    linearizar(contexto, grafos)
+    instrucoes = contexto.instrucoes
+    _remover_temps_mortos(contexto, instrucoes)
+    contexto.instrucoes = [instrucao for instrucao in instrucoes if instrucao is not None]
+    return {
+        'instrucoes_removidas': len(originais) - len(contexto.instrucoes),
+        'temps_removidos': len(_temps_definidos(originais)) - len(_temps_definidos(contexto.instrucoes)),
+        'expressoes_dobradas': propagacao.dobradas,
+        'operandos_propagados': propagacao.propagadas,
+        'desvios_resolvidos': propagacao.desvios,
+    }
@@ -0,0 +1,46 @@
+from ast1 import AssignNode, VariableNode, FuncDeclNode, ExpansaoNode, filhos
+from my_parser import DeclVarNode
+
+
+def classificar_variaveis(raiz):
+    # Decide quais variáveis podem morar em registradores. Devolve o conjunto
+    # do programa principal e um conjunto por função.
+    #  - numa função, parâmetros, 'int x' e nomes que o principal não usa são
+    #    locais (mesma regra de escopo de ContextoSemantico);
+    #  - no principal, só as variáveis que nenhuma função lê ou escreve; as
+    #    demais continuam em .data, acessadas com la/lw/sw. Uma global escrita
+    #    num corpo expandido conta como usada por função, mesmo que a
+    #    declaração já tenha sido removida: em 'g + f()', g é lida antes da
+    #    expansão de f escrever nela, como numa chamada.
+    usadas = {None: set()}
+    locais = {}
+    escritas_em_expansoes = set()
+    pendentes = [(raiz, None, False)]
+    while pendentes:
+        node, funcao, expandido = pendentes.pop()
+        if isinstance(node, FuncDeclNode):
+            locais.setdefault(node.name, set()).update(node.params)
+            usadas.setdefault(node.name, set())
+            pendentes.append((node.body, node.name, False))
+            continue
+        if isinstance(node, VariableNode):
+            usadas[funcao].add(node.name)
+        elif isinstance(node, AssignNode):
+            usadas[funcao].add(node.var)
+            if expandido and '.' not in node.var:
+                escritas_em_expansoes.add(node.var)
+        elif isinstance(node, DeclVarNode):
+            for nome, _ in node.vars:
+                usadas[funcao].add(nome)
+                if funcao is not None:
+                    locais[funcao].add(nome)
+        expandido = expandido or isinstance(node, ExpansaoNode)
+        for filho in filhos(node):
+            pendentes.append((filho, funcao, expandido))
+
+    principal = usadas[None]
+    compartilhadas = escritas_em_expansoes
+    for funcao, nomes in locais.items():
+        nomes.update(usadas[funcao] - principal)
+        compartilhadas.update(usadas[funcao] - nomes)
+    return principal - compartilhadas, locais
@@ -0,0 +1,277 @@
+import sys
+from array import array
+from itertools import accumulate
+
+from ast1 import ASTNode, Saida
+from arena_ast import (
+    ArenaAST, ESQUEMA, CLASSES_OBJETO, NO, TEXTO, INTEIRO, LISTA_NOS, LISTA_TEXTOS, LISTA_PARES,
+    OBJETO, campo_do_inteiro, inteiro_do_campo,
+)
+from contexto_tac import ContextoTAC, VARIAVEL, CONSTANTE, FUNCAO
+
+# Formato binário da AST (a saída do Parser) e do TAC, para guardar ou
+# passar adiante sem analisar o fonte de novo. Um arquivo começa com a
+# marca, a versão e uma tabela de textos internados (cada um uma vez, em
+# UTF-8); tamanhos e índices pequenos vão em varint (7 bits por byte). O
+# resto são arrays de inteiros little-endian, cada um com o tipo mais
+# estreito que cabe ('b', 'h', 'i' ou 'q'), alinhados ao tamanho do item:
+# carregar só os recorta com memoryview.cast, sem copiar, de bytes ou de
+# um mmap.
+#  - AST: os arrays da ArenaAST (tipo do nó, um byte, dados e listas; o
+#    início de cada nó sai dos tipos) e o tipo de cada Saida/Entrada
+#    compartilhada. O nó carregado é uma vista da arena, que lê os campos
+#    sob demanda; materializar() a transforma em nós comuns.
+#  - TAC: tipos e valores dos operandos, as listas de CALL/FUNC e as
+#    instruções, quatro inteiros cada.
+
+MARCA_AST = b'CAST'
+MARCA_TAC = b'CTAC'
+VERSAO = 3
+
+_CAMPOS = tuple(len(formatos) for _, formatos in ESQUEMA)
+_MOLDES = tuple((classe, tuple(zip(classe.__slots__, formatos))) for classe, formatos in ESQUEMA)
+_LARGURAS = (('b', 1 << 7), ('h', 1 << 15), ('i', 1 << 31), ('q', 1 << 63))
+
+
+def _varint(saida, numero):
+    while numero >= 0x80:
+        saida.append(numero & 0x7f | 0x80)
+        numero >>= 7
+    saida.append(numero)
+
+
+def _ler_varint(dados, posicao):
+    numero = deslocamento = 0
+    while True:
+        byte = dados[posicao]
+        posicao += 1
+        numero |= (byte & 0x7f) << deslocamento
+        if byte < 0x80:
+            return numero, posicao
+        deslocamento += 7
+
+
+def _escrever_textos(saida, textos):
+    _varint(saida, len(textos))
+    for texto in textos:
+        codificado = texto.encode()
+        _varint(saida, len(codificado))
+        saida += codificado
+
+
+def _ler_textos(dados, posicao):
+    quantidade, posicao = _ler_varint(dados, posicao)
+    textos = []
+    for _ in range(quantidade):
+        tamanho, posicao = _ler_varint(dados, posicao)
+        textos.append(str(dados[posicao:posicao + tamanho], 'utf-8'))
+        posicao += tamanho
+    return textos, posicao
+
+
+def _escrever_array(saida, numeros, tipo=None):
+    if tipo is None:
+        maior = max(max(numeros, default=0), -min(numeros, default=0) - 1)
+        for tipo, limite in _LARGURAS:
+            if maior < limite:
+                break
+        else:
+            raise ValueError(f"Inteiro grande demais para o formato binário: {maior}")
+    itens = numeros if isinstance(numeros, array) and numeros.typecode == tipo else array(tipo, numeros)
+    saida.append(ord(tipo))
+    _varint(saida, len(itens))
+    saida.extend(bytes(-len(saida) % itens.itemsize))
+    if sys.byteorder == 'big':
+        itens = array(tipo, itens)
+        itens.byteswap()
+    saida += itens.tobytes()
+
+
+def _ler_array(dados, posicao):
+    tipo = chr(dados[posicao])
+    quantidade, posicao = _ler_varint(dados, posicao + 1)
+    tamanho = array(tipo).itemsize
+    posicao += -posicao % tamanho
+    fim = posicao + quantidade * tamanho
+    itens = dados[posicao:fim].cast(tipo)
+    if sys.byteorder == 'big':
+        itens = array(tipo, itens)
+        itens.byteswap()
+    return itens, fim
+
+
+def _cabecalho(dados, marca):
+    # memoryview sobre 'dados' e a posição logo depois do cabeçalho.
+    dados = memoryview(dados).cast('B')
+    if bytes(dados[:4]) != marca:
+        raise ValueError(f"Não é um arquivo {marca.decode()}")
+    versao, posicao = _ler_varint(dados, 4)
+    if versao != VERSAO:
+        raise ValueError(f"Versão {versao} do formato {marca.decode()} não suportada")
+    return dados, posicao
+
+
+def salvar_ast(raiz):
+    # bytes da AST, antes ou depois das otimizações sobre ela. CondicaoNode,
+    # que só existe durante a geração, não tem formato.
+    arena = ArenaAST()
+    try:
+        indice = arena.adicionar(raiz)
+    except KeyError as erro:
+        raise ValueError(f"Nó sem formato binário: {erro.args[0].__name__}") from None
+    saida = bytearray(MARCA_AST)
+    _varint(saida, VERSAO)
+    _varint(saida, indice)
+    _escrever_textos(saida, arena.textos)
+    _escrever_array(saida, arena.tipos, 'B')
+    _escrever_array(saida, arena.dados)
+    _escrever_array(saida, arena.listas)
+    _escrever_array(saida, [CLASSES_OBJETO.index(objeto.__class__) for objeto in arena.objetos], 'B')
+    return bytes(saida)
+
+
+def carregar_ast(dados):
+    # Raiz (uma vista da arena) da AST em 'dados', que precisa continuar
+    # vivo (e, se for um mmap, aberto) enquanto ela for usada.
+    dados, posicao = _cabecalho(dados, MARCA_AST)
+    indice, posicao = _ler_varint(dados, posicao)
+    arena = ArenaAST()
+    arena.textos, posicao = _ler_textos(dados, posicao)
+    arena.tipos, posicao = _ler_array(dados, posicao)
+    # O início de cada nó em 'dados' é a soma dos campos dos anteriores.
+    arena.inicio = array('q', accumulate(map(_CAMPOS.__getitem__, arena.tipos), initial=0))
+    arena.dados, posicao = _ler_array(dados, posicao)
+    arena.listas, posicao = _ler_array(dados, posicao)
+    classes, posicao = _ler_array(dados, posicao)
+    arena.objetos = [CLASSES_OBJETO[classe]() for classe in classes]
+    return arena.no(indice)
+
+
+def _nos_da_arena(arena, raiz):
+    # Nós comuns direto dos arrays. ArenaAST.adicionar numera cada filho
+    # depois do pai, então, do último índice para o primeiro, os filhos de
+    # um nó já existem quando ele é criado.
+    tipos, inicio, textos = arena.tipos, arena.inicio, arena.textos
+    dados, listas = arena.dados.tolist(), arena.listas.tolist()
+    objetos = [objeto.__class__() for objeto in arena.objetos]
+    nos = [None] * len(tipos)
+    for indice in range(len(tipos) - 1, raiz - 1, -1):
+        classe, campos = _MOLDES[tipos[indice]]
+        no = nos[indice] = classe.__new__(classe)
+        posicao = inicio[indice]
+        for nome, formato in campos:
+            valor = dados[posicao]
+            posicao += 1
+            if formato == TEXTO:
+                valor = textos[valor]
+            elif formato == INTEIRO:
+                valor = inteiro_do_campo(valor, textos)
+            elif valor < 0:
+                valor = None
+            elif formato == NO:
+                valor = nos[valor]
+            elif formato == OBJETO:
+                valor = objetos[valor]
+            else:
+                itens = listas[valor + 1:valor + 1 + listas[valor] * (2 if formato == LISTA_PARES else 1)]
+                if formato == LISTA_NOS:
+                    valor = [nos[item] for item in itens]
+                elif formato == LISTA_TEXTOS:
+                    valor = [textos[item] for item in itens]
+                else:
+                    valor = [(textos[itens[k]], nos[itens[k + 1]] if itens[k + 1] >= 0 else None)
+                             for k in range(0, len(itens), 2)]
+            setattr(no, nome, valor)
+    return nos[raiz]
+
+
+def materializar(raiz):
+    # Cópia de uma AST (de vistas da arena ou não) em nós comuns, que as
+    # otimizações podem alterar. Fora da arena, cada nó filho nasce vazio e
+    # é preenchido quando sai da pilha, então árvores fundas não recursam.
+    # Uma Saida/Entrada compartilhada continua compartilhada na cópia.
+    arena = getattr(raiz, '_arena', None)
+    if arena is not None:
+        return _nos_da_arena(arena, raiz._indice)
+    pendentes = []
+    objetos = {}
+
+    def copiar(valor):
+        if isinstance(valor, ASTNode):
+            classe = valor.__class__
+            if hasattr(classe, 'campos'):
+                classe = classe.__bases__[0]  # a vista é subclasse do nó real
+            copia = classe.__new__(classe)
+            pendentes.append((valor, copia))
+            return copia
+        if isinstance(valor, Saida):
+            if id(valor) not in objetos:
+                objetos[id(valor)] = valor.__class__()
+            return objetos[id(valor)]
+        if isinstance(valor, list):
+            return [copiar(item) for item in valor]
+        if isinstance(valor, tuple):
+            return tuple(copiar(item) for item in valor)
+        return valor
+
+    copia = copiar(raiz)
+    while pendentes:
+        no, vazio = pendentes.pop()
+        for nome in vazio.__slots__:
+            setattr(vazio, nome, copiar(getattr(no, nome)))
+    return copia
+
+
+def salvar_tac(contexto):
+    saida = bytearray(MARCA_TAC)
+    _varint(saida, VERSAO)
+    _varint(saida, contexto.temp_count)
+    _varint(saida, contexto.label_count)
+    # Textos: o prefixo das labels, os valores que não são constantes e as
+    # constantes que não cabem em 64 bits (como na AST).
+    textos = {contexto.prefixo_labels: 0}
+
+    def texto(valor):
+        return textos.setdefault(valor, len(textos))
+
+    valores = [0]
+    for tipo, valor in zip(contexto.tipos[1:], contexto.valores[1:]):
+        valores.append(campo_do_inteiro(valor, texto) if tipo == CONSTANTE else texto(valor))
+    _escrever_textos(saida, list(textos))
+    _escrever_array(saida, contexto.tipos, 'B')
+    _escrever_array(saida, valores)
+    _escrever_array(saida, [len(lista) for lista in contexto.listas])
+    _escrever_array(saida, [operando for lista in contexto.listas for operando in lista])
+    _escrever_array(saida, [numero for instrucao in contexto.instrucoes for numero in instrucao])
+    return bytes(saida)
+
+
+def carregar_tac(dados):
+    # ContextoTAC completo, pronto para os otimizadores e o interpretador.
+    dados, posicao = _cabecalho(dados, MARCA_TAC)
+    contexto = ContextoTAC()
+    contexto.temp_count, posicao = _ler_varint(dados, posicao)
+    contexto.label_count, posicao = _ler_varint(dados, posicao)
+    textos, posicao = _ler_textos(dados, posicao)
+    contexto.prefixo_labels = textos[0]
+    tipos, posicao = _ler_array(dados, posicao)
+    valores, posicao = _ler_array(dados, posicao)
+    tamanhos, posicao = _ler_array(dados, posicao)
+    operandos, posicao = _ler_array(dados, posicao)
+    numeros, posicao = _ler_array(dados, posicao)
+    contexto.tipos = tipos.tolist()
+    contexto.valores = [None] + [inteiro_do_campo(valor, textos) if tipo == CONSTANTE else textos[valor]
+                                 for tipo, valor in zip(contexto.tipos[1:], valores[1:])]
+    internados = {VARIAVEL: contexto.variaveis, CONSTANTE: contexto.constantes,
+                  FUNCAO: contexto.funcoes}
+    for operando, tipo in enumerate(contexto.tipos):
+        if tipo in internados:
+            internados[tipo][contexto.valores[operando]] = operando
+    inicio = 0
+    for tamanho in tamanhos:
+        contexto.listas.append(tuple(operandos[inicio:inicio + tamanho]))
+        inicio += tamanho
+    # Quatro inteiros por instrução; zip sobre o mesmo iterador os agrupa.
+    numeros = iter(numeros)
+    contexto.instrucoes = list(zip(numeros, numeros, numeros, numeros))
+    return contexto
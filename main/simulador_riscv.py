@@ -0,0 +1,219 @@
+import re
+
+# Simulador do subconjunto RV32IM que o compilador emite. Serve para conferir
+# o código gerado e contar instruções executadas, loads e stores.
+
+REGISTRADORES = (
+    ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2', 's0', 's1']
+    + [f'a{i}' for i in range(8)]
+    + [f's{i}' for i in range(2, 12)]
+    + ['t3', 't4', 't5', 't6']
+)
+_numero_do_registrador = {nome: numero for numero, nome in enumerate(REGISTRADORES)}
+_numero_do_registrador['fp'] = _numero_do_registrador['s0']
+_SP = _numero_do_registrador['sp']
+
+_memoria_operando = re.compile(r'^(-?\d+)\((\w+)\)$')
+
+# Ciclos aproximados de cada instrução num núcleo RV32IM simples em ordem:
+# as da extensão M são as caras; o resto conta 1.
+CICLOS = {'mul': 3, 'div': 34, 'rem': 34}
+
+INICIO_DADOS = 0x10000000
+TOPO_PILHA = 0x7FFFFFF0
+
+
+def _truncar(valor):
+    valor &= 0xFFFFFFFF
+    return valor - (1 << 32) if valor & 0x80000000 else valor
+
+
+def _dividir(x, y):
+    if y == 0:
+        return -1
+    quociente = abs(x) // abs(y)
+    return _truncar(-quociente if (x < 0) != (y < 0) else quociente)
+
+
+def _resto(x, y):
+    if y == 0:
+        return x
+    return _truncar(x - _dividir(x, y) * y)
+
+
+_ARITMETICAS = {
+    'add': lambda x, y: _truncar(x + y),
+    'sub': lambda x, y: _truncar(x - y),
+    'mul': lambda x, y: _truncar(x * y),
+    'div': _dividir,
+    'rem': _resto,
+    'and': lambda x, y: x & y,
+    'or': lambda x, y: x | y,
+    'xor': lambda x, y: x ^ y,
+    'slt': lambda x, y: int(x < y),
+    'sltu': lambda x, y: int((x & 0xFFFFFFFF) < (y & 0xFFFFFFFF)),
+    'sll': lambda x, y: _truncar(x << (y & 31)),
+    'sra': lambda x, y: x >> (y & 31),
+    'srl': lambda x, y: _truncar((x & 0xFFFFFFFF) >> (y & 31)),
+}
+_IMEDIATAS = {
+    'addi': 'add', 'andi': 'and', 'ori': 'or', 'xori': 'xor', 'slti': 'slt', 'sltiu': 'sltu',
+    'slli': 'sll', 'srai': 'sra', 'srli': 'srl',
+}
+_DESVIOS = {
+    'beq': lambda x, y: x == y,
+    'bne': lambda x, y: x != y,
+    'blt': lambda x, y: x < y,
+    'bge': lambda x, y: x >= y,
+    'bgt': lambda x, y: x > y,
+    'ble': lambda x, y: x <= y,
+}
+_DESVIOS_ZERO = {
+    'beqz': lambda x: x == 0,
+    'bnez': lambda x: x != 0,
+    'bltz': lambda x: x < 0,
+    'bgez': lambda x: x >= 0,
+    'bgtz': lambda x: x > 0,
+    'blez': lambda x: x <= 0,
+}
+
+
+class ErroSimulacao(Exception):
+    pass
+
+
+class SimuladorRISCV:
+    def __init__(self, linhas):
+        self.programa = []
+        self.labels = {}
+        self.enderecos = {}
+        self.memoria = {}
+        self.registradores = [0] * 32
+        self.registradores[_SP] = TOPO_PILHA
+        self.instrucoes = 0
+        self.loads = 0
+        self.stores = 0
+        self.pilha_maxima = 0  # bytes abaixo de TOPO_PILHA no ponto mais fundo
+        self.por_opcode = {}
+        self.codigo_saida = None
+        self._carregar(linhas)
+
+    def _carregar(self, linhas):
+        secao = '.text'
+        proximo_dado = INICIO_DADOS
+        for linha in linhas:
+            linha = linha.split('#', 1)[0].strip()
+            if not linha:
+                continue
+            if linha in ('.data', '.text'):
+                secao = linha
+                continue
+            if linha.startswith('.globl'):
+                continue
+            if secao == '.data':
+                nome, _, valor = linha.partition(':')
+                partes = valor.split()
+                self.enderecos[nome.strip()] = proximo_dado
+                self.memoria[proximo_dado] = int(partes[1]) if len(partes) > 1 else 0
+                proximo_dado += 4
+                continue
+            if linha.endswith(':'):
+                self.labels[linha[:-1]] = len(self.programa)
+                continue
+            opcode, _, resto = linha.partition(' ')
+            operandos = [parte.strip() for parte in resto.split(',')] if resto else []
+            self.programa.append((opcode, operandos))
+
+    def ler(self, nome):
+        numero = _numero_do_registrador.get(nome)
+        if numero is None:
+            raise ErroSimulacao(f"Registrador desconhecido: {nome}")
+        return self.registradores[numero]
+
+    def escrever(self, nome, valor):
+        numero = _numero_do_registrador.get(nome)
+        if numero is None:
+            raise ErroSimulacao(f"Registrador desconhecido: {nome}")
+        if numero:
+            self.registradores[numero] = valor
+            if numero == _SP and TOPO_PILHA - valor > self.pilha_maxima:
+                self.pilha_maxima = TOPO_PILHA - valor
+
+    def endereco(self, operando):
+        encontrado = _memoria_operando.match(operando)
+        if not encontrado:
+            raise ErroSimulacao(f"Operando de memória inválido: {operando}")
+        return self.ler(encontrado.group(2)) + int(encontrado.group(1))
+
+    def ciclos(self):
+        return sum(vezes * CICLOS.get(opcode, 1) for opcode, vezes in self.por_opcode.items())
+
+    def valor_da_variavel(self, nome):
+        return self.memoria[self.enderecos[nome]]
+
+    def executar(self, inicio='main', limite=10_000_000):
+        pc = self.labels[inicio]
+        # 'ret' para este endereço encerra a simulação.
+        self.escrever('ra', -1)
+        while self.codigo_saida is None:
+            if pc < 0:
+                break
+            if pc >= len(self.programa):
+                raise ErroSimulacao("Execução passou do fim do programa")
+            if self.instrucoes >= limite:
+                raise ErroSimulacao("Limite de instruções excedido")
+            opcode, operandos = self.programa[pc]
+            self.instrucoes += 1
+            self.por_opcode[opcode] = self.por_opcode.get(opcode, 0) + 1
+            pc = self.passo(pc, opcode, operandos)
+        return self
+
+    def passo(self, pc, opcode, operandos):
+        ler = self.ler
+        if opcode in _ARITMETICAS:
+            self.escrever(operandos[0], _ARITMETICAS[opcode](ler(operandos[1]), ler(operandos[2])))
+        elif opcode in _IMEDIATAS:
+            self.escrever(operandos[0], _ARITMETICAS[_IMEDIATAS[opcode]](ler(operandos[1]), int(operandos[2])))
+        elif opcode == 'li':
+            self.escrever(operandos[0], _truncar(int(operandos[1])))
+        elif opcode == 'la':
+            self.escrever(operandos[0], self.enderecos[operandos[1]])
+        elif opcode == 'mv':
+            self.escrever(operandos[0], ler(operandos[1]))
+        elif opcode == 'neg':
+            self.escrever(operandos[0], _truncar(-ler(operandos[1])))
+        elif opcode == 'not':
+            self.escrever(operandos[0], ~ler(operandos[1]))
+        elif opcode == 'seqz':
+            self.escrever(operandos[0], int(ler(operandos[1]) == 0))
+        elif opcode == 'snez':
+            self.escrever(operandos[0], int(ler(operandos[1]) != 0))
+        elif opcode == 'lw':
+            self.loads += 1
+            self.escrever(operandos[0], self.memoria.get(self.endereco(operandos[1]), 0))
+        elif opcode == 'sw':
+            self.stores += 1
+            self.memoria[self.endereco(operandos[1])] = ler(operandos[0])
+        elif opcode in _DESVIOS:
+            if _DESVIOS[opcode](ler(operandos[0]), ler(operandos[1])):
+                return self.labels[operandos[2]]
+        elif opcode in _DESVIOS_ZERO:
+            if _DESVIOS_ZERO[opcode](ler(operandos[0])):
+                return self.labels[operandos[1]]
+        elif opcode == 'j':
+            return self.labels[operandos[0]]
+        elif opcode in ('call', 'jal'):
+            self.escrever('ra', pc + 1)
+            return self.labels[operandos[-1]]
+        elif opcode == 'ret':
+            return ler('ra')
+        elif opcode == 'ecall':
+            if ler('a7') == 93:
+                self.codigo_saida = ler('a0')
+        else:
+            raise ErroSimulacao(f"Instrução não suportada: {opcode}")
+        return pc + 1
+
+
+def simular(linhas, limite=10_000_000):
+    return SimuladorRISCV(linhas).executar(limite=limite)
@@ -0,0 +1,176 @@
+import importlib
+from itertools import product
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from contexto_semantico import ContextoSemantico
+from contexto_tac import ContextoTAC
+from contexto_assembly import ContextoAssembly
+from otimizador_tac import propagar_constantes
+from otimizador_lacos import otimizar_lacos
+from otimizador_redundancias import eliminar_stores_mortos, eliminar_subexpressoes_comuns
+from grafo_fluxo import simplificar_fluxo
+from grafo_chamadas import remover_funcoes_mortas
+from chamadas_de_cauda import otimizar_chamadas_de_cauda
+from expansao_inline import expandir_chamadas
+from geracao_paralela import gerar_em_paralelo
+from interpretador_tac import interpretar
+from simulador_riscv import simular
+
+# Programas compilados por cada caminho (assembly com cada combinação de
+# opções, otimizações da AST, otimizações do TAC, geração por unidade) e
+# executados no simulador ou no interpretador de TAC, com os valores finais
+# das variáveis conferidos. Roda com
+#   python teste_compilacao.py
+# e para com AssertionError no primeiro valor errado. Os fontes são os
+# PROGRAMAS dos bench_*, que só medem tempo.
+
+# Todas as combinações de (variaveis_em_registradores, peephole, imediatos).
+OPCOES = tuple(product((False, True), repeat=3))
+
+ESPERADO = {
+    'bench_registradores': {
+        'expressão grande': {'r': 519, 's': -24},
+        'laço': {'t': 24099100},
+        'chamadas': {'r': 247},
+    },
+    'bench_peephole': {
+        'condições': {'pares': 150, 'iguais': 1, 'menores': 101},
+        'globais': {'g': 5050, 'n': 200, 'r': 10099},
+    },
+    'bench_condicoes': {
+        'comparações': {'a': 250, 'b': 499},
+        'curto-circuito': {'n': 407},
+        'laço com &&': {'t': 34945},
+    },
+    'bench_chamadas': {
+        'recursão': {'r': 610, 's': 3628800},
+        'folhas': {'t': 9810050},
+        'muitos argumentos': {'t': 516750},
+    },
+    'bench_selecao': {
+        'aritmética': {'s': 656400, 'h': 847},
+        'negativos': {'a': -37, 'b': -600},
+        'booleanos': {'c': 860},
+    },
+    'bench_lacos': {
+        'invariantes': {'t': 3209100},
+        'indução': {'s': 1515600},
+        'aninhados': {'s': 2372500},
+        'em função': {'t': 1019800},
+    },
+    'bench_inline': {
+        'soma em laço': {'t': 126250},
+        'retornos no meio': {'t': 271068},
+        'recursiva com ajudante': {'s': 464},
+    },
+    'bench_cauda': {
+        'acumulador': {'s': 2001000},
+        'mdc em laço': {'t': 2264},
+        'parâmetros trocados': {'f': 3524576},
+    },
+    'bench_redundancias': {
+        'subexpressões': {'s': -1852900, 'u': 5410},
+        'stores mortos': {'s': 93545},
+    },
+}
+
+
+def _ast(fonte):
+    return Parser(tokens_fluxo(fonte)).parse()
+
+
+def _ast_otimizada(fonte):
+    raiz = _ast(fonte)
+    semantico = ContextoSemantico()
+    raiz.verificar_semantica(semantico)
+    assert not semantico.erros, semantico.erros
+    remover_funcoes_mortas(raiz)
+    otimizar_chamadas_de_cauda(raiz)
+    expandir_chamadas(raiz, semantico)
+    return raiz
+
+
+def _assembly(raiz, opcoes=()):
+    contexto = ContextoAssembly(*opcoes)
+    raiz.gerar_assembly(contexto)
+    return list(contexto.linhas())
+
+
+def _tac(raiz):
+    contexto = ContextoTAC()
+    raiz.gerar_tac(contexto)
+    return contexto
+
+
+def _otimizar_tac(contexto):
+    propagar_constantes(contexto)
+    otimizar_lacos(contexto)
+    propagar_constantes(contexto)
+    eliminar_subexpressoes_comuns(contexto)
+    propagar_constantes(contexto)
+    eliminar_stores_mortos(contexto)
+    simplificar_fluxo(contexto)
+    return contexto
+
+
+def conferir(execucao, esperado, onde):
+    for variavel, valor in esperado.items():
+        obtido = execucao.valor_da_variavel(variavel)
+        assert obtido == valor, f"{onde}: {variavel} = {obtido}, esperado {valor}"
+
+
+def casos():
+    for modulo, programas in ESPERADO.items():
+        fontes = importlib.import_module(modulo).PROGRAMAS
+        for nome, esperado in programas.items():
+            yield f"{modulo} '{nome}'", fontes[nome], esperado
+
+
+def teste_assembly():
+    for onde, fonte, esperado in casos():
+        for opcoes in OPCOES:
+            conferir(simular(_assembly(_ast(fonte), opcoes)), esperado, f"{onde}, opções {opcoes}")
+
+
+def teste_otimizacoes_da_ast():
+    for onde, fonte, esperado in casos():
+        raiz = _ast_otimizada(fonte)
+        conferir(simular(_assembly(raiz)), esperado, f"{onde}, AST otimizada")
+        conferir(interpretar(_tac(raiz)), esperado, f"{onde}, TAC da AST otimizada")
+
+
+def teste_otimizacoes_do_tac():
+    for onde, fonte, esperado in casos():
+        conferir(interpretar(_tac(_ast(fonte))), esperado, f"{onde}, TAC")
+        conferir(interpretar(_otimizar_tac(_tac(_ast(fonte)))), esperado, f"{onde}, TAC otimizado")
+
+
+def teste_geracao_por_unidade():
+    for onde, fonte, esperado in casos():
+        tac, assembly = gerar_em_paralelo(_ast(fonte), processos=1)
+        conferir(interpretar(_otimizar_tac(tac)), esperado, f"{onde}, TAC por unidade")
+        conferir(simular(assembly), esperado, f"{onde}, assembly por unidade")
+
+
+def teste_nomes_de_registradores():
+    # v0, v1, ... são identificadores comuns no fonte; não podem ser
+    # confundidos com os registradores virtuais da geração.
+    fonte = '''
+int v0 = 5, v1 = 7, r = v0 + v1;
+int v3(int v4) { int v5 = v4 * 2; return v5 + v0; }
+int q = v3(r);
+int t0 = q - 1, s1 = t0 + 1, a0 = s1 * 2;
+'''
+    esperado = {'r': 12, 'q': 29, 't0': 28, 's1': 29, 'a0': 58}
+    for opcoes in OPCOES:
+        conferir(simular(_assembly(_ast(fonte), opcoes)), esperado, f"opções {opcoes}")
+    conferir(simular(_assembly(_ast_otimizada(fonte))), esperado, "AST otimizada")
+    conferir(interpretar(_otimizar_tac(_tac(_ast(fonte)))), esperado, "TAC otimizado")
+
+
+if __name__ == "__main__":
+    for nome, teste in list(globals().items()):
+        if nome.startswith('teste_'):
+            teste()
+            print(f"ok   {nome}")
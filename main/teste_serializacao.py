@@ -0,0 +1,195 @@
+import mmap
+import os
+import tempfile
+
+from analisador_lexico import tokens_fluxo
+from my_parser import Parser
+from ast1 import (
+    ProgramNode, AssignNode, VariableNode, UnaryOpNode, ExpansaoNode, SaidaNode, EntradaNode,
+    ChamadaDeCaudaNode, CondicaoNode, filhos,
+)
+from arena_ast import ESQUEMA
+from contexto_semantico import ContextoSemantico
+from contexto_tac import ContextoTAC
+from contexto_assembly import ContextoAssembly
+from otimizador_tac import propagar_constantes
+from chamadas_de_cauda import otimizar_chamadas_de_cauda
+from expansao_inline import expandir_chamadas
+from serializacao import salvar_ast, carregar_ast, materializar, salvar_tac, carregar_tac, MARCA_TAC
+from bench_serializacao import iguais
+
+# Ida e volta do formato binário (serializacao.py). Roda com
+#   python teste_serializacao.py
+# e para com AssertionError na primeira diferença.
+
+FONTE = '''
+int vazia() { return 1; }
+int dobro(int a) {
+    if (a > 10) { return a; }
+    return a * 2;
+}
+int soma(int n, int ac) {
+    if (n == 0) { return ac; }
+    return soma(n - 1, ac + n);
+}
+int x, y = 123456789012345678901234567890, z = dobro(x + 4) + vazia();
+int s = soma(10, 0);
+while (x < 3) { x = x + 1; }
+for (x = 0; x < 2; x = x + 1) { }
+if (x) { } else { y = 3; }
+if (z >= 2 && z != 5 || x <= 1) { z = z % 7 - z / 2; }
+'''
+
+
+def programa():
+    # A AST com todos os tipos de nó: os do Parser, os das otimizações e um
+    # '!' (o léxico ainda não tem esse token, então ele entra à mão).
+    raiz = Parser(tokens_fluxo(FONTE)).parse()
+    semantico = ContextoSemantico()
+    raiz.verificar_semantica(semantico)
+    assert not semantico.erros, semantico.erros
+    otimizar_chamadas_de_cauda(raiz)
+    expandir_chamadas(raiz, semantico)
+    raiz.comandos.append(AssignNode('x', UnaryOpNode('!', VariableNode('z'))))
+    return raiz
+
+
+def nos(raiz):
+    pendentes = [raiz]
+    while pendentes:
+        no = pendentes.pop()
+        yield no
+        pendentes.extend(filhos(no))
+
+
+def _classe(no):
+    return no.__class__.__bases__[0] if hasattr(no.__class__, 'campos') else no.__class__
+
+
+def copias(raiz):
+    # A vista carregada, ela materializada e a cópia direta de 'raiz'.
+    vista = carregar_ast(salvar_ast(raiz))
+    return vista, materializar(vista), materializar(raiz)
+
+
+def teste_todos_os_tipos():
+    raiz = programa()
+    assert {_classe(no) for no in nos(raiz)} == {classe for classe, _ in ESQUEMA}
+    for copia in copias(raiz):
+        assert iguais(raiz, copia)
+
+
+def teste_listas_vazias():
+    raiz = Parser(tokens_fluxo('''
+int f() { return 1; }
+int x = f();
+while (x < 3) { }
+if (x) { }
+''')).parse()
+    for copia in copias(raiz):
+        assert iguais(raiz, copia)
+        funcao, declaracao, laco, condicional = copia.comandos
+        assert funcao.params == [] and declaracao.vars[0][1].args == []
+        assert laco.body == [] and condicional.then_body == [] and condicional.else_body is None
+    for copia in copias(ProgramNode([])):
+        assert copia.comandos == []
+
+
+def teste_objetos_compartilhados():
+    raiz = programa()
+    for copia in copias(raiz):
+        todos = list(nos(copia))
+        expansoes = {id(no.saida): no.saida for no in todos
+                     if isinstance(no, ExpansaoNode) and no.saida is not None}
+        saidas = [no.saida for no in todos if isinstance(no, SaidaNode)]
+        entradas = [no.entrada for no in todos if isinstance(no, (EntradaNode, ChamadaDeCaudaNode))]
+        assert expansoes and saidas and len(entradas) >= 2
+        # Cada SaidaNode salta para a Saida da expansão dele, não para uma cópia.
+        assert all(any(saida is outra for outra in expansoes.values()) for saida in saidas)
+        assert all(entrada is entradas[0] for entrada in entradas)
+        # A cópia tem os próprios objetos: gerar código nela não mexe em 'raiz'.
+        originais = [no.saida for no in nos(raiz) if isinstance(no, SaidaNode)]
+        assert not any(saida is original for saida in saidas for original in originais)
+
+
+def _tac(raiz):
+    contexto = ContextoTAC()
+    raiz.gerar_tac(contexto)
+    return list(contexto.linhas())
+
+
+def _assembly(raiz):
+    contexto = ContextoAssembly()
+    raiz.gerar_assembly(contexto)
+    return list(contexto.linhas())
+
+
+def teste_mesma_geracao():
+    raiz = programa()
+    tac, assembly = _tac(raiz), _assembly(raiz)
+    for copia in copias(raiz):
+        assert _tac(copia) == tac
+        assert _assembly(copia) == assembly
+
+
+def teste_mmap():
+    raiz = programa()
+    contexto = ContextoTAC()
+    raiz.gerar_tac(contexto)
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome, dados in (('ast', salvar_ast(raiz)), ('tac', salvar_tac(contexto))):
+            caminho = os.path.join(diretorio, nome)
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(dados)
+            with open(caminho, 'rb') as arquivo, \
+                    mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                if nome == 'ast':
+                    assert iguais(raiz, carregar_ast(mapa))
+                    assert iguais(raiz, materializar(carregar_ast(mapa)))
+                else:
+                    assert list(carregar_tac(mapa).linhas()) == list(contexto.linhas())
+
+
+def _mesmo_contexto(original, carregado):
+    # Todas as tabelas: instruções, operandos, internados, listas e contadores.
+    assert vars(original).keys() == vars(carregado).keys()
+    for nome in vars(original):
+        assert getattr(original, nome) == getattr(carregado, nome), nome
+    assert list(original.linhas()) == list(carregado.linhas())
+
+
+def teste_tac():
+    contexto = ContextoTAC()
+    contexto.prefixo_labels = "unidade."
+    programa().gerar_tac(contexto)
+    _mesmo_contexto(contexto, carregar_tac(salvar_tac(contexto)))
+    # Depois das otimizações aparecem constantes dobradas (negativas também).
+    propagar_constantes(contexto)
+    carregado = carregar_tac(salvar_tac(contexto))
+    _mesmo_contexto(contexto, carregado)
+    # O carregado continua de onde o original parou.
+    assert carregado.novo_temp() == contexto.novo_temp()
+    assert carregado.nova_label("L") == contexto.nova_label("L")
+    _mesmo_contexto(ContextoTAC(), carregar_tac(salvar_tac(ContextoTAC())))
+
+
+def teste_dados_invalidos():
+    dados = salvar_ast(programa())
+    for errado in (b'XXXX' + dados[4:], dados[:4] + bytes([99]) + dados[5:], MARCA_TAC + dados[4:]):
+        try:
+            carregar_ast(errado)
+        except ValueError:
+            continue
+        raise AssertionError("dados inválidos aceitos")
+    try:
+        salvar_ast(ProgramNode([CondicaoNode(VariableNode('x'), None, True)]))
+    except ValueError:
+        return
+    raise AssertionError("CondicaoNode não tem formato binário")
+
+
+if __name__ == "__main__":
+    for nome, teste in list(globals().items()):
+        if nome.startswith('teste_'):
+            teste()
+            print(f"ok   {nome}")
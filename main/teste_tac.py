@@ -1,8 +1,14 @@
-from analisador_lexico import analisador_lexico
+from analisador_lexico import tokens_fluxo
 from my_parser import Parser
 from contexto_tac import ContextoTAC
+from otimizador_tac import propagar_constantes
+from otimizador_lacos import otimizar_lacos
+from otimizador_redundancias import eliminar_stores_mortos, eliminar_subexpressoes_comuns
+from grafo_fluxo import simplificar_fluxo
 from contexto_assembly import ContextoAssembly
 from contexto_semantico import ContextoSemantico
+from expansao_inline import expandir_chamadas
+from chamadas_de_cauda import otimizar_chamadas_de_cauda
 from imprimir_ast import print_ast
 codigo ='''
 int soma(int x, int y) {
@@ -10,7 +16,7 @@ int soma(int x, int y) {
 }
 '''
 
-tokens = analisador_lexico(codigo)
+tokens = tokens_fluxo(codigo)
 parser = Parser(tokens)
 ast1 = parser.parse()
 print("\nÁrvore Sintática (AST):")
@@ -21,6 +27,8 @@ ctx_sem = ContextoSemantico()
 ast1.verificar_semantica(ctx_sem)
 ctx_sem.imprimir_erros()
 ctx_sem.imprimir_tabela()
+print("\nChamadas de cauda:", otimizar_chamadas_de_cauda(ast1))
+print("Expansão de chamadas:", expandir_chamadas(ast1, ctx_sem))
 
 
 
@@ -30,9 +38,19 @@ ctx_tac = ContextoTAC()
 ast1.gerar_tac(ctx_tac)
 ctx_tac.imprimir()
 
+# TAC otimizado
+estatisticas = propagar_constantes(ctx_tac)
+print("\nPropagação de constantes:", estatisticas)
+print("Laços:", otimizar_lacos(ctx_tac))
+print("Subexpressões comuns:", eliminar_subexpressoes_comuns(ctx_tac))
+print("Stores mortos:", eliminar_stores_mortos(ctx_tac))
+print("Simplificação do fluxo:", simplificar_fluxo(ctx_tac))
+ctx_tac.imprimir()
+
 # Assembly
 ctx_asm = ContextoAssembly()
 ast1.gerar_assembly(ctx_asm)
+print("\nPeephole:", ctx_asm.aplicar_peephole())
 ctx_asm.imprimir()
 
 def gerar_assembly(self, contexto):